@@ -1,9 +1,28 @@
-from app.agent.base import BaseAgent
-from app.agent.browser import BrowserAgent
-from app.agent.mcp import MCPAgent
-from app.agent.react import ReActAgent
-from app.agent.swe import SWEAgent
-from app.agent.toolcall import ToolCallAgent
+from typing import TYPE_CHECKING
+
+from app.lazy import lazy_exports
+
+
+if TYPE_CHECKING:
+    from app.agent.base import BaseAgent
+    from app.agent.browser import BrowserAgent
+    from app.agent.mcp import MCPAgent
+    from app.agent.react import ReActAgent
+    from app.agent.swe import SWEAgent
+    from app.agent.toolcall import ToolCallAgent
+
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "BaseAgent": "app.agent.base:BaseAgent",
+        "BrowserAgent": "app.agent.browser:BrowserAgent",
+        "ReActAgent": "app.agent.react:ReActAgent",
+        "SWEAgent": "app.agent.swe:SWEAgent",
+        "ToolCallAgent": "app.agent.toolcall:ToolCallAgent",
+        "MCPAgent": "app.agent.mcp:MCPAgent",
+    },
+)
 
 
 __all__ = [
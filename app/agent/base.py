@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, nullcontext
 from typing import List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
+from app.agent.checkpoint import AgentCheckpointer
+from app.agent.compaction import build_compactor
+from app.budget import Budget, BudgetLevel, current_budget, use_budget
 from app.llm import LLM
 from app.logger import logger
 from app.sandbox.client import SANDBOX_CLIENT
@@ -42,6 +45,10 @@ class BaseAgent(BaseModel, ABC):
 
     duplicate_threshold: int = 2
 
+    checkpointer: Optional[AgentCheckpointer] = Field(
+        None, description="Saves a checkpoint of the agent after each step"
+    )
+
     class Config:
         arbitrary_types_allowed = True
         extra = "allow"  # Allow extra fields for flexibility in subclasses
@@ -53,6 +60,8 @@ class BaseAgent(BaseModel, ABC):
             self.llm = LLM(config_name=self.name.lower())
         if not isinstance(self.memory, Memory):
             self.memory = Memory()
+        if self.memory.compactor is None:
+            self.memory.compactor = build_compactor(self.llm)
         return self
 
     @asynccontextmanager
@@ -116,6 +125,9 @@ class BaseAgent(BaseModel, ABC):
     async def run(self, request: Optional[str] = None) -> str:
         """Execute the agent's main loop asynchronously.
 
+        Runs within the active budget (see ``app.budget``), or a new one from
+        ``[budget]`` when none is active, and stops once it is exhausted.
+
         Args:
             request: Optional initial user request to process.
 
@@ -132,26 +144,57 @@ class BaseAgent(BaseModel, ABC):
             self.update_memory("user", request)
 
         results: List[str] = []
-        async with self.state_context(AgentState.RUNNING):
-            while (
-                self.current_step < self.max_steps and self.state != AgentState.FINISHED
-            ):
-                self.current_step += 1
-                logger.info(f"Executing step {self.current_step}/{self.max_steps}")
-                step_result = await self.step()
+        budget = current_budget()
+        budget_scope = (
+            nullcontext(budget)
+            if budget is not None
+            else use_budget(Budget.from_config(self.name))
+        )
+        with budget_scope as budget:
+            async with self.state_context(AgentState.RUNNING):
+                await self._run_steps(results, budget)
+        await SANDBOX_CLIENT.cleanup()
+        return "\n".join(results) if results else "No steps executed"
 
-                # Check for stuck state
-                if self.is_stuck():
-                    self.handle_stuck_state()
+    async def _run_steps(self, results: List[str], budget: Budget) -> None:
+        """Step until finished, out of steps, or out of budget."""
+        while self.current_step < self.max_steps and self.state != AgentState.FINISHED:
+            if budget.level == BudgetLevel.EXHAUSTED:
+                logger.warning(f"Budget exhausted: {budget.report_line()}")
+                self.current_step = 0
+                results.append(f"Terminated: Budget exhausted ({budget.report_line()})")
+                return
 
-                results.append(f"Step {self.current_step}: {step_result}")
+            # Summarize messages evicted from memory during the last step
+            await self.memory.compact()
 
-            if self.current_step >= self.max_steps:
-                self.current_step = 0
-                self.state = AgentState.IDLE
-                results.append(f"Terminated: Reached max steps ({self.max_steps})")
-        await SANDBOX_CLIENT.cleanup()
-        return "\n".join(results) if results else "No steps executed"
+            self.current_step += 1
+            logger.info(f"Executing step {self.current_step}/{self.max_steps}")
+            step_result = await self.step()
+
+            # Check for stuck state
+            if self.is_stuck():
+                self.handle_stuck_state()
+
+            results.append(f"Step {self.current_step}: {step_result}")
+            await self.save_checkpoint()
+
+        if self.current_step >= self.max_steps:
+            self.current_step = 0
+            self.state = AgentState.IDLE
+            results.append(f"Terminated: Reached max steps ({self.max_steps})")
+
+    async def save_checkpoint(self) -> None:
+        """Checkpoint the agent, if a checkpointer is set.
+
+        A failed checkpoint is logged and does not stop the run.
+        """
+        if self.checkpointer is None:
+            return
+        try:
+            await self.checkpointer.save(self)
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint {self.name}: {e}")
 
     @abstractmethod
     async def step(self) -> str:
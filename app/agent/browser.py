@@ -1,5 +1,5 @@
 import json
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
 from pydantic import Field, model_validator
 
@@ -7,21 +7,40 @@ from app.agent.toolcall import ToolCallAgent
 from app.logger import logger
 from app.prompt.browser import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import Message, ToolChoice
-from app.tool import BrowserUseTool, Terminate, ToolCollection
+from app.tool import Terminate, ToolCollection
+from app.tool.dom_diff import diff_elements, parse_elements
 
 
 # Avoid circular import if BrowserAgent needs BrowserContextHelper
 if TYPE_CHECKING:
     from app.agent.base import BaseAgent  # Or wherever memory is defined
 
+# Name of BrowserUseTool; kept here so that the tool module is only imported
+# once an agent is created
+BROWSER_TOOL_NAME = "browser_use"
+# Pins of the step context that stays in the request until replaced
+ELEMENTS_PIN = "browser_elements"
+SCREENSHOT_PIN = "browser_screenshot"
+
 
 class BrowserContextHelper:
+    # Send the full element list instead of a diff when the diff would touch
+    # more than this fraction of the elements
+    full_refresh_ratio: float = 0.5
+
     def __init__(self, agent: "BaseAgent"):
         self.agent = agent
         self._current_base64_image: Optional[str] = None
+        # The last full element list sent, which diffs are relative to
+        self._base_url: Optional[str] = None
+        self._base_elements: Dict[int, str] = {}
 
     async def get_browser_state(self) -> Optional[dict]:
-        browser_tool = self.agent.available_tools.get_tool(BrowserUseTool().name)
+        tools = self.agent.available_tools
+        browser_tool = tools.get_tool(BROWSER_TOOL_NAME, create=False)
+        if browser_tool is None and BROWSER_TOOL_NAME in tools:
+            # Not used yet in this run, so there is no page to describe
+            return None
         if not browser_tool or not hasattr(browser_tool, "get_current_state"):
             logger.warning("BrowserUseTool not found or doesn't have get_current_state")
             return None
@@ -39,14 +58,49 @@ class BrowserContextHelper:
             logger.debug(f"Failed to get browser state: {str(e)}")
             return None
 
+    def format_elements(self, url: str, elements: str) -> str:
+        """Describe the interactive elements relative to the last full list.
+
+        The full list is sent after navigation or when most elements changed,
+        as step context pinned until the next full list replaces it, so it
+        stays in the request however few steps are kept. Otherwise only the
+        elements added, changed and removed since that list are sent.
+        """
+        current = parse_elements(elements)
+        if not current:
+            self._base_elements, self._base_url = {}, None
+            self.agent.unpin_step_context(ELEMENTS_PIN)
+            return ""
+        if self._base_url == url and self._base_elements:
+            diff = diff_elements(self._base_elements, current)
+            if diff.size == 0:
+                return " (unchanged since the full list above)"
+            if diff.size <= self.full_refresh_ratio * max(len(current), 1):
+                return (
+                    " (changes since the full list above; + added, ~ changed, "
+                    f"- removed):\n{diff.to_string()}"
+                )
+
+        self._base_elements, self._base_url = current, url
+        self.agent.add_step_context(
+            Message.user_message(f"Interactive elements of {url}:\n{elements}"),
+            pin=ELEMENTS_PIN,
+        )
+        return " (full list above)"
+
     async def format_next_step_prompt(self) -> str:
         """Gets browser state and formats the browser prompt."""
         browser_state = await self.get_browser_state()
         url_info, tabs_info, content_above_info, content_below_info = "", "", "", ""
         results_info = ""  # Or get from agent if needed elsewhere
+        elements_info = ""
 
         if browser_state and not browser_state.get("error"):
             url_info = f"\n   URL: {browser_state.get('url', 'N/A')}\n   Title: {browser_state.get('title', 'N/A')}"
+            elements_info = self.format_elements(
+                browser_state.get("url", ""),
+                browser_state.get("interactive_elements", ""),
+            )
             tabs = browser_state.get("tabs", [])
             if tabs:
                 tabs_info = f"\n   {len(tabs)} tab(s) available"
@@ -62,23 +116,36 @@ class BrowserContextHelper:
                     content="Current browser screenshot:",
                     base64_image=self._current_base64_image,
                 )
-                self.agent.memory.add_message(image_message)
+                # Kept while later screenshots are skipped as unchanged
+                self.agent.add_step_context(image_message, pin=SCREENSHOT_PIN)
                 self._current_base64_image = None  # Consume the image after adding
+            elif not browser_state.get("screenshot", "").startswith("unchanged"):
+                self.agent.unpin_step_context(SCREENSHOT_PIN)
 
         return NEXT_STEP_PROMPT.format(
             url_placeholder=url_info,
             tabs_placeholder=tabs_info,
+            elements_placeholder=elements_info,
             content_above_placeholder=content_above_info,
             content_below_placeholder=content_below_info,
             results_placeholder=results_info,
         )
 
     async def cleanup_browser(self):
-        browser_tool = self.agent.available_tools.get_tool(BrowserUseTool().name)
+        browser_tool = self.agent.available_tools.get_tool(
+            BROWSER_TOOL_NAME, create=False
+        )
         if browser_tool and hasattr(browser_tool, "cleanup"):
             await browser_tool.cleanup()
 
 
+def _default_tools() -> ToolCollection:
+    """Tools of a new browser agent."""
+    from app.tool import BrowserUseTool
+
+    return ToolCollection(BrowserUseTool, Terminate())
+
+
 class BrowserAgent(ToolCallAgent):
     """
     A browser agent that uses the browser_use library to control a browser.
@@ -97,9 +164,7 @@ class BrowserAgent(ToolCallAgent):
     max_steps: int = 20
 
     # Configure the available tools
-    available_tools: ToolCollection = Field(
-        default_factory=lambda: ToolCollection(BrowserUseTool(), Terminate())
-    )
+    available_tools: ToolCollection = Field(default_factory=_default_tools)
 
     # Use Auto for tool choice to allow both tool usage and free-form responses
     tool_choices: ToolChoice = ToolChoice.AUTO
@@ -0,0 +1,237 @@
+"""Checkpoints of agent runs, written after every step, for restoring a run.
+
+A checkpoint directory holds:
+
+- ``messages.jsonl``: every message the agent has had in memory, appended
+  once. Screenshots are replaced by references into ``blobs/``.
+- ``blobs/``: content-addressed images and long tool state strings, written
+  once no matter how many checkpoints refer to them.
+- ``state.json``: the small per-step part, atomically replaced. It holds the
+  step counter, which log lines make up the memory and its evicted messages
+  awaiting compaction, the memory's summary, and each tool's state.
+
+Tools take part by implementing ``checkpoint_state()`` (returning JSON data or
+None) and ``restore_state(state)``; either may be a coroutine.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app.config import config
+from app.logger import logger
+from app.schema import AgentState, Message
+
+
+if TYPE_CHECKING:
+    from app.agent.base import BaseAgent
+
+
+# Tool state strings at least this long are stored as blobs
+_BLOB_MIN_CHARS = 1024
+
+
+class AgentCheckpointer:
+    """Saves an agent's memory, step counter and tool state after each step.
+
+    Args:
+        directory: Directory of this run's checkpoint.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.blob_dir = self.directory / "blobs"
+        self.log_path = self.directory / "messages.jsonl"
+        self.state_path = self.directory / "state.json"
+        # id(message) -> (message, log line); holding the message keeps its
+        # id from being reused while it is still in memory
+        self._logged: Dict[int, Tuple[Message, int]] = {}
+        self._log_lines = 0
+
+    @classmethod
+    def from_config(cls, run_id: str) -> Optional["AgentCheckpointer"]:
+        """The checkpointer for a run, or None if checkpoints are disabled."""
+        settings = config.checkpoint_config
+        if not settings.enabled:
+            return None
+        root = (
+            Path(settings.checkpoint_dir)
+            if settings.checkpoint_dir
+            else config.workspace_root / ".checkpoints"
+        )
+        return cls(root / run_id)
+
+    def exists(self) -> bool:
+        return self.state_path.exists()
+
+    def _put_blob(self, data: str) -> str:
+        digest = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        path = self.blob_dir / digest
+        if not path.exists():
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, path)
+        return digest
+
+    def _get_blob(self, digest: str) -> str:
+        return (self.blob_dir / digest).read_text(encoding="utf-8")
+
+    def _externalize(self, value: Any) -> Any:
+        """Replace long strings in tool state with blob references."""
+        if isinstance(value, str) and len(value) >= _BLOB_MIN_CHARS:
+            return {"$blob": self._put_blob(value)}
+        if isinstance(value, dict):
+            return {key: self._externalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._externalize(item) for item in value]
+        return value
+
+    def _internalize(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if set(value) == {"$blob"}:
+                return self._get_blob(value["$blob"])
+            return {key: self._internalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._internalize(item) for item in value]
+        return value
+
+    def _log_new_messages(self, messages: List[Message]) -> List[int]:
+        """Append messages not logged yet; return the log line of each."""
+        lines = []
+        new_entries = []
+        for message in messages:
+            entry = self._logged.get(id(message))
+            if entry is None or entry[0] is not message:
+                data = message.model_dump(exclude_none=True)
+                if message.image is not None:
+                    data["image_blob"] = self._put_blob(message.base64_image)
+                new_entries.append(json.dumps(data, ensure_ascii=False))
+                entry = (message, self._log_lines + len(new_entries) - 1)
+            lines.append(entry[1])
+            self._logged[id(message)] = entry
+
+        if new_entries:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(new_entries) + "\n")
+            self._log_lines += len(new_entries)
+
+        # Forget messages that have left memory
+        current = {id(message) for message in messages}
+        for key in [key for key in self._logged if key not in current]:
+            del self._logged[key]
+        return lines
+
+    async def save(self, agent: "BaseAgent") -> None:
+        """Write a checkpoint of the agent's current state.
+
+        The files are written in a worker thread, off the event loop.
+        """
+        tools = {}
+        for name, tool in _tool_map(agent).items():
+            if not hasattr(tool, "checkpoint_state"):
+                continue
+            tool_state = tool.checkpoint_state()
+            if inspect.isawaitable(tool_state):
+                tool_state = await tool_state
+            if tool_state is not None:
+                tools[name] = tool_state
+
+        memory = agent.memory
+        state = {
+            "version": 1,
+            "agent": agent.name,
+            "current_step": agent.current_step,
+            "finished": agent.state == AgentState.FINISHED,
+            "summary": memory.summary,
+        }
+        await asyncio.to_thread(
+            self._write,
+            state,
+            memory.kept_messages,
+            memory.evicted_messages,
+            tools,
+        )
+
+    def _write(
+        self,
+        state: dict,
+        messages: List[Message],
+        evicted: List[Message],
+        tools: dict,
+    ) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lines = self._log_new_messages(messages + evicted)
+        state["messages"] = lines[: len(messages)]
+        state["evicted"] = lines[len(messages) :]
+        state["tools"] = {
+            name: self._externalize(tool_state) for name, tool_state in tools.items()
+        }
+        state["saved_at"] = time.time()
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _load_messages(self, log: List[str], lines: List[int]) -> List[Message]:
+        messages = []
+        for line in lines:
+            data = json.loads(log[line])
+            image_blob = data.pop("image_blob", None)
+            if image_blob:
+                data["base64_image"] = self._get_blob(image_blob)
+            message = Message(**data)
+            messages.append(message)
+            self._logged[id(message)] = (message, line)
+        return messages
+
+    async def restore(self, agent: "BaseAgent") -> Optional[dict]:
+        """Load the checkpoint into an agent and its tools.
+
+        Returns:
+            The checkpoint state, or None if there is no checkpoint.
+        """
+        if not self.exists():
+            return None
+        state = json.loads(self.state_path.read_text(encoding="utf-8"))
+
+        with open(self.log_path, encoding="utf-8") as f:
+            log = f.read().splitlines()
+        self._log_lines = len(log)
+
+        messages = self._load_messages(log, state["messages"])
+        agent.memory.restore(
+            messages,
+            state.get("summary"),
+            self._load_messages(log, state.get("evicted", [])),
+        )
+        agent.current_step = state["current_step"]
+
+        tools = getattr(agent, "available_tools", None)
+        for name, tool_state in state["tools"].items():
+            # Creates tools that have not been used yet in this process
+            tool = tools.get_tool(name) if tools is not None else None
+            if tool is None or not hasattr(tool, "restore_state"):
+                logger.warning(f"Cannot restore state of tool '{name}'")
+                continue
+            try:
+                restored = tool.restore_state(self._internalize(tool_state))
+                if inspect.isawaitable(restored):
+                    await restored
+            except Exception as e:
+                logger.warning(f"Failed to restore state of tool '{name}': {e}")
+
+        logger.info(
+            f"Restored {agent.name} at step {agent.current_step} "
+            f"with {len(messages)} messages from {self.directory}"
+        )
+        return state
+
+
+def _tool_map(agent: "BaseAgent") -> dict:
+    tools = getattr(agent, "available_tools", None)
+    return tools.tool_map if tools is not None else {}
@@ -0,0 +1,107 @@
+"""Compactors that fold messages evicted from agent memory into a summary."""
+
+from typing import List, Optional
+
+from app.config import config
+from app.llm import LLM
+from app.logger import logger
+from app.schema import Compactor, Message
+
+
+_COMPACTION_PROMPT = """Below is a summary of an agent's earlier work followed by messages that no longer fit in its memory.
+Write an updated summary in at most {max_chars} characters. Keep the task, decisions, facts found, files and URLs used, and open problems; drop everything else.
+
+Summary so far:
+{summary}
+
+Messages:
+{messages}"""
+
+
+def _excerpt(message: Message, max_chars: int) -> str:
+    """One line describing a message."""
+    if message.tool_calls:
+        calls = ", ".join(
+            f"{call.function.name}({call.function.arguments[:max_chars]})"
+            for call in message.tool_calls
+        )
+        text = f"called {calls}"
+        if message.content:
+            text = f"{message.content} -> {text}"
+    else:
+        text = message.content or ""
+    text = " ".join(text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    return f"[{message.role}{f' {message.name}' if message.name else ''}] {text}"
+
+
+class ExtractiveCompactor:
+    """Summarizes evicted messages by excerpting each one.
+
+    When the summary grows too long the oldest excerpts are dropped first,
+    but user messages (the task and its follow-ups) are kept longest. Costs
+    no model calls.
+    """
+
+    def __init__(self, max_chars: int = 4000, excerpt_chars: int = 200):
+        self.max_chars = max_chars
+        self.excerpt_chars = excerpt_chars
+
+    async def __call__(self, summary: Optional[str], evicted: List[Message]) -> str:
+        excerpts = (summary.splitlines() if summary else []) + [
+            _excerpt(
+                message,
+                self.excerpt_chars // 2
+                if message.role == "tool"
+                else self.excerpt_chars,
+            )
+            for message in evicted
+        ]
+        # Repeated prompts are excerpted once
+        lines = list(dict.fromkeys(excerpts))
+        size = sum(len(line) + 1 for line in lines)
+        while lines and size > self.max_chars:
+            index = next(
+                (i for i, line in enumerate(lines) if not line.startswith("[user]")),
+                0,
+            )
+            size -= len(lines.pop(index)) + 1
+        return "\n".join(lines)
+
+
+class LLMCompactor:
+    """Asks the model for an updated summary of the evicted messages.
+
+    Falls back to excerpts if the call fails.
+    """
+
+    def __init__(self, llm: LLM, max_chars: int = 4000):
+        self.llm = llm
+        self.max_chars = max_chars
+        self.fallback = ExtractiveCompactor(max_chars)
+
+    async def __call__(self, summary: Optional[str], evicted: List[Message]) -> str:
+        prompt = _COMPACTION_PROMPT.format(
+            max_chars=self.max_chars,
+            summary=summary or "(none)",
+            messages="\n".join(_excerpt(message, 2000) for message in evicted),
+        )
+        try:
+            response = await self.llm.ask(
+                [Message.user_message(prompt)], stream=False, temperature=0
+            )
+            return response[: self.max_chars]
+        except Exception as e:
+            logger.warning(f"Memory compaction with the LLM failed: {e}")
+            return await self.fallback(summary, evicted)
+
+
+def build_compactor(llm: LLM) -> Optional[Compactor]:
+    """The compactor selected by ``[memory] compaction``."""
+    settings = config.memory_config
+    if settings.compaction == "llm":
+        return LLMCompactor(llm, settings.summary_max_chars)
+    if settings.compaction == "extractive":
+        return ExtractiveCompactor(settings.summary_max_chars)
+    return None
@@ -1,20 +1,33 @@
-from typing import Dict, List, Optional
+import asyncio
+from typing import Dict, List, Optional, Set
 
-from pydantic import Field, model_validator
+from pydantic import Field, PrivateAttr, model_validator
 
-from app.agent.browser import BrowserContextHelper
+from app.agent.browser import BROWSER_TOOL_NAME, BrowserContextHelper
 from app.agent.toolcall import ToolCallAgent
-from app.config import config
+from app.config import MCPServerConfig, config
 from app.logger import logger
 from app.prompt.manus import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.tool import Terminate, ToolCollection
 from app.tool.ask_human import AskHuman
-from app.tool.browser_use_tool import BrowserUseTool
 from app.tool.mcp import MCPClients, MCPClientTool
 from app.tool.python_execute import PythonExecute
 from app.tool.str_replace_editor import StrReplaceEditor
 
 
+def _default_tools() -> ToolCollection:
+    """General-purpose tools of a new Manus agent."""
+    from app.tool.browser_use_tool import BrowserUseTool
+
+    return ToolCollection(
+        PythonExecute(),
+        BrowserUseTool,  # created when the browser is first used
+        StrReplaceEditor(),
+        AskHuman(),
+        Terminate(),
+    )
+
+
 class Manus(ToolCallAgent):
     """A versatile general-purpose agent with support for both local and MCP tools."""
 
@@ -31,15 +44,7 @@ class Manus(ToolCallAgent):
     mcp_clients: MCPClients = Field(default_factory=MCPClients)
 
     # Add general-purpose tools to the tool collection
-    available_tools: ToolCollection = Field(
-        default_factory=lambda: ToolCollection(
-            PythonExecute(),
-            BrowserUseTool(),
-            StrReplaceEditor(),
-            AskHuman(),
-            Terminate(),
-        )
-    )
+    available_tools: ToolCollection = Field(default_factory=_default_tools)
 
     special_tool_names: list[str] = Field(default_factory=lambda: [Terminate().name])
     browser_context_helper: Optional[BrowserContextHelper] = None
@@ -49,6 +54,8 @@ class Manus(ToolCallAgent):
         default_factory=dict
     )  # server_id -> url/command
     _initialized: bool = False
+    # Connections to lazy MCP servers still in progress
+    _background_connections: Set[asyncio.Task] = PrivateAttr(default_factory=set)
 
     @model_validator(mode="after")
     def initialize_helper(self) -> "Manus":
@@ -65,28 +72,51 @@ class Manus(ToolCallAgent):
         return instance
 
     async def initialize_mcp_servers(self) -> None:
-        """Initialize connections to configured MCP servers."""
+        """Initialize connections to configured MCP servers.
+
+        Servers connect concurrently, each within its own timeout, so startup
+        takes as long as the slowest server rather than all of them together.
+        Servers marked ``lazy`` connect in the background and do not delay
+        startup; their tools are added once they are connected.
+        """
+        connections = []
         for server_id, server_config in config.mcp_config.servers.items():
-            try:
-                if server_config.type == "sse":
-                    if server_config.url:
-                        await self.connect_mcp_server(server_config.url, server_id)
-                        logger.info(
-                            f"Connected to MCP server {server_id} at {server_config.url}"
-                        )
-                elif server_config.type == "stdio":
-                    if server_config.command:
-                        await self.connect_mcp_server(
-                            server_config.command,
-                            server_id,
-                            use_stdio=True,
-                            stdio_args=server_config.args,
-                        )
-                        logger.info(
-                            f"Connected to MCP server {server_id} using command {server_config.command}"
-                        )
-            except Exception as e:
-                logger.error(f"Failed to connect to MCP server {server_id}: {e}")
+            connection = self._connect_configured_server(server_id, server_config)
+            if server_config.lazy:
+                task = asyncio.create_task(connection)
+                self._background_connections.add(task)
+                task.add_done_callback(self._background_connections.discard)
+            else:
+                connections.append(connection)
+        await asyncio.gather(*connections)
+
+    async def _connect_configured_server(
+        self, server_id: str, server_config: MCPServerConfig
+    ) -> None:
+        timeout = server_config.timeout or config.mcp_config.connect_timeout
+        try:
+            if server_config.type == "sse":
+                if server_config.url:
+                    await self.connect_mcp_server(
+                        server_config.url, server_id, timeout=timeout
+                    )
+                    logger.info(
+                        f"Connected to MCP server {server_id} at {server_config.url}"
+                    )
+            elif server_config.type == "stdio":
+                if server_config.command:
+                    await self.connect_mcp_server(
+                        server_config.command,
+                        server_id,
+                        use_stdio=True,
+                        stdio_args=server_config.args,
+                        timeout=timeout,
+                    )
+                    logger.info(
+                        f"Connected to MCP server {server_id} using command {server_config.command}"
+                    )
+        except Exception as e:
+            logger.error(f"Failed to connect to MCP server {server_id}: {e}")
 
     async def connect_mcp_server(
         self,
@@ -94,15 +124,16 @@ class Manus(ToolCallAgent):
         server_id: str = "",
         use_stdio: bool = False,
         stdio_args: List[str] = None,
+        timeout: Optional[float] = None,
     ) -> None:
         """Connect to an MCP server and add its tools."""
         if use_stdio:
             await self.mcp_clients.connect_stdio(
-                server_url, stdio_args or [], server_id
+                server_url, stdio_args or [], server_id, timeout=timeout
             )
             self.connected_servers[server_id or server_url] = server_url
         else:
-            await self.mcp_clients.connect_sse(server_url, server_id)
+            await self.mcp_clients.connect_sse(server_url, server_id, timeout=timeout)
             self.connected_servers[server_id or server_url] = server_url
 
         # Update available tools with only the new tools from this server
@@ -118,8 +149,20 @@ class Manus(ToolCallAgent):
             self.connected_servers.pop(server_id, None)
         else:
             self.connected_servers.clear()
+        self._rebuild_available_tools()
+
+    def _sync_mcp_tools(self) -> None:
+        """Apply changes the MCP servers have announced to their tools."""
+        added, removed, changed = self.mcp_clients.sync_tools()
+        if added or removed or changed:
+            logger.info(
+                f"MCP tools changed: added {added}, removed {removed}, "
+                f"changed {changed}"
+            )
+            self._rebuild_available_tools()
 
-        # Rebuild available tools without the disconnected server's tools
+    def _rebuild_available_tools(self) -> None:
+        """Rebuild available tools from the base tools and current MCP tools."""
         base_tools = [
             tool
             for tool in self.available_tools.tools
@@ -132,6 +175,9 @@ class Manus(ToolCallAgent):
         """Clean up Manus agent resources."""
         if self.browser_context_helper:
             await self.browser_context_helper.cleanup_browser()
+        for task in list(self._background_connections):
+            task.cancel()
+        await asyncio.gather(*self._background_connections, return_exceptions=True)
         # Disconnect from all MCP servers only if we were initialized
         if self._initialized:
             await self.disconnect_mcp_server()
@@ -142,11 +188,12 @@ class Manus(ToolCallAgent):
         if not self._initialized:
             await self.initialize_mcp_servers()
             self._initialized = True
+        self._sync_mcp_tools()
 
         original_prompt = self.next_step_prompt
         recent_messages = self.memory.messages[-3:] if self.memory.messages else []
         browser_in_use = any(
-            tc.function.name == BrowserUseTool().name
+            tc.function.name == BROWSER_TOOL_NAME
             for msg in recent_messages
             if msg.tool_calls
             for tc in msg.tool_calls
@@ -30,9 +30,8 @@ class MCPAgent(ToolCallAgent):
     max_steps: int = 20
     connection_type: str = "stdio"  # "stdio" or "sse"
 
-    # Track tool schemas to detect changes
+    # Current tool schemas; the servers' tool catalogs detect changes
     tool_schemas: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
-    _refresh_tools_interval: int = 5  # Refresh tools every N steps
 
     # Special tool names that should trigger termination
     special_tool_names: List[str] = Field(default_factory=lambda: ["terminate"])
@@ -71,7 +70,7 @@ class MCPAgent(ToolCallAgent):
         self.available_tools = self.mcp_clients
 
         # Store initial tool schemas
-        await self._refresh_tools()
+        self._refresh_tools()
 
         # Add system message about available tools
         tool_names = list(self.mcp_clients.tool_map.keys())
@@ -84,8 +83,11 @@ class MCPAgent(ToolCallAgent):
             )
         )
 
-    async def _refresh_tools(self) -> Tuple[List[str], List[str]]:
-        """Refresh the list of available tools from the MCP server.
+    def _refresh_tools(self) -> Tuple[List[str], List[str]]:
+        """Apply changes to the MCP server's tools.
+
+        The session updates its tool catalog in the background when the
+        server announces a change, so this never waits on the server.
 
         Returns:
             A tuple of (added_tools, removed_tools)
@@ -93,25 +95,12 @@ class MCPAgent(ToolCallAgent):
         if not self.mcp_clients.sessions:
             return [], []
 
-        # Get current tool schemas directly from the server
-        response = await self.mcp_clients.list_tools()
-        current_tools = {tool.name: tool.inputSchema for tool in response.tools}
-
-        # Determine added, removed, and changed tools
-        current_names = set(current_tools.keys())
-        previous_names = set(self.tool_schemas.keys())
-
-        added_tools = list(current_names - previous_names)
-        removed_tools = list(previous_names - current_names)
-
-        # Check for schema changes in existing tools
-        changed_tools = []
-        for name in current_names.intersection(previous_names):
-            if current_tools[name] != self.tool_schemas.get(name):
-                changed_tools.append(name)
-
-        # Update stored schemas
-        self.tool_schemas = current_tools
+        added_tools, removed_tools, changed_tools = self.mcp_clients.sync_tools()
+        if added_tools or removed_tools or changed_tools or not self.tool_schemas:
+            self.tool_schemas = {
+                name: tool.parameters
+                for name, tool in self.mcp_clients.tool_map.items()
+            }
 
         # Log and notify about changes
         if added_tools:
@@ -139,14 +128,13 @@ class MCPAgent(ToolCallAgent):
             self.state = AgentState.FINISHED
             return False
 
-        # Refresh tools periodically
-        if self.current_step % self._refresh_tools_interval == 0:
-            await self._refresh_tools()
-            # All tools removed indicates shutdown
-            if not self.mcp_clients.tool_map:
-                logger.info("MCP service has shut down, ending interaction")
-                self.state = AgentState.FINISHED
-                return False
+        # Pick up tool changes the server has announced
+        self._refresh_tools()
+        # All tools removed indicates shutdown
+        if not self.mcp_clients.tool_map:
+            logger.info("MCP service has shut down, ending interaction")
+            self.state = AgentState.FINISHED
+            return False
 
         # Use the parent class's think method
         return await super().think()
@@ -1,13 +1,17 @@
 import asyncio
 import json
-from typing import Any, List, Optional, Union
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
 
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
 from app.agent.react import ReActAgent
+from app.budget import BudgetLevel, current_budget
+from app.config import config
 from app.exceptions import TokenLimitExceeded
+from app.llm import LLM
 from app.logger import logger
-from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
+from app.prompt.toolcall import BUDGET_WRAP_UP_PROMPT, NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
 
@@ -36,45 +40,149 @@ class ToolCallAgent(ReActAgent):
     max_steps: int = 30
     max_observe: Optional[Union[int, bool]] = None
 
+    ephemeral_step_context: bool = Field(
+        default_factory=lambda: config.memory_config.ephemeral_step_context,
+        description="Send step prompts and screenshots without storing them in memory",
+    )
+    keep_step_context: int = Field(
+        default_factory=lambda: config.memory_config.keep_step_context,
+        description="Number of recent steps whose step context is sent",
+    )
+    # Step context for the next request, and that of recent steps together
+    # with the memory message it follows
+    _pending_context: List[Message] = PrivateAttr(default_factory=list)
+    _step_contexts: Deque[Tuple[Optional[Message], List[Message]]] = PrivateAttr(
+        default_factory=deque
+    )
+    # Pinned step context by pin, with the memory message it follows (None
+    # until it is first sent)
+    _pinned_contexts: Dict[str, Tuple[Optional[Message], Message]] = PrivateAttr(
+        default_factory=dict
+    )
+
+    def add_step_context(self, message: Message, pin: Optional[str] = None) -> None:
+        """Attach per-step context, such as browser state, to the next request.
+
+        With ``ephemeral_step_context`` the message is sent with the requests
+        of the next ``keep_step_context`` steps but never stored in memory.
+        A message with a ``pin`` is instead sent until another message with
+        the same pin replaces it, for context later steps build on (e.g. the
+        full element list that element diffs refer to).
+        """
+        if not self.ephemeral_step_context:
+            self.memory.add_message(message)
+        elif pin:
+            self._pinned_contexts[pin] = (None, message)
+        else:
+            self._pending_context.append(message)
+
+    def unpin_step_context(self, pin: str) -> None:
+        """Stop sending the step context pinned with ``pin``."""
+        self._pinned_contexts.pop(pin, None)
+
+    def _request_messages(self) -> List[Message]:
+        """Memory with the kept step contexts inserted where they were given."""
+        messages = self.messages
+        anchor = messages[-1] if messages else None
+        for pin, (pin_anchor, message) in self._pinned_contexts.items():
+            if pin_anchor is None:
+                self._pinned_contexts[pin] = (anchor, message)
+        if self._pending_context:
+            self._step_contexts.append((anchor, self._pending_context))
+            self._pending_context = []
+        while len(self._step_contexts) > max(self.keep_step_context, 1):
+            self._step_contexts.popleft()
+        if not self._step_contexts and not self._pinned_contexts:
+            return messages
+
+        # A step context whose anchor has left memory is dropped with it; a
+        # pinned one moves to the start
+        in_memory = {id(message) for message in messages}
+        contexts = {}
+        for pin_anchor, message in self._pinned_contexts.values():
+            key = id(pin_anchor) if id(pin_anchor) in in_memory else None
+            contexts.setdefault(key, []).append(message)
+        for anchor, context in self._step_contexts:
+            contexts.setdefault(id(anchor) if anchor else None, []).extend(context)
+        request = list(contexts.get(None, []))
+        for message in messages:
+            request.append(message)
+            request.extend(contexts.get(id(message), []))
+        return request
+
+    def _budget_level(self) -> BudgetLevel:
+        budget = current_budget()
+        return budget.level if budget is not None else BudgetLevel.NORMAL
+
+    def _budget_llm(self, level: BudgetLevel) -> LLM:
+        """The configured cheaper model once the budget runs low."""
+        fallback = config.budget_config.fallback_llm
+        if level == BudgetLevel.NORMAL or not fallback or fallback not in config.llm:
+            return self.llm
+        return LLM(config_name=fallback)
+
     async def think(self) -> bool:
         """Process current state and decide next actions using tools"""
         if self.next_step_prompt:
-            user_msg = Message.user_message(self.next_step_prompt)
-            self.messages += [user_msg]
-
-        try:
-            # Get response with tool options
-            response = await self.llm.ask_tool(
-                messages=self.messages,
-                system_msgs=(
-                    [Message.system_message(self.system_prompt)]
-                    if self.system_prompt
-                    else None
-                ),
-                tools=self.available_tools.to_params(),
-                tool_choice=self.tool_choices,
-            )
-        except ValueError:
-            raise
-        except Exception as e:
-            # Check if this is a RetryError containing TokenLimitExceeded
-            if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
-                token_limit_error = e.__cause__
-                logger.error(
-                    f"🚨 Token limit error (from RetryError): {token_limit_error}"
+            self.add_step_context(Message.user_message(self.next_step_prompt))
+
+        # Degrade as the budget runs out: a cheaper model and fewer tool calls
+        # when low, then a request to summarize and stop when critical
+        level = self._budget_level()
+        if level in (BudgetLevel.CRITICAL, BudgetLevel.EXHAUSTED):
+            self.add_step_context(Message.user_message(BUDGET_WRAP_UP_PROMPT))
+
+        for attempt in range(2):
+            try:
+                # Get response with tool options
+                response = await self._budget_llm(level).ask_tool(
+                    messages=self._request_messages(),
+                    system_msgs=(
+                        [Message.system_message(self.system_prompt)]
+                        if self.system_prompt
+                        else None
+                    ),
+                    tools=self.available_tools.to_params(),
+                    tool_choice=self.tool_choices,
                 )
-                self.memory.add_message(
-                    Message.assistant_message(
-                        f"Maximum token limit reached, cannot continue execution: {str(token_limit_error)}"
+                break
+            except ValueError:
+                raise
+            except Exception as e:
+                # Check if this is a RetryError containing TokenLimitExceeded
+                if hasattr(e, "__cause__") and isinstance(
+                    e.__cause__, TokenLimitExceeded
+                ):
+                    token_limit_error = e.__cause__
+                    # Compact the memory and try once more before giving up
+                    if attempt == 0 and await self.memory.shrink():
+                        logger.warning(
+                            f"Token limit reached, compacted memory to "
+                            f"~{self.memory.tokens} tokens and retrying"
+                        )
+                        continue
+                    logger.error(
+                        f"🚨 Token limit error (from RetryError): {token_limit_error}"
                     )
-                )
-                self.state = AgentState.FINISHED
-                return False
-            raise
+                    self.memory.add_message(
+                        Message.assistant_message(
+                            f"Maximum token limit reached, cannot continue execution: {str(token_limit_error)}"
+                        )
+                    )
+                    self.state = AgentState.FINISHED
+                    return False
+                raise
 
         self.tool_calls = tool_calls = (
             response.tool_calls if response and response.tool_calls else []
         )
+        tool_call_limit = config.budget_config.low_budget_tool_calls
+        if level != BudgetLevel.NORMAL and len(tool_calls) > tool_call_limit:
+            logger.warning(
+                f"Budget {level.value}: running {tool_call_limit} of "
+                f"{len(tool_calls)} tool calls"
+            )
+            self.tool_calls = tool_calls = tool_calls[:tool_call_limit]
         content = response.content if response and response.content else ""
 
         # Log response info
@@ -169,7 +277,7 @@ class ToolCallAgent(ReActAgent):
             return "Error: Invalid command format"
 
         name = command.function.name
-        if name not in self.available_tools.tool_map:
+        if name not in self.available_tools:
             return f"Error: Unknown tool '{name}'"
 
         try:
@@ -229,6 +337,7 @@ class ToolCallAgent(ReActAgent):
     async def cleanup(self):
         """Clean up resources used by the agent's tools."""
         logger.info(f"🧹 Cleaning up resources for agent '{self.name}'...")
+        # Only tools that were created; unused ones hold no resources
         for tool_name, tool_instance in self.available_tools.tool_map.items():
             if hasattr(tool_instance, "cleanup") and asyncio.iscoroutinefunction(
                 tool_instance.cleanup
@@ -247,4 +356,7 @@ class ToolCallAgent(ReActAgent):
         try:
             return await super().run(request)
         finally:
+            self._pending_context = []
+            self._step_contexts.clear()
+            self._pinned_contexts.clear()
             await self.cleanup()
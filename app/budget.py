@@ -0,0 +1,170 @@
+"""Token and wall-clock budgets for flows, plan steps and agent runs.
+
+A budget is activated for the current asyncio task with ``use_budget``. The
+LLM charges every token it accounts for to the active budget and to that
+budget's parents. Tasks copy the context they were created in, so plan steps
+running concurrently each see their own budget.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.config import config
+
+
+class BudgetLevel(str, Enum):
+    """How much of a budget is left, from plenty to none."""
+
+    NORMAL = "normal"
+    LOW = "low"
+    CRITICAL = "critical"
+    EXHAUSTED = "exhausted"
+
+
+class Budget(BaseModel):
+    """A token and time allowance, optionally nested in a parent budget."""
+
+    name: str = Field(description="Name shown in reports")
+    max_tokens: Optional[int] = Field(None, description="Token allowance")
+    max_seconds: Optional[float] = Field(None, description="Time allowance")
+    low_threshold: float = Field(0.3, description="Remaining fraction for LOW")
+    critical_threshold: float = Field(
+        0.1, description="Remaining fraction for CRITICAL"
+    )
+    parent: Optional["Budget"] = Field(None, description="Enclosing budget")
+    input_tokens: int = 0
+    completion_tokens: int = 0
+    started_at: float = Field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, name: str) -> "Budget":
+        """A top-level budget with the ``[budget]`` allowances."""
+        settings = config.budget_config
+        return cls(
+            name=name,
+            max_tokens=settings.max_tokens,
+            max_seconds=settings.max_seconds,
+            low_threshold=settings.low_threshold,
+            critical_threshold=settings.critical_threshold,
+        )
+
+    @property
+    def spent_tokens(self) -> int:
+        return self.input_tokens + self.completion_tokens
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def remaining_tokens(self) -> Optional[int]:
+        if self.max_tokens is None:
+            return None
+        return max(self.max_tokens - self.spent_tokens, 0)
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.max_seconds is None:
+            return None
+        return max(self.max_seconds - self.elapsed, 0.0)
+
+    def remaining_fraction(self) -> float:
+        """Smallest remaining share of any allowance here or in a parent."""
+        fractions = [1.0]
+        if self.max_tokens:
+            fractions.append(self.remaining_tokens() / self.max_tokens)
+        if self.max_seconds:
+            fractions.append(self.remaining_seconds() / self.max_seconds)
+        if self.parent is not None:
+            fractions.append(self.parent.remaining_fraction())
+        return min(fractions)
+
+    @property
+    def level(self) -> BudgetLevel:
+        remaining = self.remaining_fraction()
+        if remaining <= 0:
+            return BudgetLevel.EXHAUSTED
+        if remaining < self.critical_threshold:
+            return BudgetLevel.CRITICAL
+        if remaining < self.low_threshold:
+            return BudgetLevel.LOW
+        return BudgetLevel.NORMAL
+
+    def charge(self, input_tokens: int, completion_tokens: int = 0) -> None:
+        """Record spend here and in every enclosing budget."""
+        budget = self
+        while budget is not None:
+            budget.input_tokens += input_tokens
+            budget.completion_tokens += completion_tokens
+            budget = budget.parent
+
+    def child(self, name: str, token_share: int = 1, time_share: int = 1) -> "Budget":
+        """A nested budget getting a share of the tokens and time left here."""
+        remaining_tokens = self.remaining_tokens()
+        remaining_seconds = self.remaining_seconds()
+        return Budget(
+            name=name,
+            max_tokens=(
+                math.ceil(remaining_tokens / token_share)
+                if remaining_tokens is not None
+                else None
+            ),
+            max_seconds=(
+                remaining_seconds / time_share
+                if remaining_seconds is not None
+                else None
+            ),
+            low_threshold=self.low_threshold,
+            critical_threshold=self.critical_threshold,
+            parent=self,
+        )
+
+    def finish(self) -> None:
+        """Stop the clock, so reports show the time actually used."""
+        if self.finished_at is None:
+            self.finished_at = time.monotonic()
+
+    def report_line(self) -> str:
+        tokens = f"{self.spent_tokens}" + (
+            f"/{self.max_tokens}" if self.max_tokens is not None else ""
+        )
+        seconds = f"{self.elapsed:.1f}" + (
+            f"/{self.max_seconds:.1f}" if self.max_seconds is not None else ""
+        )
+        return f"{self.name}: {tokens} tokens, {seconds}s ({self.level.value})"
+
+
+_current_budget: ContextVar[Optional[Budget]] = ContextVar("budget", default=None)
+
+
+def current_budget() -> Optional[Budget]:
+    """The budget active in this task, if any."""
+    return _current_budget.get()
+
+
+@contextmanager
+def use_budget(budget: Budget) -> Iterator[Budget]:
+    """Activate a budget for the enclosed code and the tasks it creates."""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        budget.finish()
+        _current_budget.reset(token)
+
+
+def charge_tokens(input_tokens: int, completion_tokens: int = 0) -> None:
+    """Charge LLM usage to the active budget, if any."""
+    budget = current_budget()
+    if budget is not None:
+        budget.charge(input_tokens, completion_tokens)
+
+
+def budget_report(budgets: List[Budget]) -> str:
+    """One line per budget with its spend against its allowance."""
+    return "\n".join(budget.report_line() for budget in budgets)
@@ -2,7 +2,7 @@ import json
 import threading
 import tomllib
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -28,6 +28,26 @@ class LLMSettings(BaseModel):
     temperature: float = Field(1.0, description="Sampling temperature")
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
+    rpm: Optional[int] = Field(
+        None,
+        description="Requests per minute allowed for this key and model "
+        "(None to follow the limits reported by the API)",
+    )
+    tpm: Optional[int] = Field(
+        None,
+        description="Tokens per minute allowed for this key and model "
+        "(None to follow the limits reported by the API)",
+    )
+    endpoints: Optional[List[str]] = Field(
+        None,
+        description="Names of equivalent [llm.<name>] endpoints to route "
+        "requests across, making this a router",
+    )
+    hedge: bool = Field(
+        False,
+        description="Router only: also send a request to the next endpoint "
+        "when the first is slower than its p95 latency",
+    )
 
 
 class ProxySettings(BaseModel):
@@ -58,12 +78,103 @@ class SearchSettings(BaseModel):
         default="us",
         description="Country code for search results (e.g., us, cn, uk)",
     )
+    local_index_dir: Optional[str] = Field(
+        default=None,
+        description="Directory for the local search index (defaults to workspace/.search_index)",
+    )
+    local_corpus_paths: List[str] = Field(
+        default_factory=list,
+        description="Directories of documents indexed by the Local search engine",
+    )
 
 
 class RunflowSettings(BaseModel):
     use_data_analysis_agent: bool = Field(
         default=False, description="Enable data analysis agent in run flow"
     )
+    max_parallel_steps: int = Field(
+        default=4,
+        description="Maximum plan steps executed concurrently on free executor agents",
+    )
+    step_context: Literal["shared", "scoped"] = Field(
+        default="shared",
+        description="Run each plan step in the executor's growing memory (shared) "
+        "or in a fresh memory seeded with a summary of earlier steps (scoped)",
+    )
+    handoff_max_chars: int = Field(
+        default=2000,
+        description="Maximum characters of earlier step results handed to a scoped step",
+    )
+    persist_plans: bool = Field(
+        default=True,
+        description="Journal plans and step results so interrupted runs can resume",
+    )
+    plan_store_dir: Optional[str] = Field(
+        default=None,
+        description="Directory for plan journals (defaults to workspace/.plans)",
+    )
+
+
+class ScreenshotSettings(BaseModel):
+    mode: Literal["viewport", "full_page", "off"] = Field(
+        "viewport", description="Capture the viewport, the whole page, or nothing"
+    )
+    max_width: int = Field(1280, description="Maximum screenshot width in pixels")
+    max_height: int = Field(1600, description="Maximum screenshot height in pixels")
+    max_bytes: int = Field(
+        200 * 1024, description="Target size of the encoded JPEG in bytes"
+    )
+    quality: int = Field(80, description="Highest JPEG quality to try")
+    min_quality: int = Field(30, description="Lowest JPEG quality to fall back to")
+    skip_unchanged: bool = Field(
+        True, description="Skip the screenshot when the page has not changed"
+    )
+
+
+class ResourcePolicySettings(BaseModel):
+    enabled: bool = Field(
+        False, description="Block unneeded resources during browser navigation"
+    )
+    block_resource_types: List[str] = Field(
+        default_factory=lambda: ["image", "media", "font"],
+        description="Playwright resource types to block (e.g. image, font, media)",
+    )
+    block_domains: List[str] = Field(
+        default_factory=lambda: [
+            "doubleclick.net",
+            "googlesyndication.com",
+            "google-analytics.com",
+            "googletagmanager.com",
+            "facebook.net",
+            "hotjar.com",
+            "scorecardresearch.com",
+        ],
+        description="Domains (and their subdomains) whose requests are blocked",
+    )
+    max_response_bytes: Optional[int] = Field(
+        None,
+        description="Drop image, media and font responses larger than this many bytes",
+    )
+
+
+class BrowserDaemonSettings(BaseModel):
+    enabled: bool = Field(
+        False, description="Attach to a shared, supervised browser daemon over CDP"
+    )
+    host: str = Field("127.0.0.1", description="Host the daemon listens on")
+    port: int = Field(9222, description="DevTools (CDP) port of the daemon")
+    auto_start: bool = Field(
+        True, description="Start the daemon in the background if it is not running"
+    )
+    startup_timeout: float = Field(
+        20.0, description="Seconds to wait for the daemon to become healthy"
+    )
+    health_check_interval: float = Field(
+        5.0, description="Seconds between daemon health checks"
+    )
+    max_failed_checks: int = Field(
+        3, description="Consecutive failed health checks before a restart"
+    )
 
 
 class BrowserSettings(BaseModel):
@@ -86,8 +197,118 @@ class BrowserSettings(BaseModel):
     proxy: Optional[ProxySettings] = Field(
         None, description="Proxy settings for the browser"
     )
-    max_content_length: int = Field(
-        2000, description="Maximum length for content retrieval operations"
+    extract_chunk_size: int = Field(
+        4000, description="Maximum characters of page content per extraction call"
+    )
+    extract_max_concurrency: int = Field(
+        4, description="Maximum concurrent LLM calls for one content extraction"
+    )
+    extract_max_chunks: int = Field(
+        4, description="Maximum number of chunks extracted from one page"
+    )
+    max_contexts: int = Field(
+        8, description="Maximum number of isolated browser contexts in the pool"
+    )
+    context_idle_timeout: int = Field(
+        600, description="Seconds before an unused browser context is closed"
+    )
+    screenshot: ScreenshotSettings = Field(
+        default_factory=ScreenshotSettings,
+        description="Screenshot capture settings for browser state",
+    )
+    daemon: BrowserDaemonSettings = Field(
+        default_factory=BrowserDaemonSettings,
+        description="Shared browser daemon settings",
+    )
+    resource_policy: ResourcePolicySettings = Field(
+        default_factory=ResourcePolicySettings,
+        description="Request interception and resource blocking settings",
+    )
+
+
+class PageCacheSettings(BaseModel):
+    """Configuration for the shared web page store"""
+
+    enabled: bool = Field(True, description="Whether fetched pages are cached")
+    cache_dir: Optional[str] = Field(
+        None,
+        description="Directory for cached pages (defaults to workspace/.page_cache)",
+    )
+    max_memory_bytes: int = Field(
+        32 * 1024 * 1024, description="Memory budget for cached page content"
+    )
+    max_disk_bytes: int = Field(
+        256 * 1024 * 1024, description="Disk budget for cached page content"
+    )
+    fresh_seconds: int = Field(
+        600,
+        description="Seconds a cached page is served without revalidation",
+    )
+
+
+class MemorySettings(BaseModel):
+    """Configuration for agent memory"""
+
+    max_tokens: Optional[int] = Field(
+        64000,
+        description="Estimated tokens kept in an agent's memory (None for unlimited)",
+    )
+    compaction: Literal["none", "extractive", "llm"] = Field(
+        "extractive",
+        description="How evicted messages are summarized: not at all, by "
+        "excerpting them, or by asking the agent's LLM",
+    )
+    summary_max_chars: int = Field(
+        4000, description="Maximum length of the summary of evicted messages"
+    )
+    ephemeral_step_context: bool = Field(
+        True,
+        description="Send per-step prompts and screenshots with the request "
+        "instead of storing them in memory",
+    )
+    keep_step_context: int = Field(
+        1, description="Number of recent steps whose step context is sent"
+    )
+    max_images: Optional[int] = Field(
+        3,
+        description="Most recent images sent with a request; older ones are "
+        "replaced by a placeholder (None for all)",
+    )
+
+
+class CheckpointSettings(BaseModel):
+    """Configuration for agent checkpoints"""
+
+    enabled: bool = Field(False, description="Checkpoint agent runs after each step")
+    checkpoint_dir: Optional[str] = Field(
+        None,
+        description="Directory for checkpoints (defaults to workspace/.checkpoints)",
+    )
+
+
+class BudgetSettings(BaseModel):
+    """Token and wall-clock allowances for flows, plan steps and agent runs"""
+
+    max_tokens: Optional[int] = Field(
+        None, description="Tokens (input + completion) allowed per run"
+    )
+    max_seconds: Optional[float] = Field(
+        None, description="Wall-clock seconds allowed per run"
+    )
+    low_threshold: float = Field(
+        0.3,
+        description="Remaining fraction below which agents switch to cheaper behaviour",
+    )
+    critical_threshold: float = Field(
+        0.1,
+        description="Remaining fraction below which agents are asked to wrap up",
+    )
+    fallback_llm: Optional[str] = Field(
+        None,
+        description="Name of an [llm.<name>] section used once the budget runs low",
+    )
+    low_budget_tool_calls: int = Field(
+        1, description="Tool calls executed per step once the budget runs low"
     )
 
 
@@ -114,6 +335,16 @@ class MCPServerConfig(BaseModel):
     args: List[str] = Field(
         default_factory=list, description="Arguments for stdio command"
     )
+    timeout: Optional[float] = Field(
+        None,
+        description="Seconds to wait for the server to connect; defaults to "
+        "[mcp] connect_timeout",
+    )
+    lazy: bool = Field(
+        False,
+        description="Connect in the background instead of delaying agent "
+        "creation; the server's tools are added once it is connected",
+    )
 
 
 class MCPSettings(BaseModel):
@@ -125,6 +356,24 @@ class MCPSettings(BaseModel):
     servers: Dict[str, MCPServerConfig] = Field(
         default_factory=dict, description="MCP server configurations"
     )
+    connect_timeout: float = Field(
+        30.0, description="Seconds to wait for each MCP server to connect"
+    )
+    max_in_flight: int = Field(
+        8, description="Requests sent to one shared MCP session at the same time"
+    )
+    idle_timeout: float = Field(
+        300.0,
+        description="Seconds an MCP session no agent uses is kept open for reuse",
+    )
+    health_check_interval: float = Field(
+        30.0, description="Seconds after which a session is pinged before reuse"
+    )
+    tool_refresh_interval: float = Field(
+        60.0,
+        description="Seconds between tool listings of MCP servers that do not "
+        "announce tool changes; 0 disables them",
+    )
 
     @classmethod
     def load_server_config(cls) -> Dict[str, MCPServerConfig]:
@@ -146,6 +395,8 @@ class MCPSettings(BaseModel):
                         url=server_config.get("url"),
                         command=server_config.get("command"),
                         args=server_config.get("args", []),
+                        timeout=server_config.get("timeout"),
+                        lazy=server_config.get("lazy", False),
                     )
                 return servers
         except Exception as e:
@@ -164,6 +415,18 @@ class AppConfig(BaseModel):
         None, description="Search configuration"
     )
     mcp_config: Optional[MCPSettings] = Field(None, description="MCP configuration")
+    page_cache_config: Optional[PageCacheSettings] = Field(
+        None, description="Page cache configuration"
+    )
+    memory_config: Optional[MemorySettings] = Field(
+        None, description="Memory configuration"
+    )
+    checkpoint_config: Optional[CheckpointSettings] = Field(
+        None, description="Checkpoint configuration"
+    )
+    budget_config: Optional[BudgetSettings] = Field(
+        None, description="Budget configuration"
+    )
     run_flow_config: Optional[RunflowSettings] = Field(
         None, description="Run flow configuration"
     )
@@ -224,7 +487,13 @@ class Config:
             "temperature": base_llm.get("temperature", 1.0),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
+            "rpm": base_llm.get("rpm"),
+            "tpm": base_llm.get("tpm"),
+            "endpoints": base_llm.get("endpoints"),
+            "hedge": base_llm.get("hedge", False),
         }
+        # Sections do not inherit a default router's endpoints
+        inherited_settings = {**default_settings, "endpoints": None, "hedge": False}
 
         # handle browser config.
         browser_config = raw_config.get("browser", {})
@@ -278,6 +547,13 @@ class Config:
         else:
             mcp_settings = MCPSettings(servers=MCPSettings.load_server_config())
 
+        page_cache_config = raw_config.get("page_cache", {})
+        page_cache_settings = PageCacheSettings(**page_cache_config)
+
+        memory_settings = MemorySettings(**raw_config.get("memory", {}))
+        checkpoint_settings = CheckpointSettings(**raw_config.get("checkpoint", {}))
+        budget_settings = BudgetSettings(**raw_config.get("budget", {}))
+
         run_flow_config = raw_config.get("runflow")
         if run_flow_config:
             run_flow_settings = RunflowSettings(**run_flow_config)
@@ -287,7 +563,7 @@ class Config:
             "llm": {
                 "default": default_settings,
                 **{
-                    name: {**default_settings, **override_config}
+                    name: {**inherited_settings, **override_config}
                     for name, override_config in llm_overrides.items()
                 },
             },
@@ -295,6 +571,10 @@ class Config:
             "browser_config": browser_settings,
             "search_config": search_settings,
             "mcp_config": mcp_settings,
+            "page_cache_config": page_cache_settings,
+            "memory_config": memory_settings,
+            "checkpoint_config": checkpoint_settings,
+            "budget_config": budget_settings,
             "run_flow_config": run_flow_settings,
         }
 
@@ -321,6 +601,26 @@ class Config:
         """Get the MCP configuration"""
         return self._config.mcp_config
 
+    @property
+    def page_cache_config(self) -> PageCacheSettings:
+        """Get the page cache configuration"""
+        return self._config.page_cache_config
+
+    @property
+    def memory_config(self) -> MemorySettings:
+        """Get the memory configuration"""
+        return self._config.memory_config
+
+    @property
+    def checkpoint_config(self) -> CheckpointSettings:
+        """Get the checkpoint configuration"""
+        return self._config.checkpoint_config
+
+    @property
+    def budget_config(self) -> BudgetSettings:
+        """Get the budget configuration"""
+        return self._config.budget_config
+
     @property
     def run_flow_config(self) -> RunflowSettings:
         """Get the Run Flow configuration"""
@@ -0,0 +1,149 @@
+"""Durable journal of plans and step results for resumable planning runs.
+
+Every plan gets an append-only JSONL file. The first event stores the plan as
+created; each later event records a step status change together with the
+step's result. Replaying the file rebuilds the plan, so a run that crashed or
+timed out can continue from its first unfinished step.
+"""
+
+import copy
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.config import config
+from app.logger import logger
+
+
+class PlanRecord(BaseModel):
+    """A plan rebuilt from its journal."""
+
+    plan_id: str = Field(description="Identifier of the plan")
+    request: str = Field(default="", description="Request the plan was made for")
+    plan: dict = Field(description="Plan data in PlanningTool format")
+    step_results: Dict[int, str] = Field(
+        default_factory=dict, description="Full result of each finished step"
+    )
+    updated_at: float = Field(default=0.0, description="Time of the last event")
+
+    @property
+    def completed_steps(self) -> List[int]:
+        statuses = self.plan.get("step_statuses", [])
+        return [i for i, status in enumerate(statuses) if status == "completed"]
+
+
+class PlanStore:
+    """Append-only JSONL journal of plans, one file per plan.
+
+    Args:
+        store_dir: Directory holding the journal files.
+    """
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+
+    @classmethod
+    def from_config(cls) -> Optional["PlanStore"]:
+        """Build the store from ``[runflow]``, or None if persistence is off."""
+        settings = config.run_flow_config
+        if not settings.persist_plans:
+            return None
+        return cls(
+            Path(settings.plan_store_dir)
+            if settings.plan_store_dir
+            else config.workspace_root / ".plans"
+        )
+
+    def _path(self, plan_id: str) -> Path:
+        return self.store_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', plan_id)}.jsonl"
+
+    def _append(self, plan_id: str, event: dict) -> None:
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        event["time"] = time.time()
+        with open(self._path(plan_id), "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def save_plan(self, plan_id: str, plan: dict, request: str = "") -> None:
+        """Record a plan as created (or replaced)."""
+        self._append(plan_id, {"event": "plan", "request": request, "plan": plan})
+
+    def record_step(
+        self,
+        plan_id: str,
+        step_index: int,
+        status: str,
+        notes: Optional[str] = None,
+        result: Optional[str] = None,
+    ) -> None:
+        """Record a step status change and, once finished, its result."""
+        event = {"event": "step", "index": step_index, "status": status}
+        if notes is not None:
+            event["notes"] = notes
+        if result is not None:
+            event["result"] = result
+        self._append(plan_id, event)
+
+    def load(self, plan_id: str) -> Optional[PlanRecord]:
+        """Replay a plan's journal; None if the plan was never saved.
+
+        A truncated last line, left by a crash mid-write, is ignored.
+        """
+        path = self._path(plan_id)
+        if not path.exists():
+            return None
+
+        record: Optional[PlanRecord] = None
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(
+                        f"Skipping unreadable line {line_number} in {path.name}"
+                    )
+                    continue
+
+                if event.get("event") == "plan":
+                    record = PlanRecord(
+                        plan_id=plan_id,
+                        request=event.get("request", ""),
+                        plan=copy.deepcopy(event["plan"]),
+                    )
+                elif event.get("event") == "step" and record is not None:
+                    self._apply_step(record, event)
+                else:
+                    continue
+                record.updated_at = event.get("time", record.updated_at)
+        return record
+
+    @staticmethod
+    def _apply_step(record: PlanRecord, event: dict) -> None:
+        index = event["index"]
+        plan = record.plan
+        for key, default in (("step_statuses", "not_started"), ("step_notes", "")):
+            values = plan.setdefault(key, [])
+            while len(values) <= index:
+                values.append(default)
+        plan["step_statuses"][index] = event["status"]
+        if "notes" in event:
+            plan["step_notes"][index] = event["notes"]
+        if "result" in event:
+            record.step_results[index] = event["result"]
+
+    def list_plans(self) -> List[PlanRecord]:
+        """All stored plans, most recently updated first."""
+        if not self.store_dir.exists():
+            return []
+        records = [self.load(path.stem) for path in self.store_dir.glob("*.jsonl")]
+        return sorted(
+            (record for record in records if record is not None),
+            key=lambda record: record.updated_at,
+            reverse=True,
+        )
@@ -1,15 +1,21 @@
+import asyncio
 import json
+import math
+import re
 import time
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Literal, Optional, Set, Tuple, Union
 
 from pydantic import Field
 
 from app.agent.base import BaseAgent
+from app.budget import Budget, BudgetLevel, budget_report, current_budget, use_budget
+from app.config import config
 from app.flow.base import BaseFlow
+from app.flow.plan_store import PlanStore
 from app.llm import LLM
 from app.logger import logger
-from app.schema import AgentState, Message, ToolChoice
+from app.schema import AgentState, Memory, Message, Role, ToolChoice
 from app.tool import PlanningTool
 
 
@@ -50,6 +56,19 @@ class PlanningFlow(BaseFlow):
     executor_keys: List[str] = Field(default_factory=list)
     active_plan_id: str = Field(default_factory=lambda: f"plan_{int(time.time())}")
     current_step_index: Optional[int] = None
+    max_parallel_steps: int = Field(
+        default_factory=lambda: config.run_flow_config.max_parallel_steps
+    )
+    step_context: Literal["shared", "scoped"] = Field(
+        default_factory=lambda: config.run_flow_config.step_context
+    )
+    handoff_max_chars: int = Field(
+        default_factory=lambda: config.run_flow_config.handoff_max_chars
+    )
+    step_prompt_tokens: Dict[int, int] = Field(default_factory=dict)
+    plan_store: Optional[PlanStore] = Field(default_factory=PlanStore.from_config)
+    budget: Optional[Budget] = None
+    step_budgets: Dict[int, Budget] = Field(default_factory=dict)
 
     def __init__(
         self, agents: Union[BaseAgent, List[BaseAgent], Dict[str, BaseAgent]], **data
@@ -91,8 +110,33 @@ class PlanningFlow(BaseFlow):
         # Fallback to primary agent
         return self.primary_agent
 
+    def _pick_executor_key(
+        self, step_type: Optional[str], busy: Set[str]
+    ) -> Optional[str]:
+        """Pick a free executor for a step, or None if the right one is busy.
+
+        An agent runs one step at a time, so the number of free executors
+        bounds how many steps run in parallel.
+        """
+        if step_type and step_type in self.agents:
+            return step_type if step_type not in busy else None
+
+        for key in self.executor_keys:
+            if key in self.agents and key not in busy:
+                return key
+
+        if not self.executor_keys and self.primary_agent_key not in busy:
+            return self.primary_agent_key
+        return None
+
     async def execute(self, input_text: str) -> str:
         """Execute the planning flow with agents."""
+        with use_budget(self._new_budget()):
+            result = await self._execute(input_text)
+        logger.info(f"Budget report:\n{self.budget_report()}")
+        return result
+
+    async def _execute(self, input_text: str) -> str:
         try:
             if not self.primary_agent:
                 raise ValueError("No primary agent available")
@@ -108,31 +152,97 @@ class PlanningFlow(BaseFlow):
                     )
                     return f"Failed to create plan for: {input_text}"
 
-            result = ""
-            while True:
-                # Get current step to execute
-                self.current_step_index, step_info = await self._get_current_step_info()
+                if self.plan_store:
+                    self.plan_store.save_plan(
+                        self.active_plan_id,
+                        self.planning_tool.plans[self.active_plan_id],
+                        request=input_text,
+                    )
+
+            result, terminated = await self._execute_ready_steps()
+            if not terminated:
+                result += await self._finalize_plan()
 
-                # Exit if no more steps or plan completed
-                if self.current_step_index is None:
-                    result += await self._finalize_plan()
-                    break
+            return result
+        except Exception as e:
+            logger.error(f"Error in PlanningFlow: {str(e)}")
+            return f"Execution failed: {str(e)}"
 
-                # Execute current step with appropriate agent
-                step_type = step_info.get("type") if step_info else None
-                executor = self.get_executor(step_type)
-                step_result = await self._execute_step(executor, step_info)
-                result += step_result + "\n"
+    async def resume(self, plan_id: str) -> str:
+        """Continue a journaled plan from its first unfinished step.
 
-                # Check if agent wants to terminate
-                if hasattr(executor, "state") and executor.state == AgentState.FINISHED:
-                    break
+        Completed steps are skipped and their stored results reused. Steps
+        that were in progress or blocked when the run stopped are retried.
+        """
+        with use_budget(self._new_budget()):
+            result = await self._resume(plan_id)
+        logger.info(f"Budget report:\n{self.budget_report()}")
+        return result
+
+    async def _resume(self, plan_id: str) -> str:
+        try:
+            record = self.plan_store.load(plan_id) if self.plan_store else None
+            if record is None:
+                return f"No stored plan found with ID: {plan_id}"
+
+            plan = record.plan
+            plan["step_statuses"] = [
+                (
+                    status
+                    if status == PlanStepStatus.COMPLETED.value
+                    else PlanStepStatus.NOT_STARTED.value
+                )
+                for status in plan.get("step_statuses", [])
+            ]
+            self.active_plan_id = plan_id
+            self.planning_tool.plans[plan_id] = plan
+
+            completed = record.completed_steps
+            logger.info(
+                f"Resuming plan {plan_id}: skipping {len(completed)} of "
+                f"{len(plan.get('steps', []))} completed steps"
+            )
+            result, terminated = await self._execute_ready_steps(
+                {i: record.step_results.get(i, "") for i in completed}
+            )
+            if not terminated:
+                result += await self._finalize_plan()
 
             return result
         except Exception as e:
-            logger.error(f"Error in PlanningFlow: {str(e)}")
+            logger.error(f"Error resuming plan {plan_id}: {str(e)}")
             return f"Execution failed: {str(e)}"
 
+    def _new_budget(self) -> Budget:
+        self.budget = Budget.from_config(f"plan {self.active_plan_id}")
+        self.step_budgets = {}
+        return self.budget
+
+    def _step_budget(self, step_index: int) -> Budget:
+        """Give a step its share of the budget left for unfinished steps.
+
+        Tokens are split evenly between unfinished steps; time is split
+        between the waves of up to ``max_parallel_steps`` steps still to run.
+        """
+        parent = current_budget()
+        name = f"step {step_index}"
+        if parent is None:
+            return Budget(name=name)
+        statuses = self.planning_tool.plans[self.active_plan_id].get(
+            "step_statuses", []
+        )
+        unfinished = max(
+            sum(status != PlanStepStatus.COMPLETED.value for status in statuses), 1
+        )
+        waves = math.ceil(unfinished / max(self.max_parallel_steps, 1))
+        return parent.child(name, token_share=unfinished, time_share=waves)
+
+    def budget_report(self) -> str:
+        """Spend against allowance for the run and each of its steps."""
+        budgets = [self.budget] if self.budget else []
+        budgets += [self.step_budgets[i] for i in sorted(self.step_budgets)]
+        return budget_report(budgets)
+
     async def _create_initial_plan(self, request: str) -> None:
         """Create an initial plan based on the request using the flow's LLM and PlanningTool."""
         logger.info(f"Creating initial plan with ID: {self.active_plan_id}")
@@ -140,7 +250,9 @@ class PlanningFlow(BaseFlow):
         system_message_content = (
             "You are a planning assistant. Create a concise, actionable plan with clear steps. "
             "Focus on key milestones rather than detailed sub-steps. "
-            "Optimize for clarity and efficiency."
+            "Optimize for clarity and efficiency. "
+            "Use step_dependencies to list, for each step, the earlier steps it needs; "
+            "independent steps can then run in parallel."
         )
         agents_description = []
         for key in self.executor_keys:
@@ -210,75 +322,108 @@ class PlanningFlow(BaseFlow):
             }
         )
 
-    async def _get_current_step_info(self) -> tuple[Optional[int], Optional[dict]]:
-        """
-        Parse the current plan to identify the first non-completed step's index and info.
-        Returns (None, None) if no active step is found.
+    async def _execute_ready_steps(
+        self, results: Optional[Dict[int, str]] = None
+    ) -> Tuple[str, bool]:
+        """Run plan steps as their dependencies complete.
+
+        Every ready step is started on a free executor agent, up to
+        ``max_parallel_steps`` at a time.
+
+        Args:
+            results: Results of steps that already ran, e.g. in a resumed plan.
+
+        Returns:
+            The step results in step order, and whether an executor asked to
+            terminate (no new steps are started after that).
         """
+        running: Dict[asyncio.Task, Tuple[int, str]] = {}
+        busy: Set[str] = set()
+        results = dict(results or {})
+        stop = False
+
+        while True:
+            budget = current_budget()
+            if not stop and budget and budget.level == BudgetLevel.EXHAUSTED:
+                logger.warning(
+                    f"Budget exhausted, not starting more steps: {budget.report_line()}"
+                )
+                stop = True
+            if not stop:
+                for step_index, step_info in self._get_ready_steps():
+                    if len(running) >= max(self.max_parallel_steps, 1):
+                        break
+                    if any(index == step_index for index, _ in running.values()):
+                        continue
+                    key = self._pick_executor_key(step_info.get("type"), busy)
+                    if key is None:
+                        continue
+
+                    busy.add(key)
+                    self.current_step_index = step_index
+                    await self._mark_step(step_index, PlanStepStatus.IN_PROGRESS)
+                    task = asyncio.create_task(
+                        self._execute_step(self.agents[key], step_info)
+                    )
+                    running[task] = (step_index, key)
+
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(
+                running.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                step_index, key = running.pop(task)
+                busy.discard(key)
+                results[step_index] = task.result()
+
+                # Check if agent wants to terminate
+                executor = self.agents[key]
+                if hasattr(executor, "state") and executor.state == AgentState.FINISHED:
+                    stop = True
+
+        return "".join(results[index] + "\n" for index in sorted(results)), stop
+
+    def _get_ready_steps(self) -> List[Tuple[int, dict]]:
+        """Return (index, info) for every step whose dependencies are completed."""
         if (
             not self.active_plan_id
             or self.active_plan_id not in self.planning_tool.plans
         ):
             logger.error(f"Plan with ID {self.active_plan_id} not found")
-            return None, None
+            return []
 
         try:
-            # Direct access to plan data from planning tool storage
-            plan_data = self.planning_tool.plans[self.active_plan_id]
-            steps = plan_data.get("steps", [])
-            step_statuses = plan_data.get("step_statuses", [])
-
-            # Find first non-completed step
-            for i, step in enumerate(steps):
-                if i >= len(step_statuses):
-                    status = PlanStepStatus.NOT_STARTED.value
-                else:
-                    status = step_statuses[i]
-
-                if status in PlanStepStatus.get_active_statuses():
-                    # Extract step type/category if available
-                    step_info = {"text": step}
-
-                    # Try to extract step type from the text (e.g., [SEARCH] or [CODE])
-                    import re
-
-                    type_match = re.search(r"\[([A-Z_]+)\]", step)
-                    if type_match:
-                        step_info["type"] = type_match.group(1).lower()
-
-                    # Mark current step as in_progress
-                    try:
-                        await self.planning_tool.execute(
-                            command="mark_step",
-                            plan_id=self.active_plan_id,
-                            step_index=i,
-                            step_status=PlanStepStatus.IN_PROGRESS.value,
-                        )
-                    except Exception as e:
-                        logger.warning(f"Error marking step as in_progress: {e}")
-                        # Update step status directly if needed
-                        if i < len(step_statuses):
-                            step_statuses[i] = PlanStepStatus.IN_PROGRESS.value
-                        else:
-                            while len(step_statuses) < i:
-                                step_statuses.append(PlanStepStatus.NOT_STARTED.value)
-                            step_statuses.append(PlanStepStatus.IN_PROGRESS.value)
-
-                        plan_data["step_statuses"] = step_statuses
-
-                    return i, step_info
-
-            return None, None  # No active step found
-
+            steps = self.planning_tool.plans[self.active_plan_id].get("steps", [])
+            ready = []
+            for i in self.planning_tool.get_ready_steps(self.active_plan_id):
+                step = steps[i]
+                # Extract step type/category if available
+                step_info = {"index": i, "text": step}
+
+                # Try to extract step type from the text (e.g., [SEARCH] or [CODE])
+                type_match = re.search(r"\[([A-Z_]+)\]", step)
+                if type_match:
+                    step_info["type"] = type_match.group(1).lower()
+                ready.append((i, step_info))
+            return ready
         except Exception as e:
-            logger.warning(f"Error finding current step index: {e}")
-            return None, None
+            logger.warning(f"Error finding ready steps: {e}")
+            return []
 
     async def _execute_step(self, executor: BaseAgent, step_info: dict) -> str:
-        """Execute the current step with the specified agent using agent.run()."""
-        # Prepare context for the agent with current plan status
-        plan_status = await self._get_plan_text()
-        step_text = step_info.get("text", f"Step {self.current_step_index}")
+        """Execute a plan step with the specified agent using agent.run()."""
+        step_index = step_info.get("index", self.current_step_index)
+
+        # Prepare context for the agent with current plan status. A scoped step
+        # gets earlier results through the handoff instead of the step notes.
+        scoped = self.step_context == "scoped"
+        if scoped:
+            plan_status = self._generate_plan_text_from_storage(include_notes=False)
+        else:
+            plan_status = await self._get_plan_text()
+        step_text = step_info.get("text", f"Step {step_index}")
 
         # Create a prompt for the agent to execute the current step
         step_prompt = f"""
@@ -286,38 +431,166 @@ class PlanningFlow(BaseFlow):
         {plan_status}
 
         YOUR CURRENT TASK:
-        You are now working on step {self.current_step_index}: "{step_text}"
+        You are now working on step {step_index}: "{step_text}"
 
         Please only execute this current step using the appropriate tools. When you're done, provide a summary of what you accomplished.
         """
 
-        # Use agent.run() to execute the step
+        # Use agent.run() to execute the step within its share of the budget
+        step_budget = self.step_budgets[step_index] = self._step_budget(step_index)
         try:
-            step_result = await executor.run(step_prompt)
+            with use_budget(step_budget):
+                step_result, summary = await self._run_step(
+                    executor, step_prompt, step_index
+                )
 
-            # Mark the step as completed after successful execution
-            await self._mark_step_completed()
+            self.step_prompt_tokens[step_index] = step_budget.input_tokens
+            logger.info(
+                f"Step {step_index} used {self.step_prompt_tokens[step_index]} "
+                f"prompt tokens ({self.step_context} context)"
+            )
+
+            # Mark the step as completed after successful execution, keeping
+            # its summary for the steps that depend on it
+            await self._mark_step(
+                step_index,
+                PlanStepStatus.COMPLETED,
+                notes=summary[:500],
+                result=step_result,
+            )
 
             return step_result
         except Exception as e:
-            logger.error(f"Error executing step {self.current_step_index}: {e}")
-            return f"Error executing step {self.current_step_index}: {str(e)}"
+            logger.error(f"Error executing step {step_index}: {e}")
+            await self._mark_step(step_index, PlanStepStatus.BLOCKED, notes=str(e))
+            return f"Error executing step {step_index}: {str(e)}"
+
+    async def _run_step(
+        self, executor: BaseAgent, step_prompt: str, step_index: int
+    ) -> Tuple[str, str]:
+        """Run a step; returns the agent.run() log and the step's summary."""
+        if self.step_context == "scoped":
+            return await self._run_scoped(
+                executor, step_prompt, self._step_handoff(step_index)
+            )
+        step_result = await executor.run(step_prompt)
+        return step_result, self._step_summary(
+            executor.memory.messages, step_prompt, step_result
+        )
 
-    async def _mark_step_completed(self) -> None:
-        """Mark the current step as completed."""
-        if self.current_step_index is None:
-            return
+    @staticmethod
+    def _step_summary(
+        messages: List[Message], step_prompt: str, step_result: str
+    ) -> str:
+        """What a step accomplished, for the steps after it.
 
+        This is the executor's last answer in the step, which the step prompt
+        asks to summarize the work. Without one it is the last step
+        result in the run log that is not a termination.
+        """
+        for message in reversed(messages):
+            if message.role == Role.USER and message.content == step_prompt:
+                break
+            if message.role == Role.ASSISTANT and (message.content or "").strip():
+                return message.content.strip()
+
+        results = re.split(r"^Step \d+: ", step_result, flags=re.MULTILINE)
+        for result in reversed(results):
+            if result.strip() and "`terminate`" not in result:
+                return result.strip()
+        return ""
+
+    async def _run_scoped(
+        self, executor: BaseAgent, step_prompt: str, handoff: str
+    ) -> Tuple[str, str]:
+        """Run a step in a fresh memory seeded with the handoff summary.
+
+        The executor's own memory is restored afterwards, so the step's
+        intermediate messages never reach later steps.
+        """
+        saved_memory, saved_step = executor.memory, executor.current_step
+        executor.memory = Memory(
+            max_messages=saved_memory.max_messages,
+            max_tokens=saved_memory.max_tokens,
+            compactor=saved_memory.compactor,
+        )
+        executor.current_step = 0
+        if handoff:
+            executor.memory.add_message(Message.user_message(handoff))
+        try:
+            step_result = await executor.run(step_prompt)
+            return step_result, self._step_summary(
+                executor.memory.messages, step_prompt, step_result
+            )
+        finally:
+            executor.memory, executor.current_step = saved_memory, saved_step
+
+    def _step_handoff(self, step_index: int) -> str:
+        """Summarize completed steps' results for a scoped step.
+
+        Results of the step's direct dependencies come first; the summary is
+        capped at ``handoff_max_chars``.
+        """
+        plan_data = self.planning_tool.plans.get(self.active_plan_id, {})
+        steps = plan_data.get("steps", [])
+        statuses = plan_data.get("step_statuses", [])
+        notes = plan_data.get("step_notes", [])
+        dependencies = (plan_data.get("step_dependencies") or [[]] * len(steps))[
+            step_index
+        ]
+
+        completed = [
+            i
+            for i in range(len(steps))
+            if i != step_index
+            and i < len(statuses)
+            and statuses[i] == PlanStepStatus.COMPLETED.value
+            and i < len(notes)
+            and notes[i]
+        ]
+        ordered = [i for i in completed if i in dependencies] + [
+            i for i in completed if i not in dependencies
+        ]
+
+        summary = ""
+        for i in ordered:
+            entry = f"- Step {i} ({steps[i]}): {notes[i].strip()}\n"
+            if len(summary) + len(entry) > self.handoff_max_chars:
+                break
+            summary += entry
+        if not summary:
+            return ""
+        return f"Results of earlier plan steps:\n{summary}"
+
+    async def _mark_step(
+        self,
+        step_index: int,
+        status: PlanStepStatus,
+        notes: Optional[str] = None,
+        result: Optional[str] = None,
+    ) -> None:
+        """Record a step's status (and optional notes) in the planning tool.
+
+        The change is also journaled in the plan store, with the step's full
+        result when given.
+        """
+        if self.plan_store:
+            try:
+                self.plan_store.record_step(
+                    self.active_plan_id, step_index, status.value, notes, result
+                )
+            except OSError as e:
+                logger.warning(f"Failed to journal step {step_index}: {e}")
         try:
-            # Mark the step as completed
             await self.planning_tool.execute(
                 command="mark_step",
                 plan_id=self.active_plan_id,
-                step_index=self.current_step_index,
-                step_status=PlanStepStatus.COMPLETED.value,
+                step_index=step_index,
+                step_status=status.value,
+                step_notes=notes,
             )
             logger.info(
-                f"Marked step {self.current_step_index} as completed in plan {self.active_plan_id}"
+                f"Marked step {step_index} as {status.value} in plan {self.active_plan_id}"
             )
         except Exception as e:
             logger.warning(f"Failed to update plan status: {e}")
@@ -327,11 +600,11 @@ class PlanningFlow(BaseFlow):
                 step_statuses = plan_data.get("step_statuses", [])
 
                 # Ensure the step_statuses list is long enough
-                while len(step_statuses) <= self.current_step_index:
+                while len(step_statuses) <= step_index:
                     step_statuses.append(PlanStepStatus.NOT_STARTED.value)
 
                 # Update the status
-                step_statuses[self.current_step_index] = PlanStepStatus.COMPLETED.value
+                step_statuses[step_index] = status.value
                 plan_data["step_statuses"] = step_statuses
 
     async def _get_plan_text(self) -> str:
@@ -345,7 +618,7 @@ class PlanningFlow(BaseFlow):
             logger.error(f"Error getting plan: {e}")
             return self._generate_plan_text_from_storage()
 
-    def _generate_plan_text_from_storage(self) -> str:
+    def _generate_plan_text_from_storage(self, include_notes: bool = True) -> str:
         """Generate plan text directly from storage if the planning tool fails."""
         try:
             if self.active_plan_id not in self.planning_tool.plans:
@@ -395,7 +668,7 @@ class PlanningFlow(BaseFlow):
                 )
 
                 plan_text += f"{i}. {status_mark} {step}\n"
-                if notes:
+                if notes and include_notes:
                     plan_text += f"   Notes: {notes}\n"
 
             return plan_text
@@ -0,0 +1,113 @@
+"""Process-wide store for images attached to messages.
+
+Messages hold an ``ImageRef`` instead of a base64 string. The store keeps the
+decoded bytes of each distinct image once, addressed by their SHA-256, and
+counts the references to them: when the last ``ImageRef`` is garbage
+collected, for example because its message was evicted from memory, the bytes
+are dropped. The base64 text is only produced when an image is sent.
+"""
+
+import base64
+import binascii
+import hashlib
+import threading
+from typing import Dict, List, Union
+
+
+class ImageRef:
+    """A reference to an image in the store; releases it when collected."""
+
+    __slots__ = ("digest", "_store", "__weakref__")
+
+    def __init__(self, store: "ImageStore", digest: str):
+        self._store = store
+        self.digest = digest
+
+    def base64(self) -> str:
+        """The image as base64 text, encoded on each call."""
+        return self._store.get_base64(self.digest)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ImageRef) and other.digest == self.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    # References are immutable, so copies of a message can share one
+    def __copy__(self) -> "ImageRef":
+        return self
+
+    def __deepcopy__(self, memo) -> "ImageRef":
+        return self
+
+    def __repr__(self) -> str:
+        return f"ImageRef({self.digest[:12]})"
+
+    def __del__(self):
+        try:
+            self._store.release(self.digest)
+        except Exception:
+            pass
+
+
+class ImageStore:
+    """Reference-counted, content-addressed image bytes."""
+
+    def __init__(self):
+        # digest -> [bytes, or str when the text is not canonical base64; refs]
+        self._images: Dict[str, List] = {}
+        # Reentrant: an ImageRef may be collected while the lock is held
+        self._lock = threading.RLock()
+
+    def put(self, image: Union[str, bytes]) -> ImageRef:
+        """Store an image given as base64 text or raw bytes."""
+        if isinstance(image, str):
+            data: Union[str, bytes] = image
+            try:
+                decoded = base64.b64decode(image, validate=True)
+                # Keep the bytes only when they encode back to the same text
+                if base64.b64encode(decoded).decode("ascii") == image:
+                    data = decoded
+            except (binascii.Error, ValueError):
+                pass
+        else:
+            data = bytes(image)
+
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            entry = self._images.get(digest)
+            if entry is None:
+                self._images[digest] = [data, 1]
+            else:
+                entry[1] += 1
+        return ImageRef(self, digest)
+
+    def release(self, digest: str) -> None:
+        with self._lock:
+            entry = self._images.get(digest)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._images[digest]
+
+    def get_bytes(self, digest: str) -> bytes:
+        data = self._images[digest][0]
+        return base64.b64decode(data) if isinstance(data, str) else data
+
+    def get_base64(self, digest: str) -> str:
+        data = self._images[digest][0]
+        return data if isinstance(data, str) else base64.b64encode(data).decode()
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the stored images."""
+        with self._lock:
+            return sum(len(entry[0]) for entry in self._images.values())
+
+
+image_store = ImageStore()
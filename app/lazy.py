@@ -0,0 +1,37 @@
+"""Lazy attribute loading for packages with expensive imports.
+
+Tools and agents depend on large libraries (browser_use, search clients,
+boto3, mcp) that take seconds to import in total. A package ``__init__``
+lists its exports as ``"module:attribute"`` paths instead of importing them,
+and each is imported on first access (PEP 562)::
+
+    __getattr__ = lazy_exports(__name__, {"Bash": "app.tool.bash:Bash"})
+"""
+
+import importlib
+import sys
+from typing import Any, Callable, Dict
+
+
+def lazy_exports(module_name: str, exports: Dict[str, str]) -> Callable[[str], Any]:
+    """A module ``__getattr__`` that imports ``exports`` on first access.
+
+    Args:
+        module_name: ``__name__`` of the module defining ``__getattr__``.
+        exports: Attribute name to ``"module:attribute"``, or to ``"module"``
+            for a whole module.
+    """
+
+    def __getattr__(name: str) -> Any:
+        target = exports.get(name)
+        if target is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        module_path, _, attribute = target.partition(":")
+        value = importlib.import_module(module_path)
+        if attribute:
+            value = getattr(value, attribute)
+        # Later lookups find the attribute without calling __getattr__
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    return __getattr__
@@ -1,12 +1,13 @@
 import math
-from typing import Dict, List, Optional, Union
+import random
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import tiktoken
 from openai import (
     APIError,
     AsyncAzureOpenAI,
     AsyncOpenAI,
     AuthenticationError,
+    DefaultAsyncHttpxClient,
     OpenAIError,
     RateLimitError,
 )
@@ -18,10 +19,12 @@ from tenacity import (
     wait_random_exponential,
 )
 
-from app.bedrock import BedrockClient
+from app.budget import charge_tokens
 from app.config import LLMSettings, config
 from app.exceptions import TokenLimitExceeded
+from app.llm_router import Endpoint, RouterClient
 from app.logger import logger  # Assuming a logger is set up in your app
+from app.rate_limit import RateLimiter, get_rate_limiter
 from app.schema import (
     ROLE_VALUES,
     TOOL_CHOICE_TYPE,
@@ -29,6 +32,7 @@ from app.schema import (
     Message,
     ToolChoice,
 )
+from app.tokenizer import ApproximateTokenizer, Tokenizer, approximate_tokens
 
 
 REASONING_MODELS = ["o1", "o3-mini"]
@@ -41,6 +45,23 @@ MULTIMODAL_MODELS = [
     "claude-3-haiku-20240307",
 ]
 
+# Sent in place of images older than the most recent [memory] max_images
+IMAGE_PLACEHOLDER = "[An earlier image was omitted]"
+
+# Input tokens are counted exactly only within this fraction of
+# max_input_tokens; otherwise the fast estimate is enough
+_EXACT_COUNT_MARGIN = 0.2
+
+_backoff = wait_random_exponential(min=1, max=60)
+
+
+def _retry_wait(retry_state) -> float:
+    """Back off exponentially, but only briefly after a 429: the rate
+    limiter already holds requests back for as long as the server asked."""
+    if isinstance(retry_state.outcome.exception(), RateLimitError):
+        return random.uniform(0, 1)
+    return _backoff(retry_state)
+
 
 class TokenCounter:
     # Token constants
@@ -59,7 +80,7 @@ class TokenCounter:
 
     def count_text(self, text: str) -> int:
         """Calculate tokens for a text string"""
-        return 0 if not text else len(self.tokenizer.encode(text))
+        return 0 if not text else self.tokenizer.count(text)
 
     def count_image(self, image_item: dict) -> int:
         """
@@ -171,6 +192,38 @@ class TokenCounter:
         return total_tokens
 
 
+_APPROXIMATE_COUNTER = TokenCounter(ApproximateTokenizer())
+
+
+def _create_client(settings: LLMSettings) -> Tuple[Any, RateLimiter]:
+    """The API client for an endpoint, and its shared rate limiter."""
+    # Shared with every client of the same key and model; fed with the rate
+    # limit headers of each response
+    rate_limiter = get_rate_limiter(settings)
+    http_client = DefaultAsyncHttpxClient(
+        event_hooks={"response": [rate_limiter.on_response]}
+    )
+    if settings.api_type == "azure":
+        client = AsyncAzureOpenAI(
+            base_url=settings.base_url,
+            api_key=settings.api_key,
+            api_version=settings.api_version,
+            http_client=http_client,
+        )
+    elif settings.api_type == "aws":
+        # boto3 is slow to import and only needed for Bedrock
+        from app.bedrock import BedrockClient
+
+        client = BedrockClient()
+    else:
+        client = AsyncOpenAI(
+            api_key=settings.api_key,
+            base_url=settings.base_url,
+            http_client=http_client,
+        )
+    return client, rate_limiter
+
+
 class LLM:
     _instances: Dict[str, "LLM"] = {}
 
@@ -206,46 +259,96 @@ class LLM:
                 else None
             )
 
-            # Initialize tokenizer
-            try:
-                self.tokenizer = tiktoken.encoding_for_model(self.model)
-            except KeyError:
-                # If the model is not in tiktoken's presets, use cl100k_base as default
-                self.tokenizer = tiktoken.get_encoding("cl100k_base")
-
-            if self.api_type == "azure":
-                self.client = AsyncAzureOpenAI(
-                    base_url=self.base_url,
-                    api_key=self.api_key,
-                    api_version=self.api_version,
+            # The encoding is loaded on the first exact count
+            self.tokenizer = Tokenizer(self.model)
+
+            if llm_config.endpoints:
+                # A router: each endpoint has its own rate limiter
+                self.rate_limiter = RateLimiter()
+                llm_configs = config.llm
+                unknown = set(llm_config.endpoints) - set(llm_configs)
+                if unknown:
+                    raise ValueError(f"Unknown LLM endpoints: {sorted(unknown)}")
+                self.client = RouterClient(
+                    [
+                        Endpoint(
+                            name,
+                            llm_configs[name].model,
+                            *_create_client(llm_configs[name]),
+                        )
+                        for name in llm_config.endpoints
+                    ],
+                    hedge=llm_config.hedge,
                 )
-            elif self.api_type == "aws":
-                self.client = BedrockClient()
             else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+                self.client, self.rate_limiter = _create_client(llm_config)
 
             self.token_counter = TokenCounter(self.tokenizer)
 
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
-        if not text:
-            return 0
-        return len(self.tokenizer.encode(text))
+        return self.tokenizer.count(text)
 
     def count_message_tokens(self, messages: List[dict]) -> int:
         return self.token_counter.count_message_tokens(messages)
 
+    def _count_input_tokens(
+        self, messages: List[dict], tools: Optional[List[dict]] = None
+    ) -> int:
+        """Input tokens of a request: estimated, and counted exactly only when
+        the estimate is close to max_input_tokens."""
+        tools_text = "".join(str(tool) for tool in tools or [])
+        estimate = _APPROXIMATE_COUNTER.count_message_tokens(
+            messages
+        ) + approximate_tokens(tools_text)
+        if self.max_input_tokens is None or (
+            self.total_input_tokens + estimate
+            < (1 - _EXACT_COUNT_MARGIN) * self.max_input_tokens
+        ):
+            return estimate
+        return self.count_message_tokens(messages) + self.count_tokens(tools_text)
+
     def update_token_count(self, input_tokens: int, completion_tokens: int = 0) -> None:
         """Update token counts"""
         # Only track tokens if max_input_tokens is set
         self.total_input_tokens += input_tokens
         self.total_completion_tokens += completion_tokens
+        charge_tokens(input_tokens, completion_tokens)
         logger.info(
             f"Token usage: Input={input_tokens}, Completion={completion_tokens}, "
             f"Cumulative Input={self.total_input_tokens}, Cumulative Completion={self.total_completion_tokens}, "
             f"Total={input_tokens + completion_tokens}, Cumulative Total={self.total_input_tokens + self.total_completion_tokens}"
         )
 
+    async def _acquire_capacity(self, input_tokens: int) -> int:
+        """Wait for the rate limiter; returns the tokens reserved for the request."""
+        # The API counts the completion allowance against the token limit
+        reserved = input_tokens + self.max_tokens
+        await self.rate_limiter.acquire(reserved)
+        return reserved
+
+    def _settle_response(
+        self, reserved: int, input_tokens: int, response: ChatCompletion
+    ) -> Tuple[int, int]:
+        """Settle a reservation with the tokens a completed request used.
+
+        Returns:
+            The prompt and completion tokens of the request.
+        """
+        if response.usage:
+            self.rate_limiter.settle(reserved, response.usage.total_tokens)
+            return response.usage.prompt_tokens, response.usage.completion_tokens
+        # No usage reported: estimate the completion locally, as for streams
+        completion_text = ""
+        for choice in response.choices or []:
+            message = choice.message
+            completion_text += message.content or ""
+            for tool_call in message.tool_calls or []:
+                completion_text += tool_call.function.arguments or ""
+        completion_tokens = approximate_tokens(completion_text)
+        self.rate_limiter.settle(reserved, input_tokens + completion_tokens)
+        return input_tokens, completion_tokens
+
     def check_token_limit(self, input_tokens: int) -> bool:
         """Check if token limits are exceeded"""
         if self.max_input_tokens is not None:
@@ -265,7 +368,9 @@ class LLM:
 
     @staticmethod
     def format_messages(
-        messages: List[Union[dict, Message]], supports_images: bool = False
+        messages: List[Union[dict, Message]],
+        supports_images: bool = False,
+        max_images: Optional[int] = None,
     ) -> List[dict]:
         """
         Format messages for LLM by converting them to OpenAI message format.
@@ -273,6 +378,8 @@ class LLM:
         Args:
             messages: List of messages that can be either dict or Message objects
             supports_images: Flag indicating if the target model supports image inputs
+            max_images: Number of most recent images to send; older ones are
+                replaced by a text placeholder. None sends all images.
 
         Returns:
             List[dict]: List of formatted messages in OpenAI format
@@ -291,10 +398,40 @@ class LLM:
         """
         formatted_messages = []
 
-        for message in messages:
+        # Images beyond the most recent max_images are not sent (or encoded)
+        omitted = set()
+        if supports_images and max_images is not None:
+            with_image = [
+                i
+                for i, message in enumerate(messages)
+                if (
+                    message.image is not None
+                    if isinstance(message, Message)
+                    else isinstance(message, dict) and message.get("base64_image")
+                )
+            ]
+            omitted = set(with_image[: max(len(with_image) - max_images, 0)])
+
+        for index, message in enumerate(messages):
             # Convert Message objects to dictionaries
             if isinstance(message, Message):
-                message = message.to_dict()
+                message = message.to_dict(
+                    include_image=supports_images and index not in omitted
+                )
+            elif index in omitted:
+                message = {k: v for k, v in message.items() if k != "base64_image"}
+            if index in omitted:
+                content = message.get("content")
+                if isinstance(content, list):
+                    message["content"] = content + [
+                        {"type": "text", "text": IMAGE_PLACEHOLDER}
+                    ]
+                else:
+                    message["content"] = (
+                        f"{content}\n{IMAGE_PLACEHOLDER}"
+                        if content
+                        else IMAGE_PLACEHOLDER
+                    )
 
             if isinstance(message, dict):
                 # If message is a dict, ensure it has required fields
@@ -352,7 +489,7 @@ class LLM:
         return formatted_messages
 
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=_retry_wait,
         stop=stop_after_attempt(6),
         retry=retry_if_exception_type(
             (OpenAIError, Exception, ValueError)
@@ -383,6 +520,8 @@ class LLM:
             OpenAIError: If API call fails after retries
             Exception: For unexpected errors
         """
+        # Tokens held in the rate limiter until the request settles
+        reserved = 0
         try:
             # Check if the model supports images
             supports_images = self.model in MULTIMODAL_MODELS
@@ -390,12 +529,16 @@ class LLM:
             # Format system and user messages with image support check
             if system_msgs:
                 system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
+                messages = system_msgs + self.format_messages(
+                    messages, supports_images, config.memory_config.max_images
+                )
             else:
-                messages = self.format_messages(messages, supports_images)
+                messages = self.format_messages(
+                    messages, supports_images, config.memory_config.max_images
+                )
 
             # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
+            input_tokens = self._count_input_tokens(messages)
 
             # Check if token limits are exceeded
             if not self.check_token_limit(input_tokens):
@@ -416,19 +559,22 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
+            reserved = await self._acquire_capacity(input_tokens)
             if not stream:
                 # Non-streaming request
                 response = await self.client.chat.completions.create(
                     **params, stream=False
                 )
+                prompt_tokens, completion_tokens = self._settle_response(
+                    reserved, input_tokens, response
+                )
+                reserved = 0
 
                 if not response.choices or not response.choices[0].message.content:
                     raise ValueError("Empty or invalid response from LLM")
 
                 # Update token counts
-                self.update_token_count(
-                    response.usage.prompt_tokens, response.usage.completion_tokens
-                )
+                self.update_token_count(prompt_tokens, completion_tokens)
 
                 return response.choices[0].message.content
 
@@ -451,11 +597,14 @@ class LLM:
                 raise ValueError("Empty response from streaming LLM")
 
             # estimate completion tokens for streaming response
-            completion_tokens = self.count_tokens(completion_text)
+            completion_tokens = approximate_tokens(completion_text)
             logger.info(
                 f"Estimated completion tokens for streaming response: {completion_tokens}"
             )
             self.total_completion_tokens += completion_tokens
+            charge_tokens(0, completion_tokens)
+            self.rate_limiter.settle(reserved, input_tokens + completion_tokens)
+            reserved = 0
 
             return full_response
 
@@ -477,9 +626,13 @@ class LLM:
         except Exception:
             logger.exception(f"Unexpected error in ask")
             raise
+        finally:
+            # A request that failed before settling gives its reservation back
+            if reserved:
+                self.rate_limiter.settle(reserved, 0)
 
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=_retry_wait,
         stop=stop_after_attempt(6),
         retry=retry_if_exception_type(
             (OpenAIError, Exception, ValueError)
@@ -512,6 +665,7 @@ class LLM:
             OpenAIError: If API call fails after retries
             Exception: For unexpected errors
         """
+        reserved = 0
         try:
             # For ask_with_images, we always set supports_images to True because
             # this method should only be called with models that support images
@@ -521,7 +675,11 @@ class LLM:
                 )
 
             # Format messages with image support
-            formatted_messages = self.format_messages(messages, supports_images=True)
+            formatted_messages = self.format_messages(
+                messages,
+                supports_images=True,
+                max_images=config.memory_config.max_images,
+            )
 
             # Ensure the last message is from the user to attach images
             if not formatted_messages or formatted_messages[-1]["role"] != "user":
@@ -568,7 +726,7 @@ class LLM:
                 all_messages = formatted_messages
 
             # Calculate tokens and check limits
-            input_tokens = self.count_message_tokens(all_messages)
+            input_tokens = self._count_input_tokens(all_messages)
             if not self.check_token_limit(input_tokens):
                 raise TokenLimitExceeded(self.get_limit_error_message(input_tokens))
 
@@ -588,14 +746,20 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
+            reserved = await self._acquire_capacity(input_tokens)
+
             # Handle non-streaming request
             if not stream:
                 response = await self.client.chat.completions.create(**params)
+                prompt_tokens, completion_tokens = self._settle_response(
+                    reserved, input_tokens, response
+                )
+                reserved = 0
 
                 if not response.choices or not response.choices[0].message.content:
                     raise ValueError("Empty or invalid response from LLM")
 
-                self.update_token_count(response.usage.prompt_tokens)
+                self.update_token_count(prompt_tokens)
                 return response.choices[0].message.content
 
             # Handle streaming request
@@ -614,6 +778,10 @@ class LLM:
             if not full_response:
                 raise ValueError("Empty response from streaming LLM")
 
+            self.rate_limiter.settle(
+                reserved, input_tokens + approximate_tokens(full_response)
+            )
+            reserved = 0
             return full_response
 
         except TokenLimitExceeded:
@@ -633,9 +801,12 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_with_images: {e}")
             raise
+        finally:
+            if reserved:
+                self.rate_limiter.settle(reserved, 0)
 
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=_retry_wait,
         stop=stop_after_attempt(6),
         retry=retry_if_exception_type(
             (OpenAIError, Exception, ValueError)
@@ -672,6 +843,7 @@ class LLM:
             OpenAIError: If API call fails after retries
             Exception: For unexpected errors
         """
+        reserved = 0
         try:
             # Validate tool_choice
             if tool_choice not in TOOL_CHOICE_VALUES:
@@ -683,20 +855,16 @@ class LLM:
             # Format messages
             if system_msgs:
                 system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
+                messages = system_msgs + self.format_messages(
+                    messages, supports_images, config.memory_config.max_images
+                )
             else:
-                messages = self.format_messages(messages, supports_images)
-
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-
-            # If there are tools, calculate token count for tool descriptions
-            tools_tokens = 0
-            if tools:
-                for tool in tools:
-                    tools_tokens += self.count_tokens(str(tool))
+                messages = self.format_messages(
+                    messages, supports_images, config.memory_config.max_images
+                )
 
-            input_tokens += tools_tokens
+            # Calculate input token count, including the tool descriptions
+            input_tokens = self._count_input_tokens(messages, tools)
 
             # Check if token limits are exceeded
             if not self.check_token_limit(input_tokens):
@@ -729,9 +897,14 @@ class LLM:
                 )
 
             params["stream"] = False  # Always use non-streaming for tool requests
+            reserved = await self._acquire_capacity(input_tokens)
             response: ChatCompletion = await self.client.chat.completions.create(
                 **params
             )
+            prompt_tokens, completion_tokens = self._settle_response(
+                reserved, input_tokens, response
+            )
+            reserved = 0
 
             # Check if response is valid
             if not response.choices or not response.choices[0].message:
@@ -740,9 +913,7 @@ class LLM:
                 return None
 
             # Update token counts
-            self.update_token_count(
-                response.usage.prompt_tokens, response.usage.completion_tokens
-            )
+            self.update_token_count(prompt_tokens, completion_tokens)
 
             return response.choices[0].message
 
@@ -764,3 +935,6 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+        finally:
+            if reserved:
+                self.rate_limiter.settle(reserved, 0)
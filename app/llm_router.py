@@ -0,0 +1,258 @@
+"""Routes chat completions across equivalent LLM endpoints.
+
+An ``[llm.<name>]`` section with ``endpoints`` makes ``LLM(config_name=name)``
+a router: its client is a ``RouterClient`` that exposes the same
+``chat.completions.create`` interface as the OpenAI client, so the rest of
+``LLM`` is unchanged. Each request goes to the endpoint with the best score
+from its observed latency, error rate and rate limit headroom. Failed
+requests move on to the next endpoint, and with ``hedge`` a slow request is
+raced against a second one on another endpoint.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, List, Optional
+
+from openai import BadRequestError, UnprocessableEntityError
+
+from app.logger import logger
+from app.rate_limit import RateLimiter
+
+
+# Errors caused by the request itself; another endpoint would fail the same way
+_REQUEST_ERRORS = (BadRequestError, UnprocessableEntityError)
+
+# Samples needed before an endpoint's p95 is used for hedging
+_MIN_HEDGE_SAMPLES = 5
+# Rough tokens of an image in a request
+_IMAGE_TOKENS = 765
+# Latency assumed for endpoints when none has been measured yet
+_DEFAULT_LATENCY = 1.0
+
+
+class Endpoint:
+    """One deployment behind the router, with its observed behaviour.
+
+    Args:
+        name: Name of the endpoint's ``[llm.<name>]`` section.
+        model: Model (or deployment) name sent to this endpoint.
+        client: OpenAI compatible client of the endpoint.
+        rate_limiter: The endpoint's rate limiter.
+        window: Number of recent latencies kept.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        client: Any,
+        rate_limiter: Optional[RateLimiter] = None,
+        window: int = 50,
+    ):
+        self.name = name
+        self.model = model
+        self.client = client
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.latencies: Deque[float] = deque(maxlen=window)
+        # Exponentially weighted share of failed requests
+        self.error_rate = 0.0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    def score(self, latency_prior: float = _DEFAULT_LATENCY) -> float:
+        """Expected cost of a request here; lower is better.
+
+        Args:
+            latency_prior: Latency assumed while this endpoint has no samples.
+        """
+        latency = self.percentile(0.5)
+        if latency is None:
+            latency = latency_prior
+        headroom = self.rate_limiter.headroom()
+        return latency * (1 + 4 * self.error_rate) / max(headroom, 0.05)
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.error_rate *= 0.8
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.error_rate = self.error_rate * 0.8 + 0.2
+        self.failures += 1
+        # Back off a failing endpoint: 1, 2, 4 ... up to 60 seconds
+        self.cooldown_until = time.monotonic() + min(2 ** (self.failures - 1), 60)
+
+
+class RouterClient:
+    """OpenAI style client that spreads requests across endpoints.
+
+    Args:
+        endpoints: The equivalent endpoints.
+        hedge: Race a second endpoint once a request passes the p95 latency
+            of the first. Streaming requests are never hedged.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], hedge: bool = False):
+        if not endpoints:
+            raise ValueError("A router needs at least one endpoint")
+        self.endpoints = endpoints
+        self.hedge = hedge
+        self.chat = _Chat(self)
+
+    def ranked(self) -> List[Endpoint]:
+        """Endpoints in the order they should be tried."""
+        now = time.monotonic()
+        # Unmeasured endpoints are assumed to be as fast as the measured ones
+        # on average; on a tie the less used endpoint goes first, so each gets
+        # tried without outranking endpoints known to be faster
+        medians = [
+            latency
+            for latency in (endpoint.percentile(0.5) for endpoint in self.endpoints)
+            if latency is not None
+        ]
+        prior = sum(medians) / len(medians) if medians else _DEFAULT_LATENCY
+        return sorted(
+            self.endpoints,
+            key=lambda endpoint: (
+                endpoint.cooldown_until > now,
+                endpoint.score(prior),
+                endpoint.requests,
+            ),
+        )
+
+    async def _call(self, endpoint: Endpoint, params: dict) -> Any:
+        reserved = _estimate_tokens(params)
+        await endpoint.rate_limiter.acquire(reserved)
+        endpoint.requests += 1
+        start = time.monotonic()
+        try:
+            response = await endpoint.client.chat.completions.create(
+                **{**params, "model": endpoint.model}
+            )
+        except BaseException as e:
+            # Cancelled (such as the losing leg of a hedge) or failed: the
+            # reserved tokens were not used
+            endpoint.rate_limiter.settle(reserved, 0)
+            if isinstance(e, _REQUEST_ERRORS):
+                endpoint.record_success(time.monotonic() - start)
+            elif isinstance(e, Exception):
+                endpoint.record_failure()
+            raise
+        endpoint.record_success(time.monotonic() - start)
+        # A stream reports no usage; it keeps its reservation
+        usage = getattr(response, "usage", None)
+        if usage is not None and usage.total_tokens is not None:
+            endpoint.rate_limiter.settle(reserved, usage.total_tokens)
+        return response
+
+    async def _hedged(
+        self, primary: Endpoint, backup: Endpoint, params: dict, tried: set
+    ) -> Any:
+        """Run on ``primary``; past its p95 latency, race ``backup`` as well."""
+        first = asyncio.create_task(self._call(primary, params))
+        done, _ = await asyncio.wait({first}, timeout=primary.percentile(0.95))
+        if done:
+            return first.result()
+
+        logger.info(
+            f"LLM endpoint {primary.name} is slower than its p95, "
+            f"hedging with {backup.name}"
+        )
+        tried.add(backup.name)
+        second = asyncio.create_task(self._call(backup, params))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let the losing leg give back its rate limit reservation
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def create(self, **params) -> Any:
+        """Send a chat completion request, failing over across endpoints."""
+        candidates = self.ranked()
+        tried = set()
+        error = None
+        while candidates:
+            endpoint = candidates.pop(0)
+            if endpoint.name in tried:
+                continue
+            tried.add(endpoint.name)
+            backup = next((e for e in candidates if e.name not in tried), None)
+            try:
+                if (
+                    self.hedge
+                    and backup is not None
+                    and not params.get("stream")
+                    and len(endpoint.latencies) >= _MIN_HEDGE_SAMPLES
+                ):
+                    return await self._hedged(endpoint, backup, params, tried)
+                return await self._call(endpoint, params)
+            except _REQUEST_ERRORS:
+                raise
+            except Exception as e:
+                error = e
+                logger.warning(f"LLM endpoint {endpoint.name} failed: {e!r}")
+        raise error
+
+    def stats(self) -> List[dict]:
+        """Observed behaviour of each endpoint."""
+        return [
+            {
+                "endpoint": endpoint.name,
+                "requests": endpoint.requests,
+                "p50": endpoint.percentile(0.5),
+                "p95": endpoint.percentile(0.95),
+                "error_rate": round(endpoint.error_rate, 3),
+            }
+            for endpoint in self.endpoints
+        ]
+
+
+class _Chat:
+    def __init__(self, router: RouterClient):
+        self.completions = _Completions(router)
+
+
+class _Completions:
+    def __init__(self, router: RouterClient):
+        self._router = router
+
+    async def create(self, **params) -> Any:
+        return await self._router.create(**params)
+
+
+def _estimate_tokens(params: dict) -> int:
+    """Rough prompt plus completion allowance of a request."""
+    tokens = 0
+    for message in params.get("messages", []):
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    tokens += math.ceil(len(part.get("text", "")) / 4)
+                else:
+                    tokens += _IMAGE_TOKENS
+        else:
+            tokens += math.ceil(len(str(content)) / 4)
+    completion = params.get("max_tokens") or params.get("max_completion_tokens") or 0
+    return tokens + completion
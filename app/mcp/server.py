@@ -8,10 +8,12 @@ import argparse
 import asyncio
 import atexit
 import json
+import uuid
 from inspect import Parameter, Signature
 from typing import Any, Dict, Optional
+from weakref import WeakKeyDictionary
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
 from app.logger import logger
 from app.tool.base import BaseTool
@@ -34,6 +36,24 @@ class MCPServer:
         self.tools["editor"] = StrReplaceEditor()
         self.tools["terminate"] = Terminate()
 
+        # Browser session of each client connection, so that clients do not
+        # share (and wait on) one browser context
+        self._browser_sessions: WeakKeyDictionary = WeakKeyDictionary()
+
+    def _browser_session_id(self, ctx: Context, tool: BrowserUseTool) -> str:
+        """Browser session of the client connection a request came from.
+
+        The session's browser context is released when the connection closes.
+        """
+        session = ctx.session
+        if session not in self._browser_sessions:
+            session_id = self._browser_sessions[session] = uuid.uuid4().hex
+            # Closed by the MCP session when the client disconnects
+            exit_stack = getattr(session, "_exit_stack", None)
+            if exit_stack is not None:
+                exit_stack.push_async_callback(tool.release_session, session_id)
+        return self._browser_sessions[session]
+
     def register_tool(self, tool: BaseTool, method_name: Optional[str] = None) -> None:
         """Register a tool with parameter validation and documentation."""
         tool_name = method_name or tool.name
@@ -41,8 +61,10 @@ class MCPServer:
         tool_function = tool_param["function"]
 
         # Define the async function to be registered
-        async def tool_method(**kwargs):
+        async def tool_method(ctx: Context, **kwargs):
             logger.info(f"Executing {tool_name}: {kwargs}")
+            if isinstance(tool, BrowserUseTool):
+                kwargs["session_id"] = self._browser_session_id(ctx, tool)
             result = await tool.execute(**kwargs)
 
             logger.info(f"Result of {tool_name}: {result}")
@@ -102,7 +124,10 @@ class MCPServer:
         param_props = tool_function.get("parameters", {}).get("properties", {})
         required_params = tool_function.get("parameters", {}).get("required", [])
 
-        parameters = []
+        # Receives the request context; not part of the tool's schema
+        parameters = [
+            Parameter(name="ctx", kind=Parameter.KEYWORD_ONLY, annotation=Context)
+        ]
 
         # Follow original type mapping
         for param_name, param_details in param_props.items():
@@ -3,3 +3,8 @@ SYSTEM_PROMPT = "You are an agent that can execute tool calls"
 NEXT_STEP_PROMPT = (
     "If you want to stop interaction, use `terminate` tool/function call."
 )
+
+BUDGET_WRAP_UP_PROMPT = (
+    "Your budget for this task is almost used up. Do not start new work: "
+    "summarize what you have found so far and use `terminate` to finish."
+)
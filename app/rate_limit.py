@@ -0,0 +1,214 @@
+"""Client-side request and token rate limits shared by LLM clients.
+
+LLM clients with the same endpoint, API key and model share one
+``RateLimiter``. Concurrent agents then draw from one allowance instead of
+each discovering the limit through 429 errors and backing off at random.
+Requests wait in arrival order until both the request bucket and the token
+bucket hold enough. The buckets follow the ``x-ratelimit-*`` headers of every
+response, and the limiter pauses after a 429.
+"""
+
+import asyncio
+import math
+import re
+import time
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from app.config import LLMSettings
+from app.logger import logger
+
+
+# Pause after a 429 that says nothing about when to retry; doubled for each
+# further 429 in a row
+_DEFAULT_RETRY_AFTER = 1.0
+_MAX_RETRY_AFTER = 60.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a header value such as ``"20"``, ``"6m0s"`` or ``"250ms"``."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token buckets for requests per minute and tokens per minute.
+
+    Args:
+        rpm: Requests per minute, or None until a response reports the limit.
+        tpm: Tokens per minute, or None until a response reports the limit.
+        clock: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._max_rpm, self._max_tpm = rpm, tpm
+        self.rpm, self.tpm = rpm, tpm
+        self._requests = float(rpm) if rpm else math.inf
+        self._tokens = float(tpm) if tpm else math.inf
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._rate_limited = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        # Seconds callers have spent waiting, for reporting
+        self.waited = 0.0
+
+    def _get_lock(self) -> asyncio.Lock:
+        # A lock belongs to one event loop; the limiter outlives loops
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    def _refill(self) -> float:
+        now = self._clock()
+        elapsed, self._updated = now - self._updated, now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+        return now
+
+    def _delay(self, tokens: int, now: float) -> float:
+        """Seconds until a request of this many tokens may be sent."""
+        delay = max(self._paused_until - now, 0.0)
+        if self.rpm and self._requests < 1:
+            delay = max(delay, (1 - self._requests) * 60 / self.rpm)
+        if self.tpm:
+            tokens = min(tokens, self.tpm)
+            if self._tokens < tokens:
+                delay = max(delay, (tokens - self._tokens) * 60 / self.tpm)
+        return delay
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait for capacity for one request using ``tokens``, then take it.
+
+        Callers are served in arrival order, so a large request is not
+        starved by a stream of small ones.
+        """
+        async with self._get_lock():
+            waited = 0.0
+            while True:
+                delay = self._delay(tokens, self._refill())
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+                waited += delay
+            if waited:
+                self.waited += waited
+                logger.debug(f"Waited {waited:.2f}s for the LLM rate limit")
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= min(tokens, self.tpm)
+
+    def headroom(self) -> float:
+        """Fraction of the allowance available now, from 0 to 1."""
+        now = self._refill()
+        if self._paused_until > now:
+            return 0.0
+        fractions = [1.0]
+        if self.rpm:
+            fractions.append(self._requests / self.rpm)
+        if self.tpm:
+            fractions.append(self._tokens / self.tpm)
+        return max(min(fractions), 0.0)
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Correct a reservation once the tokens a request used are known."""
+        if self.tpm:
+            self._refill()
+            self._tokens = min(self.tpm, self._tokens + reserved - used)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for ``seconds``."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Follow the limits and remaining allowance reported by the server."""
+        limit_requests = _header_int(headers, "x-ratelimit-limit-requests")
+        limit_tokens = _header_int(headers, "x-ratelimit-limit-tokens")
+        self._refill()
+        if limit_requests:
+            rpm = min(limit_requests, self._max_rpm or limit_requests)
+            if rpm != self.rpm:
+                self.rpm, self._requests = rpm, min(self._requests, rpm)
+        if limit_tokens:
+            tpm = min(limit_tokens, self._max_tpm or limit_tokens)
+            if tpm != self.tpm:
+                self.tpm, self._tokens = tpm, min(self._tokens, tpm)
+
+        # Other clients may share the key: never assume more than is left
+        for kind, attribute in (("requests", "_requests"), ("tokens", "_tokens")):
+            remaining = _header_int(headers, f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            setattr(self, attribute, min(getattr(self, attribute), remaining))
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if remaining <= 0 and reset:
+                self.pause(reset)
+
+    def on_rate_limited(self, headers: Mapping[str, str]) -> None:
+        """Pause after a 429 for as long as the server asks."""
+        retry_after = parse_duration(headers.get("retry-after"))
+        retry_after_ms = _header_int(headers, "retry-after-ms")
+        if retry_after_ms is not None:
+            retry_after = retry_after_ms / 1000
+        if retry_after is None:
+            resets = [
+                parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                for kind in ("requests", "tokens")
+            ]
+            retry_after = max(
+                (r for r in resets if r),
+                default=min(
+                    _DEFAULT_RETRY_AFTER * 2**self._rate_limited, _MAX_RETRY_AFTER
+                ),
+            )
+        self._rate_limited += 1
+        logger.warning(f"LLM rate limit hit, pausing requests for {retry_after:.1f}s")
+        self.pause(retry_after)
+
+    async def on_response(self, response) -> None:
+        """httpx response hook feeding the limiter from every response."""
+        self.update_from_headers(response.headers)
+        if response.status_code == 429:
+            self.on_rate_limited(response.headers)
+        else:
+            self._rate_limited = 0
+
+
+_limiters: Dict[Tuple[str, str, str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(settings: LLMSettings) -> RateLimiter:
+    """The limiter shared by clients of the same endpoint, key and model."""
+    key = (settings.api_type, settings.base_url, settings.api_key, settings.model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = RateLimiter(settings.rpm, settings.tpm)
+    return limiter
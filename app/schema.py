@@ -1,7 +1,21 @@
+from collections import deque
 from enum import Enum
-from typing import Any, List, Literal, Optional, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+
+from app.config import config
+from app.image_store import ImageRef, image_store
 
 
 class Role(str, Enum):
@@ -59,7 +73,31 @@ class Message(BaseModel):
     tool_calls: Optional[List[ToolCall]] = Field(default=None)
     name: Optional[str] = Field(default=None)
     tool_call_id: Optional[str] = Field(default=None)
-    base64_image: Optional[str] = Field(default=None)
+    image: Optional[ImageRef] = Field(
+        default=None, exclude=True, description="Attached image in the image store"
+    )
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _store_image(cls, data: Any) -> Any:
+        """Move a ``base64_image`` argument into the image store."""
+        if isinstance(data, dict) and "base64_image" in data:
+            data = dict(data)
+            base64_image = data.pop("base64_image")
+            if base64_image:
+                data["image"] = image_store.put(base64_image)
+        return data
+
+    @property
+    def base64_image(self) -> Optional[str]:
+        """The attached image as base64 text, encoded on access."""
+        return self.image.base64() if self.image is not None else None
+
+    @base64_image.setter
+    def base64_image(self, value: Optional[str]) -> None:
+        self.image = image_store.put(value) if value else None
 
     def __add__(self, other) -> List["Message"]:
         """支持 Message + list 或 Message + Message 的操作"""
@@ -81,7 +119,7 @@ class Message(BaseModel):
                 f"unsupported operand type(s) for +: '{type(other).__name__}' and '{type(self).__name__}'"
             )
 
-    def to_dict(self) -> dict:
+    def to_dict(self, include_image: bool = True) -> dict:
         """Convert message to dictionary format"""
         message = {"role": self.role}
         if self.content is not None:
@@ -92,8 +130,8 @@ class Message(BaseModel):
             message["name"] = self.name
         if self.tool_call_id is not None:
             message["tool_call_id"] = self.tool_call_id
-        if self.base64_image is not None:
-            message["base64_image"] = self.base64_image
+        if include_image and self.image is not None:
+            message["base64_image"] = self.image.base64()
         return message
 
     @classmethod
@@ -156,27 +194,241 @@ class Message(BaseModel):
         )
 
 
+# Rough token estimate of an attached image (a high-detail 1024x1024 image)
+_IMAGE_TOKENS = 765
+
+
+def estimate_tokens(message: Message) -> int:
+    """Cheap token estimate of a message: about four characters per token."""
+    chars = len(message.content or "")
+    for tool_call in message.tool_calls or []:
+        chars += len(tool_call.function.name) + len(tool_call.function.arguments)
+    return chars // 4 + 4 + (_IMAGE_TOKENS if message.image is not None else 0)
+
+
+def _truncate_middle(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    half = max_chars // 2
+    omitted = len(text) - 2 * half
+    return f"{text[:half]}\n[... {omitted} characters omitted ...]\n{text[-half:]}"
+
+
+# Summarizes evicted messages: (previous summary, evicted messages) -> summary
+Compactor = Callable[[Optional[str], List[Message]], Awaitable[str]]
+
+
+class _MessageRing:
+    """Ring buffer of (message, estimated tokens) with a running token total."""
+
+    __slots__ = ("entries", "tokens", "summary", "summary_tokens", "evicted")
+
+    def __init__(self):
+        self.entries: Deque[Tuple[Message, int]] = deque()
+        self.tokens = 0
+        self.summary: Optional[Message] = None
+        self.summary_tokens = 0
+        self.evicted: List[Message] = []
+
+    def push(self, message: Message) -> None:
+        tokens = estimate_tokens(message)
+        self.entries.append((message, tokens))
+        self.tokens += tokens
+
+    def pop_oldest(self) -> List[Message]:
+        """Evict the oldest message with the tool results that answer it."""
+        message, tokens = self.entries.popleft()
+        evicted = [message]
+        self.tokens -= tokens
+        # Tool results are never kept without the call they answer
+        while self.entries and self.entries[0][0].role == Role.TOOL:
+            message, tokens = self.entries.popleft()
+            evicted.append(message)
+            self.tokens -= tokens
+        return evicted
+
+    def set_summary(self, message: Optional[Message]) -> None:
+        self.summary = message
+        self.summary_tokens = estimate_tokens(message) if message else 0
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.tokens = 0
+
+
+def _summary_message(summary: str) -> Message:
+    return Message.user_message(f"Summary of the earlier conversation:\n{summary}")
+
+
 class Memory(BaseModel):
-    messages: List[Message] = Field(default_factory=list)
+    """Agent conversation memory bounded by message count and estimated tokens.
+
+    Messages live in a ring buffer. When a limit is exceeded the oldest
+    messages are evicted, an assistant tool call together with its tool
+    results. Evicted messages are handed to the ``compactor`` on the next
+    ``compact()``; its running summary is kept as the first message.
+    """
+
     max_messages: int = Field(default=100)
+    max_tokens: Optional[int] = Field(
+        default_factory=lambda: config.memory_config.max_tokens,
+        description="Estimated tokens kept in memory (None for unlimited)",
+    )
+    compactor: Optional[Compactor] = Field(default=None, exclude=True)
+    summary: Optional[str] = Field(
+        default=None, description="Summary of compacted messages"
+    )
+
+    _ring: _MessageRing = PrivateAttr(default_factory=_MessageRing)
+
+    def __init__(self, messages: Optional[List[Message]] = None, **data):
+        super().__init__(**data)
+        if messages:
+            self.add_messages(messages)
+
+    @property
+    def messages(self) -> List[Message]:
+        """The summary of compacted messages, if any, then the kept messages."""
+        ring = self._ring
+        messages = [message for message, _ in ring.entries]
+        if ring.summary is not None:
+            messages.insert(0, ring.summary)
+        return messages
+
+    @messages.setter
+    def messages(self, value: List[Message]) -> None:
+        ring = self._ring
+        ring.clear()
+        if ring.summary is not None and not any(
+            message is ring.summary for message in value
+        ):
+            ring.set_summary(None)
+            self.summary = None
+        for message in value:
+            if message is not ring.summary:
+                self._push(ring, message)
+        self._enforce_limits(ring)
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the kept messages and the summary."""
+        ring = self._ring
+        return ring.tokens + ring.summary_tokens
+
+    @property
+    def kept_messages(self) -> List[Message]:
+        """The kept messages, without the summary."""
+        return [message for message, _ in self._ring.entries]
+
+    @property
+    def evicted_messages(self) -> List[Message]:
+        """Evicted messages waiting for the next ``compact()``."""
+        return list(self._ring.evicted)
+
+    @property
+    def pending_compaction(self) -> bool:
+        return bool(self._ring.evicted)
+
+    def restore(
+        self,
+        messages: List[Message],
+        summary: Optional[str] = None,
+        evicted: Optional[List[Message]] = None,
+    ) -> None:
+        """Replace the memory's contents, e.g. from a checkpoint.
+
+        Args:
+            messages: The kept messages.
+            summary: Summary of compacted messages, restored as the summary
+                rather than as an ordinary message.
+            evicted: Evicted messages waiting for compaction.
+        """
+        self.clear()
+        ring = self._ring
+        if summary is not None:
+            self.summary = summary
+            ring.set_summary(_summary_message(summary))
+        for message in messages:
+            self._push(ring, message)
+        ring.evicted.extend(evicted or [])
+        self._enforce_limits(ring)
+
+    def _push(self, ring: _MessageRing, message: Message) -> None:
+        # A single message may use at most half of the token budget
+        if self.max_tokens and message.content:
+            max_chars = self.max_tokens * 2
+            if len(message.content) > max_chars:
+                message = message.model_copy(
+                    update={"content": _truncate_middle(message.content, max_chars)}
+                )
+        ring.push(message)
+
+    def _enforce_limits(
+        self, ring: _MessageRing, max_tokens: Optional[int] = None
+    ) -> None:
+        max_messages = self.max_messages
+        if max_tokens is None:
+            max_tokens = self.max_tokens
+        keep_evicted = self.compactor is not None
+        # The newest message is always kept
+        while len(ring.entries) > 1 and (
+            len(ring.entries) > max_messages
+            or (
+                max_tokens is not None
+                and ring.tokens + ring.summary_tokens > max_tokens
+            )
+        ):
+            evicted = ring.pop_oldest()
+            if keep_evicted:
+                ring.evicted.extend(evicted)
 
     def add_message(self, message: Message) -> None:
         """Add a message to memory"""
-        self.messages.append(message)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        ring = self._ring
+        self._push(ring, message)
+        self._enforce_limits(ring)
 
     def add_messages(self, messages: List[Message]) -> None:
         """Add multiple messages to memory"""
-        self.messages.extend(messages)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        ring = self._ring
+        for message in messages:
+            self._push(ring, message)
+        self._enforce_limits(ring)
+
+    async def compact(self) -> None:
+        """Fold evicted messages into the running summary."""
+        ring = self._ring
+        if not ring.evicted or self.compactor is None:
+            return
+        evicted, ring.evicted = ring.evicted, []
+        self.summary = await self.compactor(self.summary, evicted)
+        ring.set_summary(_summary_message(self.summary))
+        self._enforce_limits(ring)
+        # The summary itself may have pushed out more messages
+        if ring.evicted:
+            await self.compact()
+
+    async def shrink(self, ratio: float = 0.5) -> bool:
+        """Evict down to ``ratio`` of the current size and compact.
+
+        Used when a request overflows the model's context despite the limits.
+
+        Returns:
+            Whether any message was evicted.
+        """
+        ring = self._ring
+        before = len(ring.entries)
+        self._enforce_limits(ring, max_tokens=int(self.tokens * ratio))
+        await self.compact()
+        return len(ring.entries) < before
 
     def clear(self) -> None:
         """Clear all messages"""
-        self.messages.clear()
+        ring = self._ring
+        ring.clear()
+        ring.evicted.clear()
+        ring.set_summary(None)
+        self.summary = None
 
     def get_recent_messages(self, n: int) -> List[Message]:
         """Get n most recent messages"""
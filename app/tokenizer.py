@@ -0,0 +1,123 @@
+"""Tokenizers for counting prompt tokens.
+
+``tiktoken`` downloads its BPE files the first time an encoding is used,
+which stalls or fails without network access. Encodings are therefore only
+loaded on the first exact count. They come from a local cache,
+``workspace/.tiktoken`` unless ``TIKTOKEN_CACHE_DIR`` is set, and are shared
+by all LLM instances. Fill the cache ahead of time, for example when building
+an image, with::
+
+    python -m app.tokenizer cl100k_base o200k_base
+
+Most counts only guard limits and need not be exact; ``approximate_tokens``
+estimates them without any tokenizer.
+"""
+
+import argparse
+import os
+import threading
+from typing import Dict, Optional
+
+from app.config import WORKSPACE_ROOT
+from app.logger import logger
+
+
+CACHE_DIR = WORKSPACE_ROOT / ".tiktoken"
+DEFAULT_ENCODING = "cl100k_base"
+
+_encodings: Dict[str, Optional[object]] = {}
+_lock = threading.Lock()
+
+
+def approximate_tokens(text: str) -> int:
+    """Fast token estimate: four ASCII characters or one other character each."""
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+
+def encoding_name(model: str) -> str:
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        # Models unknown to tiktoken use cl100k_base
+        return DEFAULT_ENCODING
+
+
+def load_encoding(name: str):
+    """The tiktoken encoding ``name``, or None if it cannot be loaded."""
+    with _lock:
+        if name not in _encodings:
+            os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(CACHE_DIR))
+            try:
+                import tiktoken
+
+                _encodings[name] = tiktoken.get_encoding(name)
+            except Exception as e:
+                logger.warning(
+                    f"Tokenizer {name} is unavailable ({e}); token counts are "
+                    f"approximate. Run `python -m app.tokenizer {name}` with "
+                    f"network access to cache it."
+                )
+                _encodings[name] = None
+        return _encodings[name]
+
+
+class Tokenizer:
+    """Token counts for a model, loading its encoding on the first count.
+
+    Falls back to ``approximate_tokens`` if the encoding cannot be loaded.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+
+    @property
+    def encoding(self):
+        if not self._loaded:
+            self._encoding = load_encoding(encoding_name(self.model))
+            self._loaded = True
+        return self._encoding
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the model's real encoding."""
+        return self.encoding is not None
+
+    def encode(self, text: str) -> list:
+        if self.encoding is None:
+            raise RuntimeError(f"No tokenizer is available for {self.model}")
+        return self.encoding.encode(text)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is None:
+            return approximate_tokens(text)
+        return len(self.encoding.encode(text))
+
+
+class ApproximateTokenizer:
+    """Token counts estimated by ``approximate_tokens``."""
+
+    exact = False
+
+    def count(self, text: str) -> int:
+        return approximate_tokens(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=f"Download tiktoken encodings into {CACHE_DIR}"
+    )
+    parser.add_argument("encodings", nargs="*", default=[DEFAULT_ENCODING])
+    args = parser.parse_args()
+    for name in args.encodings:
+        if load_encoding(name) is None:
+            raise SystemExit(1)
+        print(f"Cached {name} in {os.environ['TIKTOKEN_CACHE_DIR']}")
@@ -1,13 +1,37 @@
-from app.tool.base import BaseTool
-from app.tool.bash import Bash
-from app.tool.browser_use_tool import BrowserUseTool
-from app.tool.create_chat_completion import CreateChatCompletion
-from app.tool.planning import PlanningTool
-from app.tool.str_replace_editor import StrReplaceEditor
-from app.tool.terminate import Terminate
-from app.tool.tool_collection import ToolCollection
-from app.tool.web_search import WebSearch
-from app.tool.crawl4ai import Crawl4aiTool
+from typing import TYPE_CHECKING
+
+from app.lazy import lazy_exports
+
+
+if TYPE_CHECKING:
+    from app.tool.base import BaseTool
+    from app.tool.bash import Bash
+    from app.tool.browser_use_tool import BrowserUseTool
+    from app.tool.crawl4ai import Crawl4aiTool
+    from app.tool.create_chat_completion import CreateChatCompletion
+    from app.tool.planning import PlanningTool
+    from app.tool.str_replace_editor import StrReplaceEditor
+    from app.tool.terminate import Terminate
+    from app.tool.tool_collection import ToolCollection
+    from app.tool.web_search import WebSearch
+
+
+# Tools are imported on first access; some pull in heavy libraries
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "BaseTool": "app.tool.base:BaseTool",
+        "Bash": "app.tool.bash:Bash",
+        "BrowserUseTool": "app.tool.browser_use_tool:BrowserUseTool",
+        "Terminate": "app.tool.terminate:Terminate",
+        "StrReplaceEditor": "app.tool.str_replace_editor:StrReplaceEditor",
+        "WebSearch": "app.tool.web_search:WebSearch",
+        "ToolCollection": "app.tool.tool_collection:ToolCollection",
+        "CreateChatCompletion": "app.tool.create_chat_completion:CreateChatCompletion",
+        "PlanningTool": "app.tool.planning:PlanningTool",
+        "Crawl4aiTool": "app.tool.crawl4ai:Crawl4aiTool",
+    },
+)
 
 
 __all__ = [
@@ -20,5 +44,5 @@ __all__ = [
     "ToolCollection",
     "CreateChatCompletion",
     "PlanningTool",
-    "Crawl4aiTool"
+    "Crawl4aiTool",
 ]
@@ -0,0 +1,229 @@
+"""Long-lived, supervised headless Chromium shared by every browser client on a host.
+
+The daemon exposes the Chrome DevTools Protocol (CDP) on ``host:port``.
+Clients attach to it with ``connect_over_cdp`` and open their own isolated
+browser context, so they skip the browser launch entirely.
+
+Run it with ``python run_browser_daemon.py``. Alternatively, set
+``[browser.daemon] auto_start = true`` and the first client starts it in the
+background.
+"""
+
+import argparse
+import asyncio
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from app.config import PROJECT_ROOT, BrowserDaemonSettings, config
+from app.logger import logger
+
+
+def daemon_settings() -> BrowserDaemonSettings:
+    if config.browser_config is None:
+        return BrowserDaemonSettings()
+    return config.browser_config.daemon
+
+
+def endpoint(settings: BrowserDaemonSettings) -> str:
+    return f"http://{settings.host}:{settings.port}"
+
+
+async def is_healthy(settings: BrowserDaemonSettings, timeout: float = 2.0) -> bool:
+    """Whether a browser answers DevTools requests on the configured port."""
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            response = await client.get(f"{endpoint(settings)}/json/version")
+        return response.status_code == 200 and "Browser" in response.json()
+    except Exception:
+        return False
+
+
+async def ensure_daemon(settings: Optional[BrowserDaemonSettings] = None) -> str:
+    """Return the CDP endpoint of a healthy daemon, starting one if allowed.
+
+    Raises:
+        RuntimeError: If no daemon becomes healthy in time.
+    """
+    settings = settings or daemon_settings()
+    if await is_healthy(settings):
+        return endpoint(settings)
+    if not settings.auto_start:
+        raise RuntimeError(f"Browser daemon is not running at {endpoint(settings)}")
+
+    logger.info(f"Starting browser daemon on {endpoint(settings)}")
+    subprocess.Popen(
+        [
+            sys.executable,
+            str(PROJECT_ROOT / "run_browser_daemon.py"),
+            "--host",
+            settings.host,
+            "--port",
+            str(settings.port),
+        ],
+        cwd=PROJECT_ROOT,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.startup_timeout
+    while loop.time() < deadline:
+        await asyncio.sleep(0.2)
+        if await is_healthy(settings):
+            return endpoint(settings)
+    raise RuntimeError(
+        f"Browser daemon did not become healthy within {settings.startup_timeout}s"
+    )
+
+
+async def find_chromium() -> str:
+    """Locate a Chromium binary: the configured one, Playwright's, or the PATH."""
+    if config.browser_config and config.browser_config.chrome_instance_path:
+        return config.browser_config.chrome_instance_path
+    try:
+        from playwright.async_api import async_playwright
+
+        async with async_playwright() as playwright:
+            executable = playwright.chromium.executable_path
+        if Path(executable).exists():
+            return executable
+    except Exception as e:
+        logger.debug(f"Playwright Chromium not available: {e}")
+    for name in ("chromium", "chromium-browser", "google-chrome"):
+        executable = shutil.which(name)
+        if executable:
+            return executable
+    raise RuntimeError("No Chromium executable found for the browser daemon")
+
+
+class BrowserDaemon:
+    """Runs and supervises one headless Chromium with CDP enabled.
+
+    The browser is health-checked every ``health_check_interval`` seconds.
+    After ``max_failed_checks`` consecutive failures, or if the process exits,
+    it is restarted with exponential backoff.
+    """
+
+    def __init__(self, settings: BrowserDaemonSettings, executable: str):
+        self.settings = settings
+        self.executable = executable
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.restarts = 0
+        self.ready = asyncio.Event()
+        self._profile_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    def _command(self) -> List[str]:
+        extra_args = (
+            config.browser_config.extra_chromium_args if config.browser_config else []
+        )
+        return [
+            self.executable,
+            "--headless=new",
+            f"--remote-debugging-address={self.settings.host}",
+            f"--remote-debugging-port={self.settings.port}",
+            f"--user-data-dir={self._profile_dir.name}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            *extra_args,
+            "about:blank",
+        ]
+
+    async def start(self) -> None:
+        """Launch Chromium and wait until it answers health checks."""
+        if self._profile_dir is None:
+            self._profile_dir = tempfile.TemporaryDirectory(prefix="openmanus-browser-")
+        self.process = await asyncio.create_subprocess_exec(
+            *self._command(),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.settings.startup_timeout
+        while loop.time() < deadline:
+            if self.process.returncode is not None:
+                raise RuntimeError(
+                    f"Chromium exited during startup (code {self.process.returncode})"
+                )
+            if await is_healthy(self.settings):
+                logger.info(
+                    f"Browser daemon ready on {endpoint(self.settings)} "
+                    f"(pid {self.process.pid})"
+                )
+                self.ready.set()
+                return
+            await asyncio.sleep(0.2)
+        await self.stop()
+        raise RuntimeError("Chromium did not expose CDP in time")
+
+    async def stop(self) -> None:
+        """Terminate the browser process."""
+        self.ready.clear()
+        process, self.process = self.process, None
+        if process is None or process.returncode is not None:
+            return
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    async def restart(self) -> None:
+        await self.stop()
+        delay = min(2**self.restarts, 30)
+        self.restarts += 1
+        logger.warning(f"Restarting browser daemon in {delay}s")
+        await asyncio.sleep(delay)
+        await self.start()
+
+    async def supervise(self) -> None:
+        """Start the browser and keep it healthy until cancelled."""
+        failures = 0
+        try:
+            await self.start()
+            while True:
+                await asyncio.sleep(self.settings.health_check_interval)
+                exited = self.process is None or self.process.returncode is not None
+                if not exited and await is_healthy(self.settings):
+                    failures = 0
+                    self.restarts = 0
+                    continue
+                failures += 1
+                if exited or failures >= self.settings.max_failed_checks:
+                    try:
+                        await self.restart()
+                        failures = 0
+                    except Exception as e:
+                        logger.error(f"Browser daemon restart failed: {e}")
+        finally:
+            await self.stop()
+            if self._profile_dir is not None:
+                self._profile_dir.cleanup()
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    settings = daemon_settings()
+    parser = argparse.ArgumentParser(description="OpenManus browser daemon")
+    parser.add_argument("--host", default=settings.host, help="CDP listen address")
+    parser.add_argument(
+        "--port", type=int, default=settings.port, help="CDP listen port"
+    )
+    return parser.parse_args()
+
+
+async def run_daemon(host: str, port: int) -> None:
+    settings = daemon_settings().model_copy(update={"host": host, "port": port})
+    if await is_healthy(settings):
+        logger.info(f"A browser is already serving CDP on {endpoint(settings)}")
+        return
+    daemon = BrowserDaemon(settings, await find_chromium())
+    await daemon.supervise()
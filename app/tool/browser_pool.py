@@ -0,0 +1,376 @@
+"""Shared browser process with a pool of isolated, leased browser contexts."""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.config import config
+from app.lazy import lazy_exports
+from app.logger import logger
+from app.tool.browser_daemon import ensure_daemon
+from app.tool.resource_policy import ResourcePolicy
+
+
+if TYPE_CHECKING:
+    from browser_use import Browser as BrowserUseBrowser
+    from browser_use import BrowserConfig
+    from browser_use.browser.context import BrowserContext, BrowserContextConfig
+    from browser_use.dom.service import DomService
+
+
+# browser_use is imported when the first context is created
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "BrowserUseBrowser": "browser_use:Browser",
+        "BrowserConfig": "browser_use:BrowserConfig",
+        "BrowserContextConfig": "browser_use.browser.context:BrowserContextConfig",
+        "DomService": "browser_use.dom.service:DomService",
+    },
+)
+
+
+def _browser_use(name: str) -> Any:
+    """A browser_use class, imported on first use (or replaced in tests)."""
+    return globals().get(name) or __getattr__(name)
+
+
+def build_browser_config(cdp_url: Optional[str] = None) -> "BrowserConfig":
+    """Build the browser_use BrowserConfig from the [browser] settings.
+
+    Args:
+        cdp_url: Attach to this DevTools endpoint instead of the configured
+            launch options (used for the browser daemon).
+    """
+    browser_config_kwargs = {"headless": False, "disable_security": True}
+
+    if config.browser_config:
+        from browser_use.browser.browser import ProxySettings
+
+        # handle proxy settings.
+        if config.browser_config.proxy and config.browser_config.proxy.server:
+            browser_config_kwargs["proxy"] = ProxySettings(
+                server=config.browser_config.proxy.server,
+                username=config.browser_config.proxy.username,
+                password=config.browser_config.proxy.password,
+            )
+
+        browser_attrs = [
+            "headless",
+            "disable_security",
+            "extra_chromium_args",
+            "chrome_instance_path",
+            "wss_url",
+            "cdp_url",
+        ]
+
+        for attr in browser_attrs:
+            value = getattr(config.browser_config, attr, None)
+            if value is not None:
+                if not isinstance(value, list) or value:
+                    browser_config_kwargs[attr] = value
+
+    if cdp_url:
+        browser_config_kwargs["cdp_url"] = cdp_url
+        browser_config_kwargs.pop("wss_url", None)
+
+    return _browser_use("BrowserConfig")(**browser_config_kwargs)
+
+
+def build_context_config() -> "BrowserContextConfig":
+    """Build the BrowserContextConfig used for new contexts."""
+    context_config = _browser_use("BrowserContextConfig")()
+
+    # if there is context config in the config, use it.
+    if (
+        config.browser_config
+        and hasattr(config.browser_config, "new_context_config")
+        and config.browser_config.new_context_config
+    ):
+        context_config = config.browser_config.new_context_config
+
+    # Over CDP, browser_use reuses the browser's default context unless told
+    # otherwise; every session must get its own
+    if _daemon_enabled() and "force_new_context" in type(context_config).model_fields:
+        context_config = context_config.model_copy(update={"force_new_context": True})
+
+    return context_config
+
+
+def _daemon_enabled() -> bool:
+    return bool(config.browser_config and config.browser_config.daemon.enabled)
+
+
+class BrowserContextLease:
+    """A browser context leased to one session, with its own lock.
+
+    :meth:`BrowserContextPool.acquire` returns the lease locked for the
+    caller; ``async with lease:`` releases the lock when the caller is done.
+    """
+
+    def __init__(self, session_id: str, context: "BrowserContext"):
+        self.session_id = session_id
+        self.context = context
+        self.dom_service: Optional["DomService"] = None
+        self.resource_policy: Optional[ResourcePolicy] = None
+        self.lock = asyncio.Lock()
+        # Callers that have been handed the lease but not its lock yet
+        self.waiters = 0
+        self.last_used = asyncio.get_running_loop().time()
+
+    @property
+    def in_use(self) -> bool:
+        return self.lock.locked() or self.waiters > 0
+
+    def touch(self) -> None:
+        self.last_used = asyncio.get_running_loop().time()
+
+    async def __aenter__(self) -> "BrowserContextLease":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.touch()
+        self.lock.release()
+
+
+class BrowserContextPool:
+    """Browser context pool.
+
+    Runs a single browser process and hands out isolated browser contexts
+    (separate cookies, storage and tabs) per session. Independent sessions
+    can browse in parallel; actions within one session are serialized by the
+    lease's lock.
+
+    Attributes:
+        max_contexts: Maximum number of contexts open at the same time.
+        idle_timeout: Seconds after which an unused context (or an empty
+            browser) is closed.
+        cleanup_interval: Seconds between idle checks.
+        _leases: Active leases by session ID.
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = 8,
+        idle_timeout: int = 600,
+        cleanup_interval: int = 60,
+    ):
+        """Initializes the pool.
+
+        Args:
+            max_contexts: Maximum number of concurrently open contexts.
+            idle_timeout: Idle timeout in seconds.
+            cleanup_interval: Cleanup check interval in seconds.
+        """
+        self.max_contexts = max_contexts
+        self.idle_timeout = idle_timeout
+        self.cleanup_interval = cleanup_interval
+
+        self.browser: Optional["BrowserUseBrowser"] = None
+        self._leases: Dict[str, BrowserContextLease] = {}
+        self._browser_idle_since: Optional[float] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global_lock: Optional[asyncio.Lock] = None
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls) -> "BrowserContextPool":
+        browser_settings = config.browser_config
+        if browser_settings is None:
+            return cls()
+        return cls(
+            max_contexts=browser_settings.max_contexts,
+            idle_timeout=browser_settings.context_idle_timeout,
+        )
+
+    def _bind_loop(self) -> None:
+        """Reset loop-bound state when the pool is used from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._global_lock = asyncio.Lock()
+            self.browser = None
+            self._leases = {}
+            self._cleanup_task = None
+
+    def get(self, session_id: str) -> Optional[BrowserContextLease]:
+        """Return the active lease for a session, if any."""
+        try:
+            if self._loop is not asyncio.get_running_loop():
+                return None
+        except RuntimeError:
+            return None
+        return self._leases.get(session_id)
+
+    async def acquire(self, session_id: str) -> BrowserContextLease:
+        """Get the context leased to a session, creating it if needed.
+
+        The lease is returned with its lock held, so it cannot be reclaimed
+        before the caller has used it; release it with ``async with lease:``.
+
+        Args:
+            session_id: Session (agent or client) identifier.
+
+        Returns:
+            BrowserContextLease: The session's lease, locked for the caller.
+
+        Raises:
+            RuntimeError: If the pool is full and no context has been idle
+                for ``idle_timeout``.
+        """
+        self._bind_loop()
+        while True:
+            async with self._global_lock:
+                lease = self._leases.get(session_id)
+                if lease is None:
+                    lease = await self._open_lease(session_id)
+                lease.waiters += 1
+            try:
+                await lease.lock.acquire()
+            finally:
+                lease.waiters -= 1
+            if self._leases.get(session_id) is lease:
+                lease.touch()
+                return lease
+            # Released while waiting for the lock: lease a new context
+            lease.lock.release()
+
+    async def _open_lease(self, session_id: str) -> BrowserContextLease:
+        if len(self._leases) >= self.max_contexts:
+            # Only contexts nobody has used for idle_timeout are reclaimed;
+            # live sessions keep their tabs and cookies
+            await self._close_idle_leases()
+            if len(self._leases) >= self.max_contexts:
+                raise RuntimeError(
+                    f"Maximum number of browser contexts ({self.max_contexts}) "
+                    "reached and none is idle"
+                )
+
+        if self._cleanup_task is None:
+            self._start_cleanup_task()
+
+        try:
+            context = await self._new_context()
+        except Exception as e:
+            if not _daemon_enabled():
+                raise
+            # The daemon may have been restarted; reconnect once
+            logger.warning(f"Reconnecting to browser daemon after error: {e}")
+            await self._close_all()
+            context = await self._new_context()
+        lease = BrowserContextLease(session_id, context)
+        lease.dom_service = _browser_use("DomService")(await context.get_current_page())
+        if config.browser_config and config.browser_config.resource_policy.enabled:
+            lease.resource_policy = ResourcePolicy(
+                config.browser_config.resource_policy
+            )
+            await lease.resource_policy.attach(context)
+        self._leases[session_id] = lease
+        self._browser_idle_since = None
+        logger.info(
+            f"Leased browser context to session {session_id} "
+            f"({len(self._leases)}/{self.max_contexts} in use)"
+        )
+        return lease
+
+    async def _new_context(self) -> "BrowserContext":
+        if self.browser is None:
+            if _daemon_enabled():
+                cdp_url = await ensure_daemon()
+                self.browser = _browser_use("BrowserUseBrowser")(
+                    build_browser_config(cdp_url)
+                )
+                logger.info(f"Attached context pool to browser daemon at {cdp_url}")
+            else:
+                self.browser = _browser_use("BrowserUseBrowser")(build_browser_config())
+                logger.info("Started shared browser for context pool")
+        return await self.browser.new_context(build_context_config())
+
+    async def release(self, session_id: str) -> None:
+        """Close and forget the context leased to a session."""
+        if self._global_lock is None or self.get(session_id) is None:
+            return
+        async with self._global_lock:
+            await self._close_lease(session_id)
+
+    async def _close_lease(self, session_id: str) -> None:
+        lease = self._leases.pop(session_id, None)
+        if lease is None:
+            return
+        try:
+            await lease.context.close()
+        except Exception as e:
+            logger.warning(f"Error closing browser context {session_id}: {e}")
+        if not self._leases:
+            self._browser_idle_since = asyncio.get_running_loop().time()
+
+    def _start_cleanup_task(self) -> None:
+        """Starts automatic cleanup of idle contexts."""
+
+        async def cleanup_loop():
+            try:
+                while True:
+                    await asyncio.sleep(self.cleanup_interval)
+                    try:
+                        await self._cleanup_idle()
+                    except Exception as e:
+                        logger.error(f"Error in browser pool cleanup loop: {e}")
+            except asyncio.CancelledError:
+                # Event loop is shutting down; do not leave the browser running
+                await self._close_all()
+                raise
+
+        self._cleanup_task = asyncio.create_task(cleanup_loop())
+
+    async def _cleanup_idle(self) -> None:
+        """Closes idle contexts, and the browser once no contexts remain."""
+        now = asyncio.get_running_loop().time()
+        async with self._global_lock:
+            await self._close_idle_leases()
+
+            if (
+                self.browser is not None
+                and not self._leases
+                and self._browser_idle_since is not None
+                and now - self._browser_idle_since > self.idle_timeout
+            ):
+                logger.info("Closing idle shared browser")
+                await self._close_browser()
+
+    async def _close_idle_leases(self) -> None:
+        """Close contexts unused for longer than ``idle_timeout``."""
+        now = asyncio.get_running_loop().time()
+        for session_id, lease in list(self._leases.items()):
+            if not lease.in_use and now - lease.last_used > self.idle_timeout:
+                logger.info(f"Closing idle browser context {session_id}")
+                await self._close_lease(session_id)
+
+    async def _close_browser(self) -> None:
+        browser, self.browser = self.browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing shared browser: {e}")
+
+    async def _close_all(self) -> None:
+        for session_id in list(self._leases):
+            await self._close_lease(session_id)
+        await self._close_browser()
+
+    async def close(self) -> None:
+        """Closes every context and the shared browser."""
+        if self._global_lock is None:
+            return
+        task, self._cleanup_task = self._cleanup_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        async with self._global_lock:
+            await self._close_all()
+
+
+BROWSER_POOL = BrowserContextPool.from_config()
@@ -1,21 +1,27 @@
 import asyncio
 import base64
 import json
-from typing import Generic, Optional, TypeVar
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, Generic, Optional, Set, Tuple, TypeVar
 
-from browser_use import Browser as BrowserUseBrowser
-from browser_use import BrowserConfig
-from browser_use.browser.context import BrowserContext, BrowserContextConfig
-from browser_use.dom.service import DomService
-from pydantic import Field, field_validator
+from pydantic import Field, PrivateAttr, field_validator
 from pydantic_core.core_schema import ValidationInfo
 
-from app.config import config
+from app.config import ScreenshotSettings, config
 from app.llm import LLM
+from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
+from app.tool.browser_pool import BROWSER_POOL, BrowserContextLease
+from app.tool.content_extractor import ContentExtractor
+from app.tool.page_store import content_hash, page_store
+from app.tool.screenshot import fit_screenshot, page_fingerprint
 from app.tool.web_search import WebSearch
 
 
+if TYPE_CHECKING:
+    from browser_use.browser.context import BrowserContext
+
+
 _BROWSER_DESCRIPTION = """\
 A powerful browser automation tool that allows interaction with web pages through various actions.
 * This tool provides commands for controlling a browser session, navigating web pages, and extracting information
@@ -121,71 +127,55 @@ class BrowserUseTool(BaseTool, Generic[Context]):
         },
     }
 
-    lock: asyncio.Lock = Field(default_factory=asyncio.Lock)
-    browser: Optional[BrowserUseBrowser] = Field(default=None, exclude=True)
-    context: Optional[BrowserContext] = Field(default=None, exclude=True)
-    dom_service: Optional[DomService] = Field(default=None, exclude=True)
+    session_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    # browser_use objects; typed loosely so that browser_use is only imported
+    # when the browser is first used
+    browser: Optional[Any] = Field(default=None, exclude=True)
+    context: Optional[Any] = Field(default=None, exclude=True)
+    dom_service: Optional[Any] = Field(default=None, exclude=True)
     web_search_tool: WebSearch = Field(default_factory=WebSearch, exclude=True)
+    content_extractor: ContentExtractor = Field(
+        default_factory=lambda: ContentExtractor(
+            chunk_size=getattr(config.browser_config, "extract_chunk_size", 4000),
+            max_concurrency=getattr(
+                config.browser_config, "extract_max_concurrency", 4
+            ),
+            max_chunks=getattr(config.browser_config, "extract_max_chunks", 4),
+        ),
+        exclude=True,
+    )
 
     # Context for generic functionality
     tool_context: Optional[Context] = Field(default=None, exclude=True)
 
     llm: Optional[LLM] = Field(default_factory=LLM)
 
+    _sessions: Set[str] = PrivateAttr(default_factory=set)
+    _screenshot_fingerprints: Dict[int, str] = PrivateAttr(default_factory=dict)
+
     @field_validator("parameters", mode="before")
     def validate_parameters(cls, v: dict, info: ValidationInfo) -> dict:
         if not v:
             raise ValueError("Parameters cannot be empty")
         return v
 
-    async def _ensure_browser_initialized(self) -> BrowserContext:
-        """Ensure browser and context are initialized."""
-        if self.browser is None:
-            browser_config_kwargs = {"headless": False, "disable_security": True}
-
-            if config.browser_config:
-                from browser_use.browser.browser import ProxySettings
-
-                # handle proxy settings.
-                if config.browser_config.proxy and config.browser_config.proxy.server:
-                    browser_config_kwargs["proxy"] = ProxySettings(
-                        server=config.browser_config.proxy.server,
-                        username=config.browser_config.proxy.username,
-                        password=config.browser_config.proxy.password,
-                    )
-
-                browser_attrs = [
-                    "headless",
-                    "disable_security",
-                    "extra_chromium_args",
-                    "chrome_instance_path",
-                    "wss_url",
-                    "cdp_url",
-                ]
-
-                for attr in browser_attrs:
-                    value = getattr(config.browser_config, attr, None)
-                    if value is not None:
-                        if not isinstance(value, list) or value:
-                            browser_config_kwargs[attr] = value
-
-            self.browser = BrowserUseBrowser(BrowserConfig(**browser_config_kwargs))
-
-        if self.context is None:
-            context_config = BrowserContextConfig()
-
-            # if there is context config in the config, use it.
-            if (
-                config.browser_config
-                and hasattr(config.browser_config, "new_context_config")
-                and config.browser_config.new_context_config
-            ):
-                context_config = config.browser_config.new_context_config
+    async def _ensure_browser_initialized(
+        self, session_id: Optional[str] = None
+    ) -> BrowserContextLease:
+        """Lease (or reuse) the browser context for a session.
 
-            self.context = await self.browser.new_context(context_config)
-            self.dom_service = DomService(await self.context.get_current_page())
-
-        return self.context
+        The lease is returned locked; release it with ``async with lease:``.
+        The default session's context is also exposed as ``self.context`` so
+        callers such as the browser agent can inspect it.
+        """
+        session_id = session_id or self.session_id
+        lease = await BROWSER_POOL.acquire(session_id)
+        self._sessions.add(session_id)
+        if session_id == self.session_id:
+            self.browser = BROWSER_POOL.browser
+            self.context = lease.context
+            self.dom_service = lease.dom_service
+        return lease
 
     async def execute(
         self,
@@ -199,6 +189,7 @@ class BrowserUseTool(BaseTool, Generic[Context]):
         goal: Optional[str] = None,
         keys: Optional[str] = None,
         seconds: Optional[int] = None,
+        session_id: Optional[str] = None,
         **kwargs,
     ) -> ToolResult:
         """
@@ -215,19 +206,22 @@ class BrowserUseTool(BaseTool, Generic[Context]):
             goal: Extraction goal for content extraction
             keys: Keys to send for keyboard actions
             seconds: Seconds to wait
+            session_id: Browser session to act in, each with its own isolated
+                browser context; defaults to the tool's own session. Set by
+                the caller (e.g. the MCP server, per client), not by the model.
             **kwargs: Additional arguments
 
         Returns:
             ToolResult with the action's output or error
         """
-        async with self.lock:
-            try:
-                context = await self._ensure_browser_initialized()
+        try:
+            lease = await self._ensure_browser_initialized(session_id)
+        except Exception as e:
+            return ToolResult(error=f"Browser action '{action}' failed: {str(e)}")
 
-                # Get max content length from config
-                max_content_length = getattr(
-                    config.browser_config, "max_content_length", 2000
-                )
+        async with lease:
+            try:
+                context = lease.context
 
                 # Navigation actions
                 if action == "go_to_url":
@@ -236,9 +230,8 @@ class BrowserUseTool(BaseTool, Generic[Context]):
                             error="URL is required for 'go_to_url' action"
                         )
                     page = await context.get_current_page()
-                    await page.goto(url)
-                    await page.wait_for_load_state()
-                    return ToolResult(output=f"Navigated to {url}")
+                    report = await self._navigate(lease, page, url)
+                    return ToolResult(output=f"Navigated to {url}{report}")
 
                 elif action == "go_back":
                     await context.go_back()
@@ -262,8 +255,8 @@ class BrowserUseTool(BaseTool, Generic[Context]):
                     url_to_navigate = first_search_result.url
 
                     page = await context.get_current_page()
-                    await page.goto(url_to_navigate)
-                    await page.wait_for_load_state()
+                    report = await self._navigate(lease, page, url_to_navigate)
+                    logger.info(f"Navigated to {url_to_navigate}{report}")
 
                     return search_response
 
@@ -379,64 +372,31 @@ class BrowserUseTool(BaseTool, Generic[Context]):
                         )
 
                     page = await context.get_current_page()
-                    import markdownify
-
-                    content = markdownify.markdownify(await page.content())
-
-                    prompt = f"""\
-Your task is to extract the content of the page. You will be given a page and a goal, and you should extract all relevant information around this goal from the page. If the goal is vague, summarize the page. Respond in json format.
-Extraction goal: {goal}
+                    html = await page.content()
+                    page_hash = content_hash(html)
+
+                    # Reuse the markdown conversion if this exact page was seen before
+                    cached = await page_store.get_async(page.url)
+                    if (
+                        cached is not None
+                        and cached.markdown
+                        and cached.content_hash == page_hash
+                    ):
+                        content = cached.markdown
+                    else:
+                        import markdownify
+
+                        content = markdownify.markdownify(html)
+                        await page_store.put_async(
+                            page.url, html=html, markdown=content
+                        )
 
-Page content:
-{content[:max_content_length]}
-"""
-                    messages = [{"role": "system", "content": prompt}]
-
-                    # Define extraction function schema
-                    extraction_function = {
-                        "type": "function",
-                        "function": {
-                            "name": "extract_content",
-                            "description": "Extract specific information from a webpage based on a goal",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "extracted_content": {
-                                        "type": "object",
-                                        "description": "The content extracted from the page according to the goal",
-                                        "properties": {
-                                            "text": {
-                                                "type": "string",
-                                                "description": "Text content extracted from the page",
-                                            },
-                                            "metadata": {
-                                                "type": "object",
-                                                "description": "Additional metadata about the extracted content",
-                                                "properties": {
-                                                    "source": {
-                                                        "type": "string",
-                                                        "description": "Source of the extracted content",
-                                                    }
-                                                },
-                                            },
-                                        },
-                                    }
-                                },
-                                "required": ["extracted_content"],
-                            },
-                        },
-                    }
-
-                    # Use LLM to extract content with required function calling
-                    response = await self.llm.ask_tool(
-                        messages,
-                        tools=[extraction_function],
-                        tool_choice="required",
+                    # Map-reduce over structure-aligned chunks; results are
+                    # cached per (url, content hash, goal)
+                    extracted_content = await self.content_extractor.extract(
+                        self.llm, page.url, page_hash, content, goal
                     )
-
-                    if response and response.tool_calls:
-                        args = json.loads(response.tool_calls[0].function.arguments)
-                        extracted_content = args.get("extracted_content", {})
+                    if extracted_content is not None:
                         return ToolResult(
                             output=f"Extracted from page:\n{extracted_content}\n"
                         )
@@ -476,15 +436,28 @@ Page content:
             except Exception as e:
                 return ToolResult(error=f"Browser action '{action}' failed: {str(e)}")
 
+    async def _navigate(self, lease: BrowserContextLease, page, url: str) -> str:
+        """Load a URL and describe what the resource policy did for it."""
+        policy = lease.resource_policy
+        before = policy.snapshot() if policy else None
+        await page.goto(url)
+        await page.wait_for_load_state()
+        if policy is None:
+            return ""
+        return f" ({policy.stats.since(before).summary()})"
+
     async def get_current_state(
-        self, context: Optional[BrowserContext] = None
+        self, context: Optional["BrowserContext"] = None
     ) -> ToolResult:
         """
         Get the current browser state as a ToolResult.
         If context is not provided, uses self.context.
         """
         try:
-            # Use provided context or fall back to self.context
+            # Use provided context or fall back to the default session's context
+            if context is None and BROWSER_POOL.get(self.session_id) is None:
+                # The pool may have reclaimed an idle context
+                self.context = None
             ctx = context or self.context
             if not ctx:
                 return ToolResult(error="Browser context not initialized")
@@ -498,17 +471,14 @@ Page content:
             elif hasattr(ctx, "config") and hasattr(ctx.config, "browser_window_size"):
                 viewport_height = ctx.config.browser_window_size.get("height", 0)
 
-            # Take a screenshot for the state
-            page = await ctx.get_current_page()
-
-            await page.bring_to_front()
-            await page.wait_for_load_state()
-
-            screenshot = await page.screenshot(
-                full_page=True, animations="disabled", type="jpeg", quality=100
+            interactive_elements = (
+                state.element_tree.clickable_elements_to_string()
+                if state.element_tree
+                else ""
+            )
+            screenshot, screenshot_status = await self._capture_screenshot(
+                ctx, state, interactive_elements, viewport_height
             )
-
-            screenshot = base64.b64encode(screenshot).decode("utf-8")
 
             # Build the state info with all required fields
             state_info = {
@@ -516,11 +486,7 @@ Page content:
                 "title": state.title,
                 "tabs": [tab.model_dump() for tab in state.tabs],
                 "help": "[0], [1], [2], etc., represent clickable indices corresponding to the elements listed. Clicking on these indices will navigate to or interact with the respective content behind them.",
-                "interactive_elements": (
-                    state.element_tree.clickable_elements_to_string()
-                    if state.element_tree
-                    else ""
-                ),
+                "interactive_elements": interactive_elements,
                 "scroll_info": {
                     "pixels_above": getattr(state, "pixels_above", 0),
                     "pixels_below": getattr(state, "pixels_below", 0),
@@ -529,35 +495,148 @@ Page content:
                     + viewport_height,
                 },
                 "viewport_height": viewport_height,
+                "screenshot": screenshot_status,
             }
 
             return ToolResult(
-                output=json.dumps(state_info, indent=4, ensure_ascii=False),
+                output=json.dumps(state_info, ensure_ascii=False),
                 base64_image=screenshot,
             )
         except Exception as e:
             return ToolResult(error=f"Failed to get browser state: {str(e)}")
 
+    async def _capture_screenshot(
+        self,
+        ctx: "BrowserContext",
+        state,
+        interactive_elements: str,
+        viewport_height: int,
+    ) -> Tuple[Optional[str], str]:
+        """Capture a screenshot according to the [browser.screenshot] settings.
+
+        Returns:
+            The base64 JPEG (or None when skipped) and a short status string.
+        """
+        settings = (
+            config.browser_config.screenshot
+            if config.browser_config
+            else ScreenshotSettings()
+        )
+        if settings.mode == "off":
+            return None, "disabled"
+
+        page = await ctx.get_current_page()
+        fingerprint = page_fingerprint(
+            id(ctx),
+            settings.mode,
+            state.url,
+            getattr(state, "pixels_above", 0),
+            viewport_height,
+            interactive_elements,
+        )
+        if (
+            settings.skip_unchanged
+            and fingerprint == self._screenshot_fingerprints.get(id(ctx))
+        ):
+            return None, "unchanged since the previous screenshot"
+
+        state_screenshot = getattr(state, "screenshot", None)
+        if settings.mode == "viewport" and state_screenshot:
+            # get_state() already captured the viewport; reuse it
+            raw = base64.b64decode(state_screenshot)
+        else:
+            await page.bring_to_front()
+            await page.wait_for_load_state()
+            clip = None
+            if settings.mode == "full_page":
+                width = await page.evaluate("document.documentElement.clientWidth")
+                height = await page.evaluate("document.documentElement.scrollHeight")
+                # Only capture as much of the page as fits the output box
+                # once scaled to max_width, instead of a multi-megabyte strip
+                scale = min(1.0, settings.max_width / max(width, 1))
+                clip = {
+                    "x": 0,
+                    "y": 0,
+                    "width": width,
+                    "height": min(height, settings.max_height / scale),
+                }
+            raw = await page.screenshot(
+                full_page=settings.mode == "full_page",
+                clip=clip,
+                animations="disabled",
+                type="jpeg",
+                quality=settings.quality,
+                scale="css",
+            )
+
+        screenshot = await asyncio.to_thread(fit_screenshot, raw, settings)
+        self._screenshot_fingerprints[id(ctx)] = fingerprint
+        return base64.b64encode(screenshot).decode("utf-8"), "attached"
+
+    async def checkpoint_state(self) -> Optional[dict]:
+        """Open tabs of the default session, for agent checkpoints."""
+        if self.context is None or BROWSER_POOL.get(self.session_id) is None:
+            return None
+        tabs = await self.context.get_tabs_info()
+        page = await self.context.get_current_page()
+        return {
+            "tabs": [tab.url for tab in tabs],
+            "active_tab": await self._page_id(page),
+        }
+
+    async def restore_state(self, state: dict) -> None:
+        """Reopen the checkpointed tabs and switch to the active one."""
+        active_page = None
+        opened = False
+        for position, url in enumerate(state.get("tabs", [])):
+            if url == "about:blank":
+                continue
+            await self.execute(action="open_tab" if opened else "go_to_url", url=url)
+            opened = True
+            if position == state.get("active_tab"):
+                active_page = await self.context.get_current_page()
+        # Tab ids are positions among the browser's pages, which may hold
+        # more tabs than were restored: look the active page up again
+        if active_page is not None:
+            tab_id = await self._page_id(active_page)
+            if tab_id is not None:
+                await self.execute(action="switch_tab", tab_id=tab_id)
+
+    async def _page_id(self, page) -> Optional[int]:
+        """The tab id of a page in the default session."""
+        session = await self.context.get_session()
+        return next(
+            (i for i, tab in enumerate(session.context.pages) if tab is page), None
+        )
+
+    async def release_session(self, session_id: str) -> None:
+        """Close the browser context of one session, e.g. a disconnected client."""
+        self._sessions.discard(session_id)
+        await BROWSER_POOL.release(session_id)
+
     async def cleanup(self):
-        """Clean up browser resources."""
-        async with self.lock:
-            if self.context is not None:
-                await self.context.close()
-                self.context = None
-                self.dom_service = None
-            if self.browser is not None:
-                await self.browser.close()
-                self.browser = None
+        """Release this tool's browser contexts back to the pool.
+
+        The shared browser process is left running for other sessions; the
+        pool closes it once it has been idle.
+        """
+        for session_id in list(self._sessions):
+            await BROWSER_POOL.release(session_id)
+        self._sessions.clear()
+        self.context = None
+        self.dom_service = None
+        self.browser = None
 
     def __del__(self):
         """Ensure cleanup when object is destroyed."""
-        if self.browser is not None or self.context is not None:
+        private = getattr(self, "__pydantic_private__", None) or {}
+        if private.get("_sessions"):
             try:
-                asyncio.run(self.cleanup())
+                asyncio.get_running_loop().create_task(self.cleanup())
             except RuntimeError:
-                loop = asyncio.new_event_loop()
-                loop.run_until_complete(self.cleanup())
-                loop.close()
+                # No running loop: contexts from a finished loop are reset by
+                # the pool itself on next use.
+                pass
 
     @classmethod
     def create_with_context(cls, context: Context) -> "BrowserUseTool[Context]":
@@ -0,0 +1,235 @@
+"""Goal-directed content extraction over large pages.
+
+Pages are split into structure-aligned markdown chunks, each chunk is sent to
+the LLM concurrently (map), and the per-chunk results are merged (reduce).
+Results are cached by (URL, content hash, goal).
+"""
+
+import asyncio
+import json
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.llm import LLM
+from app.logger import logger
+from app.tool.page_store import normalize_url
+
+
+_HEADING = re.compile(r"^#{1,6}\s", re.MULTILINE)
+
+EXTRACTION_FUNCTION = {
+    "type": "function",
+    "function": {
+        "name": "extract_content",
+        "description": "Extract specific information from a webpage based on a goal",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "extracted_content": {
+                    "type": "object",
+                    "description": "The content extracted from the page according to the goal",
+                    "properties": {
+                        "text": {
+                            "type": "string",
+                            "description": "Text content extracted from the page",
+                        },
+                        "metadata": {
+                            "type": "object",
+                            "description": "Additional metadata about the extracted content",
+                            "properties": {
+                                "source": {
+                                    "type": "string",
+                                    "description": "Source of the extracted content",
+                                }
+                            },
+                        },
+                    },
+                }
+            },
+            "required": ["extracted_content"],
+        },
+    },
+}
+
+_PROMPT = """\
+Your task is to extract the content of the page. You will be given a page and a goal, and you should extract all relevant information around this goal from the page. If the goal is vague, summarize the page. Respond in json format.
+Extraction goal: {goal}
+
+Page content:
+{content}
+"""
+
+_CHUNK_PROMPT = """\
+Your task is to extract content from one part ({index} of {total}) of a web page. You will be given the part and a goal, and you should extract all relevant information around this goal from this part only. If the goal is vague, summarize this part. If nothing in this part is relevant, return an empty text. Respond in json format.
+Extraction goal: {goal}
+
+Page content (part {index} of {total}):
+{content}
+"""
+
+
+def _hard_split(text: str, max_chars: int) -> List[str]:
+    return [text[i : i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def split_markdown(markdown: str, max_chars: int) -> List[str]:
+    """Split markdown into chunks of at most ``max_chars``, following its structure.
+
+    Sections start at headings; sections are packed together while they fit,
+    oversized sections are split at paragraph boundaries, and oversized
+    paragraphs are split hard.
+    """
+    if len(markdown) <= max_chars:
+        return [markdown] if markdown.strip() else []
+
+    starts = [m.start() for m in _HEADING.finditer(markdown)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    sections = [
+        markdown[start:end] for start, end in zip(starts, starts[1:] + [len(markdown)])
+    ]
+
+    pieces: List[str] = []
+    for section in sections:
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        for paragraph in re.split(r"(?<=\n\n)", section):
+            if len(paragraph) <= max_chars:
+                pieces.append(paragraph)
+            else:
+                pieces.extend(_hard_split(paragraph, max_chars))
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def merge_extractions(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-chunk extraction results in page order."""
+    texts: List[str] = []
+    sources: List[str] = []
+    for result in results:
+        text = (result.get("text") or "").strip()
+        if text and text not in texts:
+            texts.append(text)
+        source = (result.get("metadata") or {}).get("source")
+        if source and source not in sources:
+            sources.append(source)
+
+    merged: Dict[str, Any] = {"text": "\n\n".join(texts)}
+    if sources:
+        merged["metadata"] = {"source": ", ".join(sources)}
+    return merged
+
+
+class ContentExtractor:
+    """Chunked, concurrent LLM extraction with a per-page result cache.
+
+    Attributes:
+        chunk_size: Maximum characters of markdown per LLM call.
+        max_concurrency: Maximum concurrent LLM calls per extraction.
+        max_chunks: Maximum chunks processed per page; the rest is dropped.
+        cache_size: Number of extraction results kept in memory.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 4000,
+        max_concurrency: int = 4,
+        max_chunks: int = 4,
+        cache_size: int = 256,
+    ):
+        self.chunk_size = chunk_size
+        self.max_concurrency = max_concurrency
+        self.max_chunks = max_chunks
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+
+    async def extract(
+        self,
+        llm: LLM,
+        url: str,
+        page_hash: str,
+        markdown: str,
+        goal: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Extract goal-relevant content from a page.
+
+        Args:
+            llm: LLM used for the extraction calls.
+            url: Page URL.
+            page_hash: Content hash of the page HTML.
+            markdown: Page content as markdown.
+            goal: Extraction goal.
+
+        Returns:
+            The merged ``extracted_content`` object, or None if nothing was
+            extracted.
+        """
+        key = (normalize_url(url), page_hash, goal.strip())
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            logger.info(f"Reusing cached extraction for {url}")
+            return cached
+
+        chunks = split_markdown(markdown, self.chunk_size)
+        if len(chunks) > self.max_chunks:
+            logger.warning(
+                f"Page {url} split into {len(chunks)} chunks, "
+                f"extracting from the first {self.max_chunks}"
+            )
+            chunks = chunks[: self.max_chunks]
+        if not chunks:
+            return None
+
+        if len(chunks) == 1:
+            prompts = [_PROMPT.format(goal=goal, content=chunks[0])]
+        else:
+            prompts = [
+                _CHUNK_PROMPT.format(
+                    goal=goal, content=chunk, index=i + 1, total=len(chunks)
+                )
+                for i, chunk in enumerate(chunks)
+            ]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(prompt: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                response = await llm.ask_tool(
+                    [{"role": "system", "content": prompt}],
+                    tools=[EXTRACTION_FUNCTION],
+                    tool_choice="required",
+                )
+            if not response or not response.tool_calls:
+                return None
+            args = json.loads(response.tool_calls[0].function.arguments)
+            return args.get("extracted_content", {})
+
+        outcomes = await asyncio.gather(
+            *(run(prompt) for prompt in prompts), return_exceptions=True
+        )
+        errors = [o for o in outcomes if isinstance(o, BaseException)]
+        if errors and len(errors) == len(outcomes):
+            raise errors[0]
+        for error in errors:
+            logger.warning(f"Extraction failed for one chunk of {url}: {error}")
+        results = [o for o in outcomes if o and not isinstance(o, BaseException)]
+        if not results:
+            return None
+
+        extracted = results[0] if len(results) == 1 else merge_extractions(results)
+        self._cache[key] = extracted
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return extracted
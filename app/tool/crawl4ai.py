@@ -6,11 +6,117 @@ providing fast, precise, and AI-ready data extraction with clean Markdown genera
 """
 
 import asyncio
-from typing import List, Union
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from urllib.parse import urlparse
 
+from pydantic import Field
+
 from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
+from app.tool.page_store import CachedPage, page_store
+
+
+class SharedCrawler:
+    """
+    A lazily started AsyncWebCrawler shared by every Crawl4aiTool call.
+
+    The underlying browser is launched on first use and closed again once it
+    has been idle for `idle_timeout` seconds, so consecutive crawls reuse the
+    same Chromium process instead of paying a browser startup each time.
+    """
+
+    def __init__(self, idle_timeout: float = 300.0, check_interval: float = 30.0):
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self._crawler = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._idle_task: Optional[asyncio.Task] = None
+        self._active = 0
+        self._last_used = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._crawler is not None
+
+    def _bind_loop(self) -> None:
+        """Reset loop-bound state when used from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._crawler = None
+            self._idle_task = None
+            self._active = 0
+
+    async def _start(self):
+        from crawl4ai import AsyncWebCrawler, BrowserConfig
+
+        browser_config = BrowserConfig(
+            headless=True,
+            verbose=False,
+            browser_type="chromium",
+            ignore_https_errors=True,
+            java_script_enabled=True,
+        )
+        crawler = AsyncWebCrawler(config=browser_config)
+        await crawler.start()
+        logger.info("🕷️ Started shared Crawl4AI browser")
+        return crawler
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Any]:
+        """Lease the shared crawler, starting it if needed."""
+        self._bind_loop()
+        async with self._lock:
+            if self._crawler is None:
+                self._crawler = await self._start()
+                self._idle_task = asyncio.create_task(self._watch_idle())
+            self._active += 1
+        try:
+            yield self._crawler
+        finally:
+            self._active -= 1
+            self._last_used = asyncio.get_running_loop().time()
+
+    async def _watch_idle(self) -> None:
+        """Close the crawler once it has been unused for `idle_timeout` seconds."""
+        try:
+            while self._crawler is not None:
+                await asyncio.sleep(min(self.check_interval, self.idle_timeout))
+                idle_for = asyncio.get_running_loop().time() - self._last_used
+                if self._active == 0 and idle_for >= self.idle_timeout:
+                    logger.info(
+                        f"Closing shared Crawl4AI browser after {idle_for:.0f}s idle"
+                    )
+                    await self.close()
+                    return
+        except asyncio.CancelledError:
+            # Event loop is shutting down; make sure Chromium does not outlive it
+            await self._close_crawler()
+            raise
+
+    async def _close_crawler(self) -> None:
+        crawler, self._crawler = self._crawler, None
+        if crawler is not None:
+            try:
+                await crawler.close()
+            except Exception as e:
+                logger.warning(f"Error closing Crawl4AI browser: {e}")
+
+    async def close(self) -> None:
+        """Shut down the shared crawler if it is running."""
+        if self._lock is None:
+            return
+        async with self._lock:
+            task, self._idle_task = self._idle_task, None
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+            await self._close_crawler()
+
+
+_shared_crawler = SharedCrawler()
 
 
 class Crawl4aiTool(BaseTool):
@@ -26,7 +132,7 @@ class Crawl4aiTool(BaseTool):
     Features:
     - Extracts clean markdown content optimized for LLMs
     - Handles JavaScript-heavy sites and dynamic content
-    - Supports multiple URLs in a single request
+    - Supports multiple URLs in a single request, crawled concurrently
     - Fast and reliable with built-in error handling
 
     Perfect for content analysis, research, and feeding web content to AI models."""
@@ -62,6 +168,17 @@ class Crawl4aiTool(BaseTool):
         "required": ["urls"],
     }
 
+    max_concurrency: int = Field(
+        default=5, description="Maximum number of URLs crawled at the same time"
+    )
+    max_per_domain: int = Field(
+        default=2, description="Maximum number of concurrent requests per domain"
+    )
+    domain_delay: float = Field(
+        default=0.5,
+        description="Minimum seconds between two requests to the same domain",
+    )
+
     async def execute(
         self,
         urls: Union[str, List[str]],
@@ -99,154 +216,18 @@ class Crawl4aiTool(BaseTool):
             return ToolResult(error="No valid URLs provided")
 
         try:
-            # Import crawl4ai components
-            from crawl4ai import (
-                AsyncWebCrawler,
-                BrowserConfig,
-                CacheMode,
-                CrawlerRunConfig,
-            )
-
-            # Configure browser settings
-            browser_config = BrowserConfig(
-                headless=True,
-                verbose=False,
-                browser_type="chromium",
-                ignore_https_errors=True,
-                java_script_enabled=True,
-            )
-
-            # Configure crawler settings
-            run_config = CrawlerRunConfig(
-                cache_mode=CacheMode.BYPASS if bypass_cache else CacheMode.ENABLED,
+            results: Dict[str, dict] = {}
+            async for result in self.crawl_stream(
+                valid_urls,
+                timeout=timeout,
+                bypass_cache=bypass_cache,
                 word_count_threshold=word_count_threshold,
-                process_iframes=True,
-                remove_overlay_elements=True,
-                excluded_tags=["script", "style"],
-                page_timeout=timeout * 1000,  # Convert to milliseconds
-                verbose=False,
-                wait_until="domcontentloaded",
-            )
-
-            results = []
-            successful_count = 0
-            failed_count = 0
-
-            # Process each URL
-            async with AsyncWebCrawler(config=browser_config) as crawler:
-                for url in valid_urls:
-                    try:
-                        logger.info(f"🕷️ Crawling URL: {url}")
-                        start_time = asyncio.get_event_loop().time()
-
-                        result = await crawler.arun(url=url, config=run_config)
-
-                        end_time = asyncio.get_event_loop().time()
-                        execution_time = end_time - start_time
-
-                        if result.success:
-                            # Count words in markdown
-                            word_count = 0
-                            if hasattr(result, "markdown") and result.markdown:
-                                word_count = len(result.markdown.split())
-
-                            # Count links
-                            links_count = 0
-                            if hasattr(result, "links") and result.links:
-                                internal_links = result.links.get("internal", [])
-                                external_links = result.links.get("external", [])
-                                links_count = len(internal_links) + len(external_links)
-
-                            # Count images
-                            images_count = 0
-                            if hasattr(result, "media") and result.media:
-                                images = result.media.get("images", [])
-                                images_count = len(images)
-
-                            results.append(
-                                {
-                                    "url": url,
-                                    "success": True,
-                                    "status_code": getattr(result, "status_code", 200),
-                                    "title": result.metadata.get("title")
-                                    if result.metadata
-                                    else None,
-                                    "markdown": result.markdown
-                                    if hasattr(result, "markdown")
-                                    else None,
-                                    "word_count": word_count,
-                                    "links_count": links_count,
-                                    "images_count": images_count,
-                                    "execution_time": execution_time,
-                                }
-                            )
-                            successful_count += 1
-                            logger.info(
-                                f"✅ Successfully crawled {url} in {execution_time:.2f}s"
-                            )
-
-                        else:
-                            results.append(
-                                {
-                                    "url": url,
-                                    "success": False,
-                                    "error_message": getattr(
-                                        result, "error_message", "Unknown error"
-                                    ),
-                                    "execution_time": execution_time,
-                                }
-                            )
-                            failed_count += 1
-                            logger.warning(f"❌ Failed to crawl {url}")
-
-                    except Exception as e:
-                        error_msg = f"Error crawling {url}: {str(e)}"
-                        logger.error(error_msg)
-                        results.append(
-                            {"url": url, "success": False, "error_message": error_msg}
-                        )
-                        failed_count += 1
-
-            # Format output
-            output_lines = [f"🕷️ Crawl4AI Results Summary:"]
-            output_lines.append(f"📊 Total URLs: {len(valid_urls)}")
-            output_lines.append(f"✅ Successful: {successful_count}")
-            output_lines.append(f"❌ Failed: {failed_count}")
-            output_lines.append("")
+            ):
+                results[result["url"]] = result
 
-            for i, result in enumerate(results, 1):
-                output_lines.append(f"{i}. {result['url']}")
-
-                if result["success"]:
-                    output_lines.append(
-                        f"   ✅ Status: Success (HTTP {result.get('status_code', 'N/A')})"
-                    )
-                    if result.get("title"):
-                        output_lines.append(f"   📄 Title: {result['title']}")
-
-                    if result.get("markdown"):
-                        # Show first 300 characters of markdown content
-                        content_preview = result["markdown"]
-                        if len(result["markdown"]) > 300:
-                            content_preview += "..."
-                        output_lines.append(f"   📝 Content: {content_preview}")
-
-                    output_lines.append(
-                        f"   📊 Stats: {result.get('word_count', 0)} words, {result.get('links_count', 0)} links, {result.get('images_count', 0)} images"
-                    )
-
-                    if result.get("execution_time"):
-                        output_lines.append(
-                            f"   ⏱️ Time: {result['execution_time']:.2f}s"
-                        )
-                else:
-                    output_lines.append(f"   ❌ Status: Failed")
-                    if result.get("error_message"):
-                        output_lines.append(f"   🚫 Error: {result['error_message']}")
-
-                output_lines.append("")
-
-            return ToolResult(output="\n".join(output_lines))
+            # Keep the output in the order the URLs were requested
+            ordered = [results[url] for url in valid_urls if url in results]
+            return ToolResult(output=self._format_results(valid_urls, ordered))
 
         except ImportError as e:
             error_msg = "Crawl4AI is not installed. Please install it with: pip install crawl4ai"
@@ -257,6 +238,210 @@ class Crawl4aiTool(BaseTool):
             logger.error(error_msg)
             return ToolResult(error=error_msg)
 
+    async def crawl_stream(
+        self,
+        urls: List[str],
+        timeout: int = 30,
+        bypass_cache: bool = False,
+        word_count_threshold: int = 10,
+    ) -> AsyncIterator[dict]:
+        """
+        Crawl URLs concurrently on the shared crawler.
+
+        Yields one result dict per URL as soon as that URL finishes, so callers
+        can start consuming early results while slower pages are still loading.
+        """
+        run_config = self._run_config(timeout, bypass_cache, word_count_threshold)
+
+        # Serve pages already in the shared page store without touching the browser
+        pending = []
+        for url in urls:
+            cached = None if bypass_cache else await page_store.get_fresh_async(url)
+            if cached is not None and cached.markdown:
+                yield self._cached_result(url, cached)
+            else:
+                pending.append(url)
+        if not pending:
+            return
+
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        domain_slots: Dict[str, asyncio.Semaphore] = {}
+        domain_last_hit: Dict[str, float] = {}
+
+        async with _shared_crawler.session() as crawler:
+
+            async def crawl_one(url: str) -> dict:
+                domain = urlparse(url).netloc.lower()
+                slot = domain_slots.setdefault(
+                    domain, asyncio.Semaphore(max(1, self.max_per_domain))
+                )
+                loop = asyncio.get_running_loop()
+                async with slot:
+                    while True:
+                        # Space out requests to the same host without holding
+                        # a global slot, so other domains are not stalled
+                        wait = (
+                            domain_last_hit.get(domain, 0.0)
+                            + self.domain_delay
+                            - loop.time()
+                        )
+                        if wait > 0:
+                            await asyncio.sleep(wait)
+                            continue
+                        async with semaphore:
+                            # Another request to the host may have started
+                            # while this one waited for the global slot
+                            if (
+                                domain_last_hit.get(domain, 0.0) + self.domain_delay
+                                <= loop.time()
+                            ):
+                                domain_last_hit[domain] = loop.time()
+                                return await self._crawl_url(crawler, url, run_config)
+
+            tasks = [asyncio.create_task(crawl_one(url)) for url in pending]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    yield await finished
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    @staticmethod
+    def _run_config(timeout: int, bypass_cache: bool, word_count_threshold: int) -> Any:
+        """Crawl4AI settings for one crawl_stream call."""
+        from crawl4ai import CacheMode, CrawlerRunConfig
+
+        return CrawlerRunConfig(
+            cache_mode=CacheMode.BYPASS if bypass_cache else CacheMode.ENABLED,
+            word_count_threshold=word_count_threshold,
+            process_iframes=True,
+            remove_overlay_elements=True,
+            excluded_tags=["script", "style"],
+            page_timeout=timeout * 1000,  # Convert to milliseconds
+            verbose=False,
+            wait_until="domcontentloaded",
+        )
+
+    async def _crawl_url(self, crawler: Any, url: str, run_config: Any) -> dict:
+        """Crawl a single URL and convert the outcome into a result dict."""
+        start_time = asyncio.get_running_loop().time()
+        try:
+            logger.info(f"🕷️ Crawling URL: {url}")
+            result = await crawler.arun(url=url, config=run_config)
+            execution_time = asyncio.get_running_loop().time() - start_time
+
+            if not result.success:
+                logger.warning(f"❌ Failed to crawl {url}")
+                return {
+                    "url": url,
+                    "success": False,
+                    "error_message": getattr(result, "error_message", "Unknown error"),
+                    "execution_time": execution_time,
+                }
+
+            # Count words in markdown
+            word_count = 0
+            if hasattr(result, "markdown") and result.markdown:
+                word_count = len(result.markdown.split())
+
+            # Count links
+            links_count = 0
+            if hasattr(result, "links") and result.links:
+                internal_links = result.links.get("internal", [])
+                external_links = result.links.get("external", [])
+                links_count = len(internal_links) + len(external_links)
+
+            # Count images
+            images_count = 0
+            if hasattr(result, "media") and result.media:
+                images = result.media.get("images", [])
+                images_count = len(images)
+
+            if result.markdown:
+                await page_store.put_async(
+                    url,
+                    html=getattr(result, "html", None),
+                    markdown=str(result.markdown),
+                )
+
+            logger.info(f"✅ Successfully crawled {url} in {execution_time:.2f}s")
+            return {
+                "url": url,
+                "success": True,
+                "status_code": getattr(result, "status_code", 200),
+                "title": result.metadata.get("title") if result.metadata else None,
+                "markdown": result.markdown if hasattr(result, "markdown") else None,
+                "word_count": word_count,
+                "links_count": links_count,
+                "images_count": images_count,
+                "execution_time": execution_time,
+            }
+        except Exception as e:
+            error_msg = f"Error crawling {url}: {str(e)}"
+            logger.error(error_msg)
+            return {"url": url, "success": False, "error_message": error_msg}
+
+    @staticmethod
+    def _cached_result(url: str, page: CachedPage) -> dict:
+        """Build a result dict from a page in the shared page store."""
+        logger.info(f"📦 Using cached content for {url}")
+        return {
+            "url": url,
+            "success": True,
+            "status_code": 200,
+            "title": None,
+            "markdown": page.markdown,
+            "word_count": len(page.markdown.split()),
+            "links_count": 0,
+            "images_count": 0,
+            "execution_time": 0.0,
+            "cached": True,
+        }
+
+    def _format_results(self, urls: List[str], results: List[dict]) -> str:
+        """Format crawl results into a readable summary."""
+        successful_count = sum(1 for result in results if result["success"])
+        failed_count = len(results) - successful_count
+
+        output_lines = [f"🕷️ Crawl4AI Results Summary:"]
+        output_lines.append(f"📊 Total URLs: {len(urls)}")
+        output_lines.append(f"✅ Successful: {successful_count}")
+        output_lines.append(f"❌ Failed: {failed_count}")
+        output_lines.append("")
+
+        for i, result in enumerate(results, 1):
+            output_lines.append(f"{i}. {result['url']}")
+
+            if result["success"]:
+                output_lines.append(
+                    f"   ✅ Status: Success (HTTP {result.get('status_code', 'N/A')})"
+                    + (" [cached]" if result.get("cached") else "")
+                )
+                if result.get("title"):
+                    output_lines.append(f"   📄 Title: {result['title']}")
+
+                if result.get("markdown"):
+                    # Show first 300 characters of markdown content
+                    content_preview = result["markdown"]
+                    if len(result["markdown"]) > 300:
+                        content_preview += "..."
+                    output_lines.append(f"   📝 Content: {content_preview}")
+
+                output_lines.append(
+                    f"   📊 Stats: {result.get('word_count', 0)} words, {result.get('links_count', 0)} links, {result.get('images_count', 0)} images"
+                )
+
+                if result.get("execution_time"):
+                    output_lines.append(f"   ⏱️ Time: {result['execution_time']:.2f}s")
+            else:
+                output_lines.append(f"   ❌ Status: Failed")
+                if result.get("error_message"):
+                    output_lines.append(f"   🚫 Error: {result['error_message']}")
+
+            output_lines.append("")
+
+        return "\n".join(output_lines)
+
     def _is_valid_url(self, url: str) -> bool:
         """Validate if a URL is properly formatted."""
         try:
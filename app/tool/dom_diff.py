@@ -0,0 +1,55 @@
+"""Diffing of the serialized interactive-element list between browser steps."""
+
+import re
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel, Field
+
+
+_ELEMENT_LINE = re.compile(r"^\s*\*?\[(\d+)\]\*?(.*)$")
+
+
+def parse_elements(elements: str) -> Dict[int, str]:
+    """Map highlight index to element description.
+
+    Parses the output of ``clickable_elements_to_string()``; plain text lines
+    between elements are ignored and "new element" markers are stripped.
+    """
+    parsed = {}
+    for line in elements.splitlines():
+        match = _ELEMENT_LINE.match(line)
+        if match:
+            parsed[int(match.group(1))] = match.group(2).strip()
+    return parsed
+
+
+class ElementDiff(BaseModel):
+    """Interactive elements added, removed or changed between two states."""
+
+    added: List[Tuple[int, str]] = Field(default_factory=list)
+    removed: List[Tuple[int, str]] = Field(default_factory=list)
+    changed: List[Tuple[int, str]] = Field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def to_string(self) -> str:
+        lines = [f"+ [{i}]{element}" for i, element in self.added]
+        lines += [f"~ [{i}]{element}" for i, element in self.changed]
+        lines += [f"- [{i}]{element}" for i, element in self.removed]
+        return "\n".join(lines)
+
+
+def diff_elements(previous: Dict[int, str], current: Dict[int, str]) -> ElementDiff:
+    """Compare two parsed element maps by highlight index."""
+    diff = ElementDiff()
+    for index in sorted(current):
+        if index not in previous:
+            diff.added.append((index, current[index]))
+        elif previous[index] != current[index]:
+            diff.changed.append((index, current[index]))
+    for index in sorted(previous):
+        if index not in current:
+            diff.removed.append((index, previous[index]))
+    return diff
@@ -1,20 +1,21 @@
-from contextlib import AsyncExitStack
-from typing import Dict, List, Optional
-
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.sse import sse_client
-from mcp.client.stdio import stdio_client
-from mcp.types import ListToolsResult, TextContent
+import asyncio
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Tuple
 
 from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
+from app.tool.mcp_pool import MCP_POOL, PooledSession
 from app.tool.tool_collection import ToolCollection
 
 
+# The mcp package is imported on the first connection
+if TYPE_CHECKING:
+    from mcp.types import ListToolsResult
+
+
 class MCPClientTool(BaseTool):
     """Represents a tool proxy that can be called on the MCP server from the client side."""
 
-    session: Optional[ClientSession] = None
+    session: Optional[Any] = None  # PooledSession, shared with other agents
     server_id: str = ""  # Add server identifier
     original_name: str = ""
 
@@ -23,6 +24,8 @@ class MCPClientTool(BaseTool):
         if not self.session:
             return ToolResult(error="Not connected to MCP server")
 
+        from mcp.types import TextContent
+
         try:
             logger.info(f"Executing tool: {self.original_name}")
             result = await self.session.call_tool(self.original_name, kwargs)
@@ -37,78 +40,102 @@ class MCPClientTool(BaseTool):
 class MCPClients(ToolCollection):
     """
     A collection of tools that connects to multiple MCP servers and manages available tools through the Model Context Protocol.
+
+    Sessions come from the process-wide ``MCP_POOL``: a server that another
+    agent is already connected to is not started again, and disconnecting
+    only releases the shared session. The tools follow the servers' tool
+    catalogs, which the sessions update in the background; ``sync_tools``
+    applies their changes.
     """
 
-    sessions: Dict[str, ClientSession] = {}
-    exit_stacks: Dict[str, AsyncExitStack] = {}
     description: str = "MCP client tools for server interaction"
 
     def __init__(self):
         super().__init__()  # Initialize with empty tools list
         self.name = "mcp"  # Keep name for backward compatibility
+        self.sessions: Dict[str, PooledSession] = {}
+        # Catalog version and tool hashes each server's tools were built from
+        self._versions: Dict[str, int] = {}
+        self._hashes: Dict[str, Dict[str, str]] = {}
+
+    async def connect_sse(
+        self, server_url: str, server_id: str = "", timeout: Optional[float] = None
+    ) -> None:
+        """Connect to an MCP server using SSE transport.
+
+        Args:
+            server_url: URL of the server's SSE endpoint.
+            server_id: Identifier of the server; defaults to the URL.
+            timeout: Seconds to wait for the server to connect and list its
+                tools; None waits indefinitely.
+        """
+        from mcp.client.sse import sse_client
 
-    async def connect_sse(self, server_url: str, server_id: str = "") -> None:
-        """Connect to an MCP server using SSE transport."""
         if not server_url:
             raise ValueError("Server URL is required.")
 
         server_id = server_id or server_url
-
-        # Always ensure clean disconnection before new connection
-        if server_id in self.sessions:
-            await self.disconnect(server_id)
-
-        exit_stack = AsyncExitStack()
-        self.exit_stacks[server_id] = exit_stack
-
-        streams_context = sse_client(url=server_url)
-        streams = await exit_stack.enter_async_context(streams_context)
-        session = await exit_stack.enter_async_context(ClientSession(*streams))
-        self.sessions[server_id] = session
-
-        await self._initialize_and_list_tools(server_id)
+        await self._connect(
+            server_id,
+            ("sse", server_url),
+            lambda: sse_client(url=server_url),
+            timeout,
+        )
 
     async def connect_stdio(
-        self, command: str, args: List[str], server_id: str = ""
+        self,
+        command: str,
+        args: List[str],
+        server_id: str = "",
+        timeout: Optional[float] = None,
     ) -> None:
-        """Connect to an MCP server using stdio transport."""
+        """Connect to an MCP server using stdio transport.
+
+        Args:
+            command: Command that starts the server.
+            args: Arguments of the command.
+            server_id: Identifier of the server; defaults to the command.
+            timeout: Seconds to wait for the server to start and list its
+                tools; None waits indefinitely.
+        """
+        from mcp import StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
         if not command:
             raise ValueError("Server command is required.")
 
         server_id = server_id or command
+        server_params = StdioServerParameters(command=command, args=args)
+        await self._connect(
+            server_id,
+            ("stdio", command, tuple(args)),
+            lambda: stdio_client(server_params),
+            timeout,
+        )
 
+    async def _connect(
+        self,
+        server_id: str,
+        key: Hashable,
+        transport: Callable[[], Any],
+        timeout: Optional[float],
+    ) -> None:
         # Always ensure clean disconnection before new connection
         if server_id in self.sessions:
             await self.disconnect(server_id)
 
-        exit_stack = AsyncExitStack()
-        self.exit_stacks[server_id] = exit_stack
-
-        server_params = StdioServerParameters(command=command, args=args)
-        stdio_transport = await exit_stack.enter_async_context(
-            stdio_client(server_params)
+        pooled = await MCP_POOL.acquire(key, transport, timeout)
+        self.sessions[server_id] = pooled
+        self._add_server_tools(server_id, pooled)
+        logger.info(
+            f"Connected to server {server_id} with tools: {list(pooled.catalog.tools)}"
         )
-        read, write = stdio_transport
-        session = await exit_stack.enter_async_context(ClientSession(read, write))
-        self.sessions[server_id] = session
-
-        await self._initialize_and_list_tools(server_id)
-
-    async def _initialize_and_list_tools(self, server_id: str) -> None:
-        """Initialize session and populate tool map."""
-        session = self.sessions.get(server_id)
-        if not session:
-            raise RuntimeError(f"Session not initialized for server {server_id}")
-
-        await session.initialize()
-        response = await session.list_tools()
-
-        # Create proper tool objects for each server tool
-        for tool in response.tools:
-            original_name = tool.name
-            tool_name = f"mcp_{server_id}_{original_name}"
-            tool_name = self._sanitize_tool_name(tool_name)
 
+    def _add_server_tools(self, server_id: str, session: PooledSession) -> None:
+        """Create a tool for each tool in a server's catalog."""
+        catalog = session.catalog
+        for original_name, tool in catalog.tools.items():
+            tool_name = self._server_tool_name(server_id, original_name)
             server_tool = MCPClientTool(
                 name=tool_name,
                 description=tool.description,
@@ -118,12 +145,52 @@ class MCPClients(ToolCollection):
                 original_name=original_name,
             )
             self.tool_map[tool_name] = server_tool
+        self._versions[server_id] = catalog.version
+        self._hashes[server_id] = catalog.hashes
 
         # Update tools tuple
         self.tools = tuple(self.tool_map.values())
-        logger.info(
-            f"Connected to server {server_id} with tools: {[tool.name for tool in response.tools]}"
-        )
+
+    def _remove_server_tools(self, server_id: str) -> None:
+        self.tool_map = {
+            k: v for k, v in self.tool_map.items() if v.server_id != server_id
+        }
+        self.tools = tuple(self.tool_map.values())
+        self._versions.pop(server_id, None)
+        self._hashes.pop(server_id, None)
+
+    def sync_tools(self) -> Tuple[List[str], List[str], List[str]]:
+        """Apply the changes made to the servers' tool catalogs since the
+        tools were last built.
+
+        Only the catalogs are read, so this never waits on a server; servers
+        whose catalog version is unchanged are skipped.
+
+        Returns:
+            Names of the added, removed and changed tools.
+        """
+        added, removed, changed = [], [], []
+        for server_id, session in self.sessions.items():
+            catalog = session.catalog
+            if self._versions.get(server_id) == catalog.version:
+                continue
+            previous, current = self._hashes.get(server_id, {}), catalog.hashes
+            for name, tool_hash in current.items():
+                if name not in previous:
+                    added.append(self._server_tool_name(server_id, name))
+                elif previous[name] != tool_hash:
+                    changed.append(self._server_tool_name(server_id, name))
+            removed += [
+                self._server_tool_name(server_id, name)
+                for name in previous
+                if name not in current
+            ]
+            self._remove_server_tools(server_id)
+            self._add_server_tools(server_id, session)
+        return added, removed, changed
+
+    def _server_tool_name(self, server_id: str, original_name: str) -> str:
+        return self._sanitize_tool_name(f"mcp_{server_id}_{original_name}")
 
     def _sanitize_tool_name(self, name: str) -> str:
         """Sanitize tool name to match MCPClientTool requirements."""
@@ -144,8 +211,10 @@ class MCPClients(ToolCollection):
 
         return sanitized
 
-    async def list_tools(self) -> ListToolsResult:
+    async def list_tools(self) -> "ListToolsResult":
         """List all available tools."""
+        from mcp.types import ListToolsResult
+
         tools_result = ListToolsResult(tools=[])
         for session in self.sessions.values():
             response = await session.list_tools()
@@ -155,40 +224,23 @@ class MCPClients(ToolCollection):
     async def disconnect(self, server_id: str = "") -> None:
         """Disconnect from a specific MCP server or all servers if no server_id provided."""
         if server_id:
-            if server_id in self.sessions:
-                try:
-                    exit_stack = self.exit_stacks.get(server_id)
-
-                    # Close the exit stack which will handle session cleanup
-                    if exit_stack:
-                        try:
-                            await exit_stack.aclose()
-                        except RuntimeError as e:
-                            if "cancel scope" in str(e).lower():
-                                logger.warning(
-                                    f"Cancel scope error during disconnect from {server_id}, continuing with cleanup: {e}"
-                                )
-                            else:
-                                raise
-
-                    # Clean up references
-                    self.sessions.pop(server_id, None)
-                    self.exit_stacks.pop(server_id, None)
-
-                    # Remove tools associated with this server
-                    self.tool_map = {
-                        k: v
-                        for k, v in self.tool_map.items()
-                        if v.server_id != server_id
-                    }
-                    self.tools = tuple(self.tool_map.values())
-                    logger.info(f"Disconnected from MCP server {server_id}")
-                except Exception as e:
-                    logger.error(f"Error disconnecting from server {server_id}: {e}")
+            pooled = self.sessions.pop(server_id, None)
+            if pooled is None:
+                return
+            try:
+                # Other agents may still use the session
+                await MCP_POOL.release(pooled)
+                logger.info(f"Disconnected from MCP server {server_id}")
+            except Exception as e:
+                logger.error(f"Error disconnecting from server {server_id}: {e}")
+            finally:
+                # Remove tools associated with this server
+                self._remove_server_tools(server_id)
         else:
-            # Disconnect from all servers in a deterministic order
-            for sid in sorted(list(self.sessions.keys())):
-                await self.disconnect(sid)
+            # Disconnect from all servers at once
+            await asyncio.gather(
+                *(self.disconnect(sid) for sid in sorted(self.sessions))
+            )
             self.tool_map = {}
             self.tools = tuple()
             logger.info("Disconnected from all MCP servers")
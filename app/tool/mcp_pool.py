@@ -0,0 +1,471 @@
+"""Process-wide pool of MCP sessions shared by all agents."""
+
+import asyncio
+import hashlib
+import json
+from contextlib import AsyncExitStack
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+)
+
+from app.config import config
+from app.logger import logger
+
+
+if TYPE_CHECKING:
+    from mcp import ClientSession
+    from mcp.types import CallToolResult, InitializeResult, ListToolsResult, Tool
+
+
+# Seconds a server gets to exit after its session is closed before it is
+# killed
+_CLOSE_TIMEOUT = 5.0
+# Seconds a health check waits for a ping response
+_PING_TIMEOUT = 5.0
+
+
+async def _stop(task: asyncio.Task, grace: float) -> None:
+    """Wait ``grace`` seconds for a connection task to end, then cancel it.
+
+    Closing a stdio transport waits for the server process to exit, and only
+    kills it when cancelled again, so the task is cancelled until it ends.
+    """
+    await asyncio.wait({task}, timeout=grace)
+    while not task.done():
+        task.cancel()
+        await asyncio.wait({task}, timeout=0.1)
+
+
+class MCPConnectionLost(ConnectionError):
+    """The connection to an MCP server ended while a request was in flight."""
+
+
+def _tool_hash(tool: "Tool") -> str:
+    """Digest of the parts of a tool definition that agents see."""
+    definition = {"description": tool.description, "inputSchema": tool.inputSchema}
+    encoded = json.dumps(definition, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _announces_tool_changes(result: "InitializeResult") -> bool:
+    tools = result.capabilities.tools
+    return bool(tools and tools.listChanged)
+
+
+class ToolCatalog:
+    """The tools of one MCP server, with a hash of each definition.
+
+    Attributes:
+        tools: Tools by name.
+        hashes: Hash of each tool's description and input schema, by name.
+        version: Incremented whenever the tools change, so users of the
+            catalog only rebuild their tools when it differs from the version
+            they last saw.
+    """
+
+    def __init__(self):
+        self.tools: Dict[str, "Tool"] = {}
+        self.hashes: Dict[str, str] = {}
+        self.version = 0
+
+    def update(self, tools: List["Tool"]) -> bool:
+        """Replace the tools; returns whether any tool was added, removed or
+        changed."""
+        hashes = {tool.name: _tool_hash(tool) for tool in tools}
+        if hashes == self.hashes:
+            return False
+        self.tools = {tool.name: tool for tool in tools}
+        self.hashes = hashes
+        self.version += 1
+        return True
+
+
+class PooledSession:
+    """An initialized MCP session, shared by every client of one server.
+
+    The session is owned by a task of its own that opens the transport and
+    session and later closes them, so it can be used and closed from any
+    task. Requests are limited to ``max_in_flight`` at a time; a session
+    whose server has gone away is reconnected before the next request.
+
+    The server's tools are kept in ``catalog``, which is listed again in the
+    background when the server sends a tools list-changed notification, or
+    every ``tool_refresh_interval`` seconds for servers that do not announce
+    changes. Reading the catalog never waits on the server.
+
+    Attributes:
+        key: Identity of the server (transport and address or command).
+        session: The MCP client session, while connected.
+        catalog: The server's tools.
+        refs: Number of clients using the session.
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        transport: Callable[[], Any],
+        max_in_flight: int = 8,
+        health_check_interval: float = 30.0,
+        tool_refresh_interval: float = 60.0,
+    ):
+        self.key = key
+        self._transport = transport
+        self.health_check_interval = health_check_interval
+        self.tool_refresh_interval = tool_refresh_interval
+        self.session: Optional["ClientSession"] = None
+        self.catalog = ToolCatalog()
+        self.refs = 0
+        self.last_used = 0.0
+        self._last_checked = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_again = False
+
+    @property
+    def connected(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def ensure_connected(self) -> None:
+        """Connect, or reconnect if the server has gone away or stopped
+        answering pings."""
+        async with self._lock:
+            if self.connected and not await self._healthy():
+                logger.warning(f"MCP server {self.key} is unresponsive, reconnecting")
+                await self._close()
+            if not self.connected:
+                await self._connect()
+
+    async def _healthy(self) -> bool:
+        now = asyncio.get_running_loop().time()
+        if now - self._last_checked < self.health_check_interval:
+            return True
+        try:
+            await self._race(self.session.send_ping(), _PING_TIMEOUT)
+        except Exception:
+            return False
+        self._last_checked = now
+        return True
+
+    async def _race(self, request: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Await a request, failing fast if the connection ends meanwhile."""
+        task = self._task
+        call = asyncio.ensure_future(request)
+        done, _ = await asyncio.wait(
+            {call, task}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        if call in done:
+            return call.result()
+        await _stop(call, grace=0)
+        if task in done:
+            raise MCPConnectionLost(f"Connection to MCP server {self.key} lost")
+        raise TimeoutError(f"MCP server {self.key} did not respond in {timeout}s")
+
+    async def _connect(self) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        closing = asyncio.Event()
+        task = asyncio.create_task(self._serve(ready, closing))
+        try:
+            self.session = await ready
+        except BaseException:
+            # A server that failed to connect is not asked to exit
+            await _stop(task, grace=0)
+            raise
+        self._task, self._closing = task, closing
+        self._last_checked = asyncio.get_running_loop().time()
+
+    async def _serve(self, ready: asyncio.Future, closing: asyncio.Event) -> None:
+        """Open a session, report it through ``ready`` and keep it open until
+        ``closing`` is set."""
+        from mcp import ClientSession
+
+        try:
+            async with AsyncExitStack() as exit_stack:
+                streams = await exit_stack.enter_async_context(self._transport())
+                session = await exit_stack.enter_async_context(ClientSession(*streams))
+                result = await session.initialize()
+                response = await session.list_tools()
+                if ready.done():  # Timed out meanwhile
+                    return
+                self.catalog.update(response.tools)
+                ready.set_result(session)
+
+                watchers = [asyncio.ensure_future(self._read_messages(session))]
+                if (
+                    not _announces_tool_changes(result)
+                    and self.tool_refresh_interval > 0
+                ):
+                    watchers.append(asyncio.ensure_future(self._poll_tools()))
+                try:
+                    await closing.wait()
+                finally:
+                    for watcher in watchers:
+                        watcher.cancel()
+        except Exception as e:
+            if ready.done():
+                raise
+            # Reported to the caller waiting on ready
+            ready.set_exception(e)
+        finally:
+            ready.cancel()  # No-op once a result is set
+
+    async def _read_messages(self, session: "ClientSession") -> None:
+        """Handle the notifications the server sends.
+
+        The session delivers them through an unbuffered stream, so they must
+        be read for the session to keep receiving responses.
+        """
+        from mcp.types import ServerNotification, ToolListChangedNotification
+
+        async for message in session.incoming_messages:
+            if isinstance(message, Exception):
+                logger.warning(f"Invalid message from MCP server {self.key}: {message}")
+            elif isinstance(message, ServerNotification) and isinstance(
+                message.root, ToolListChangedNotification
+            ):
+                self.refresh_tools()
+
+    async def _poll_tools(self) -> None:
+        while True:
+            await asyncio.sleep(self.tool_refresh_interval)
+            self.refresh_tools()
+
+    def refresh_tools(self) -> None:
+        """List the server's tools again in the background.
+
+        Requests made while a refresh is running are merged into one more
+        refresh once it ends.
+        """
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_again = True
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_tools())
+
+    async def _refresh_tools(self) -> None:
+        # Uses the open session only: a closed session is not reopened for it
+        self._refresh_again = True
+        while self._refresh_again and self.connected:
+            self._refresh_again = False
+            try:
+                async with self._in_flight:
+                    response = await self._race(self.session.list_tools())
+            except Exception as e:
+                logger.warning(f"Failed to refresh tools of MCP server {self.key}: {e}")
+                return
+            self._update_catalog(response)
+
+    def _update_catalog(self, response: "ListToolsResult") -> None:
+        if self.catalog.update(response.tools):
+            logger.info(f"Tools of MCP server {self.key} changed")
+
+    async def _request(self, request: Callable[["ClientSession"], Awaitable]) -> Any:
+        await self.ensure_connected()
+        async with self._in_flight:
+            self.last_used = asyncio.get_running_loop().time()
+            # Not retried if the connection is lost: the server may have acted
+            # on the request
+            return await self._race(request(self.session))
+
+    async def call_tool(self, name: str, arguments: dict) -> "CallToolResult":
+        return await self._request(lambda session: session.call_tool(name, arguments))
+
+    async def list_tools(self) -> "ListToolsResult":
+        """List the server's tools, updating ``catalog``."""
+        response = await self._request(lambda session: session.list_tools())
+        self._update_catalog(response)
+        return response
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._close()
+
+    async def _close(self) -> None:
+        task, closing = self._task, self._closing
+        self._task = self._closing = self.session = None
+        if task is None:
+            return
+        refresh, self._refresh_task = self._refresh_task, None
+        if refresh is not None:
+            await _stop(refresh, grace=0)
+        # The owning task closes the session and transport
+        closing.set()
+        await _stop(task, grace=_CLOSE_TIMEOUT)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Error closing MCP server {self.key}: {task.exception()}")
+
+
+class MCPSessionPool:
+    """MCP sessions shared across agents.
+
+    Agents connecting to a server that another agent already uses attach to
+    its initialized session instead of starting the server again. Sessions
+    are reference counted; one that no agent uses stays open for
+    ``idle_timeout`` seconds, so the next agent (e.g. the next A2A request)
+    reuses it.
+
+    Attributes:
+        max_in_flight: Requests sent to one session at the same time.
+        idle_timeout: Seconds an unused session is kept open.
+        health_check_interval: Seconds after which a session is pinged
+            before it is used.
+        tool_refresh_interval: Seconds between tool listings of servers that
+            do not send list-changed notifications; 0 disables them.
+        cleanup_interval: Seconds between idle checks.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        tool_refresh_interval: float = 60.0,
+        cleanup_interval: float = 60.0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.tool_refresh_interval = tool_refresh_interval
+        self.cleanup_interval = cleanup_interval
+
+        self._sessions: Dict[Hashable, PooledSession] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls) -> "MCPSessionPool":
+        mcp_settings = config.mcp_config
+        if mcp_settings is None:
+            return cls()
+        return cls(
+            max_in_flight=mcp_settings.max_in_flight,
+            idle_timeout=mcp_settings.idle_timeout,
+            health_check_interval=mcp_settings.health_check_interval,
+            tool_refresh_interval=mcp_settings.tool_refresh_interval,
+        )
+
+    def _bind_loop(self) -> None:
+        """Reset loop-bound state when the pool is used from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sessions = {}
+            self._cleanup_task = None
+
+    async def acquire(
+        self,
+        key: Hashable,
+        transport: Callable[[], Any],
+        timeout: Optional[float] = None,
+    ) -> PooledSession:
+        """Get the shared session of a server, connecting if needed.
+
+        Args:
+            key: Identity of the server.
+            transport: Opens the transport (an async context manager giving
+                the read and write streams) when a connection is needed.
+            timeout: Seconds to wait for the server to connect.
+
+        Raises:
+            TimeoutError: If the server does not connect within ``timeout``.
+        """
+        self._bind_loop()
+        pooled = self._sessions.get(key)
+        if pooled is None:
+            pooled = PooledSession(
+                key,
+                transport,
+                self.max_in_flight,
+                self.health_check_interval,
+                self.tool_refresh_interval,
+            )
+            self._sessions[key] = pooled
+        pooled.refs += 1
+        try:
+            await asyncio.wait_for(pooled.ensure_connected(), timeout)
+        except BaseException as e:
+            pooled.refs -= 1
+            if not pooled.refs and not pooled.connected:
+                self._sessions.pop(key, None)
+            if isinstance(e, asyncio.TimeoutError):
+                raise TimeoutError(
+                    f"MCP server {key} did not connect within {timeout}s"
+                ) from None
+            raise
+        pooled.last_used = asyncio.get_running_loop().time()
+        if self._cleanup_task is None:
+            self._start_cleanup_task()
+        return pooled
+
+    async def release(self, pooled: PooledSession) -> None:
+        """Stop using a session; it is closed once idle for ``idle_timeout``."""
+        pooled.refs = max(pooled.refs - 1, 0)
+        pooled.last_used = asyncio.get_running_loop().time()
+        if not pooled.refs and self.idle_timeout <= 0:
+            await self._close_session(pooled)
+
+    async def _close_session(self, pooled: PooledSession) -> None:
+        if self._sessions.get(pooled.key) is pooled:
+            del self._sessions[pooled.key]
+        await pooled.close()
+
+    def _start_cleanup_task(self) -> None:
+        """Starts automatic closing of idle sessions."""
+
+        async def cleanup_loop():
+            try:
+                while True:
+                    await asyncio.sleep(self.cleanup_interval)
+                    try:
+                        await self._cleanup_idle()
+                    except Exception as e:
+                        logger.error(f"Error in MCP pool cleanup loop: {e}")
+            except asyncio.CancelledError:
+                # Event loop is shutting down; do not leave servers running
+                await self._close_all()
+                raise
+
+        self._cleanup_task = asyncio.create_task(cleanup_loop())
+
+    async def _cleanup_idle(self) -> None:
+        now = asyncio.get_running_loop().time()
+        for pooled in list(self._sessions.values()):
+            if not pooled.refs and now - pooled.last_used > self.idle_timeout:
+                logger.info(f"Closing idle MCP session {pooled.key}")
+                await self._close_session(pooled)
+
+    async def _close_all(self) -> None:
+        await asyncio.gather(
+            *(self._close_session(pooled) for pooled in list(self._sessions.values()))
+        )
+
+    async def close(self) -> None:
+        """Closes every session."""
+        if self._loop is None:
+            return
+        task, self._cleanup_task = self._cleanup_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self._close_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "connected": sum(pooled.connected for pooled in self._sessions.values()),
+            "refs": sum(pooled.refs for pooled in self._sessions.values()),
+        }
+
+
+MCP_POOL = MCPSessionPool.from_config()
@@ -0,0 +1,435 @@
+"""Content-addressed page store shared by the web fetching tools.
+
+Pages are indexed by normalized URL. Page bodies are stored once per content
+hash, so identical pages reached through different URLs share storage. Each
+entry keeps the raw HTML, any extracted text/markdown, and the HTTP validators
+(ETag / Last-Modified) needed for conditional revalidation.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pydantic import BaseModel, Field
+
+from app.config import config
+from app.logger import logger
+
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so equivalent spellings share one cache entry.
+
+    Lowercases scheme and host, drops default ports and fragments, and sorts
+    query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def content_hash(content: str) -> str:
+    """Return the content address for a page body."""
+    return hashlib.sha256(content.encode("utf-8", errors="replace")).hexdigest()
+
+
+class CachedPage(BaseModel):
+    """A cached page with its derived representations and HTTP validators."""
+
+    url: str = Field(description="Normalized URL of the page")
+    content_hash: str = Field(description="SHA-256 of the raw HTML")
+    html: Optional[str] = Field(default=None, description="Raw HTML of the page")
+    text: Optional[str] = Field(default=None, description="Extracted plain text")
+    markdown: Optional[str] = Field(default=None, description="Extracted markdown")
+    etag: Optional[str] = Field(default=None, description="ETag response header")
+    last_modified: Optional[str] = Field(
+        default=None, description="Last-Modified response header"
+    )
+    fetched_at: float = Field(
+        default_factory=time.time, description="Last fetch or revalidation time"
+    )
+
+    @property
+    def size(self) -> int:
+        return sum(len(value or "") for value in (self.html, self.text, self.markdown))
+
+
+class PageStore:
+    """Two-level (memory + disk) LRU page store.
+
+    The ``*_async`` methods serve memory hits directly and run disk reads and
+    writes in a worker thread, so tools should use them on the event loop.
+
+    Attributes:
+        cache_dir: Directory holding the on-disk index and page bodies.
+        max_memory_bytes: Budget for page content kept in memory.
+        max_disk_bytes: Budget for page bodies kept on disk.
+        fresh_seconds: Age below which a page is served without revalidation.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        fresh_seconds: int = 600,
+        enabled: bool = True,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.fresh_seconds = fresh_seconds
+        self.enabled = enabled
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._memory_bytes = 0
+        # url -> content hash of the on-disk body, in LRU order
+        self._disk_index: "OrderedDict[str, str]" = OrderedDict()
+        # content hash -> size of the on-disk body, and number of URLs using it
+        self._disk_sizes: Dict[str, int] = {}
+        self._disk_refs: Dict[str, int] = {}
+        self._disk_bytes = 0
+        self._disk_loaded = False
+
+    @classmethod
+    def from_config(cls) -> "PageStore":
+        settings = config.page_cache_config
+        if settings is None:
+            return cls(cache_dir=config.workspace_root / ".page_cache")
+        return cls(
+            cache_dir=Path(settings.cache_dir)
+            if settings.cache_dir
+            else config.workspace_root / ".page_cache",
+            max_memory_bytes=settings.max_memory_bytes,
+            max_disk_bytes=settings.max_disk_bytes,
+            fresh_seconds=settings.fresh_seconds,
+            enabled=settings.enabled,
+        )
+
+    # Public API
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page for a URL, or None."""
+        if not self.enabled:
+            return None
+        key = normalize_url(url)
+        with self._lock:
+            page = self._memory_hit(key)
+            if page is not None:
+                return page
+            page = self._load_from_disk(key)
+            if page is not None:
+                self._remember(page)
+            return page
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """Whether a cached page can be served without revalidation."""
+        return time.time() - page.fetched_at < self.fresh_seconds
+
+    def get_fresh(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page only if it does not need revalidation."""
+        page = self.get(url)
+        return page if page is not None and self.is_fresh(page) else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a cached URL."""
+        return self.validator_headers(self.get(url))
+
+    @staticmethod
+    def validator_headers(page: Optional[CachedPage]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a cached page."""
+        headers = {}
+        if page is not None:
+            if page.etag:
+                headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def revalidated(self, url: str) -> Optional[CachedPage]:
+        """Mark a cached page as confirmed unchanged (e.g. after HTTP 304)."""
+        page = self.get(url)
+        if page is None:
+            return None
+        with self._lock:
+            page.fetched_at = time.time()
+            self._write_index(page)
+        return page
+
+    def put(
+        self,
+        url: str,
+        html: Optional[str] = None,
+        text: Optional[str] = None,
+        markdown: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Optional[CachedPage]:
+        """Store a page.
+
+        Derived text/markdown and HTTP validators already cached for the same
+        content hash are kept when the caller does not provide them.
+        """
+        if not self.enabled:
+            return None
+        key = normalize_url(url)
+        digest = content_hash(html if html is not None else (markdown or text or ""))
+        with self._lock:
+            previous = self.get(url)
+            if previous is not None and previous.content_hash == digest:
+                text = text if text is not None else previous.text
+                markdown = markdown if markdown is not None else previous.markdown
+                html = html if html is not None else previous.html
+                etag = etag if etag is not None else previous.etag
+                if last_modified is None:
+                    last_modified = previous.last_modified
+            page = CachedPage(
+                url=key,
+                content_hash=digest,
+                html=html,
+                text=text,
+                markdown=markdown,
+                etag=etag,
+                last_modified=last_modified,
+            )
+            self._remember(page)
+            self._persist(page)
+        return page
+
+    async def get_async(self, url: str) -> Optional[CachedPage]:
+        """Like :meth:`get`, reading from disk in a worker thread."""
+        if not self.enabled:
+            return None
+        # Never wait on the event loop for a worker thread holding the lock
+        if self._lock.acquire(blocking=False):
+            try:
+                page = self._memory_hit(normalize_url(url))
+            finally:
+                self._lock.release()
+            if page is not None:
+                return page
+        return await asyncio.to_thread(self.get, url)
+
+    async def get_fresh_async(self, url: str) -> Optional[CachedPage]:
+        """Like :meth:`get_fresh`, reading from disk in a worker thread."""
+        page = await self.get_async(url)
+        return page if page is not None and self.is_fresh(page) else None
+
+    async def revalidated_async(self, url: str) -> Optional[CachedPage]:
+        """Like :meth:`revalidated`, in a worker thread."""
+        return await asyncio.to_thread(self.revalidated, url)
+
+    async def put_async(
+        self,
+        url: str,
+        html: Optional[str] = None,
+        text: Optional[str] = None,
+        markdown: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Optional[CachedPage]:
+        """Like :meth:`put`, writing to disk in a worker thread."""
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(
+            self.put, url, html, text, markdown, etag, last_modified
+        )
+
+    def page_versions(self) -> Dict[str, str]:
+        """The content hash of every page in the store, without reading bodies."""
+        if not self.enabled:
+            return {}
+        with self._lock:
+            self._ensure_disk_loaded()
+            versions = dict(self._disk_index)
+            versions.update(
+                (key, page.content_hash) for key, page in self._memory.items()
+            )
+        return versions
+
+    def iter_pages(self, urls: Optional[Iterable[str]] = None) -> Iterator[CachedPage]:
+        """Iterate over pages in the store, most recently used last.
+
+        Args:
+            urls: Only these pages, in the given order; defaults to all pages.
+        """
+        with self._lock:
+            self._ensure_disk_loaded()
+            if urls is None:
+                keys = list(dict.fromkeys([*self._disk_index, *self._memory]))
+            else:
+                keys = [normalize_url(url) for url in urls]
+        for key in keys:
+            with self._lock:
+                page = self._memory.get(key) or self._load_from_disk(key)
+            if page is not None:
+                yield page
+
+    def clear(self) -> None:
+        """Drop all cached pages from memory and disk."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._ensure_disk_loaded()
+            for key in list(self._disk_index):
+                self._evict_from_disk(key)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    # Memory tier
+
+    def _memory_hit(self, key: str) -> Optional[CachedPage]:
+        page = self._memory.get(key)
+        if page is not None:
+            self._memory.move_to_end(key)
+            # Pages used from memory are recent on disk too
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+        return page
+
+    def _remember(self, page: CachedPage) -> None:
+        old = self._memory.pop(page.url, None)
+        if old is not None:
+            self._memory_bytes -= old.size
+        if page.size > self.max_memory_bytes:
+            return
+        self._memory[page.url] = page
+        self._memory_bytes += page.size
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+
+    # Disk tier
+
+    def _index_path(self, key: str) -> Path:
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / "index" / f"{name}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.cache_dir / "objects" / digest[:2] / f"{digest}.json"
+
+    def _ensure_disk_loaded(self) -> None:
+        if self._disk_loaded or self.cache_dir is None:
+            return
+        self._disk_loaded = True
+        index_dir = self.cache_dir / "index"
+        if not index_dir.exists():
+            return
+        entries = []
+        for path in index_dir.glob("*.json"):
+            try:
+                meta = json.loads(path.read_text(encoding="utf-8"))
+                entries.append(
+                    (path.stat().st_mtime, meta["url"], meta["content_hash"])
+                )
+            except Exception as e:
+                logger.warning(f"Dropping unreadable page index {path}: {e}")
+                path.unlink(missing_ok=True)
+        for _, key, digest in sorted(entries):
+            object_path = self._object_path(digest)
+            if object_path.exists():
+                if digest not in self._disk_sizes:
+                    self._set_disk_size(digest, object_path.stat().st_size)
+                self._index_on_disk(key, digest)
+
+    def _load_from_disk(self, key: str) -> Optional[CachedPage]:
+        if self.cache_dir is None:
+            return None
+        self._ensure_disk_loaded()
+        if key not in self._disk_index:
+            return None
+        try:
+            meta = json.loads(self._index_path(key).read_text(encoding="utf-8"))
+            body = json.loads(
+                self._object_path(meta["content_hash"]).read_text(encoding="utf-8")
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read cached page {key}: {e}")
+            self._evict_from_disk(key)
+            return None
+        self._disk_index.move_to_end(key)
+        return CachedPage(**meta, **body)
+
+    def _write_index(self, page: CachedPage) -> None:
+        if self.cache_dir is None:
+            return
+        path = self._index_path(page.url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = page.model_dump(exclude={"html", "text", "markdown"})
+        path.write_text(json.dumps(meta), encoding="utf-8")
+
+    def _persist(self, page: CachedPage) -> None:
+        if self.cache_dir is None:
+            return
+        self._ensure_disk_loaded()
+        try:
+            object_path = self._object_path(page.content_hash)
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            body = json.dumps(
+                {"html": page.html, "text": page.text, "markdown": page.markdown}
+            )
+            object_path.write_text(body, encoding="utf-8")
+            self._write_index(page)
+        except OSError as e:
+            logger.warning(f"Failed to persist cached page {page.url}: {e}")
+            return
+
+        self._set_disk_size(page.content_hash, object_path.stat().st_size)
+        old_digest = self._unindex_on_disk(page.url)
+        self._index_on_disk(page.url, page.content_hash)
+        if old_digest and old_digest != page.content_hash:
+            self._drop_object_if_unused(old_digest)
+
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk_index) > 1:
+            oldest = next(iter(self._disk_index))
+            self._evict_from_disk(oldest)
+
+    def _set_disk_size(self, digest: str, size: int) -> None:
+        self._disk_bytes += size - self._disk_sizes.get(digest, 0)
+        self._disk_sizes[digest] = size
+
+    def _index_on_disk(self, key: str, digest: str) -> None:
+        self._disk_index[key] = digest
+        self._disk_refs[digest] = self._disk_refs.get(digest, 0) + 1
+
+    def _unindex_on_disk(self, key: str) -> Optional[str]:
+        digest = self._disk_index.pop(key, None)
+        if digest is not None:
+            self._disk_refs[digest] -= 1
+        return digest
+
+    def _evict_from_disk(self, key: str) -> None:
+        digest = self._unindex_on_disk(key)
+        self._index_path(key).unlink(missing_ok=True)
+        if digest:
+            self._drop_object_if_unused(digest)
+
+    def _drop_object_if_unused(self, digest: str) -> None:
+        if self._disk_refs.get(digest, 0) > 0:
+            return
+        self._disk_refs.pop(digest, None)
+        self._disk_bytes -= self._disk_sizes.pop(digest, 0)
+        self._object_path(digest).unlink(missing_ok=True)
+
+
+page_store = PageStore.from_config()
@@ -1,6 +1,9 @@
 # tool/planning.py
+import asyncio
 from typing import Dict, List, Literal, Optional
 
+from pydantic import PrivateAttr
+
 from app.exceptions import ToolError
 from app.tool.base import BaseTool, ToolResult
 
@@ -48,6 +51,11 @@ class PlanningTool(BaseTool):
                 "type": "array",
                 "items": {"type": "string"},
             },
+            "step_dependencies": {
+                "description": "For each step, the indices of earlier steps it depends on. Steps whose dependencies are all completed can run in parallel. Optional for create and update commands; if omitted, each step depends on the previous one.",
+                "type": "array",
+                "items": {"type": "array", "items": {"type": "integer"}},
+            },
             "step_index": {
                 "description": "Index of the step to update (0-based). Required for mark_step command.",
                 "type": "integer",
@@ -68,6 +76,7 @@ class PlanningTool(BaseTool):
 
     plans: dict = {}  # Dictionary to store plans by plan_id
     _current_plan_id: Optional[str] = None  # Track the current active plan
+    _lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
 
     async def execute(
         self,
@@ -78,6 +87,7 @@ class PlanningTool(BaseTool):
         plan_id: Optional[str] = None,
         title: Optional[str] = None,
         steps: Optional[List[str]] = None,
+        step_dependencies: Optional[List[List[int]]] = None,
         step_index: Optional[int] = None,
         step_status: Optional[
             Literal["not_started", "in_progress", "completed", "blocked"]
@@ -93,15 +103,40 @@ class PlanningTool(BaseTool):
         - plan_id: Unique identifier for the plan
         - title: Title for the plan (used with create command)
         - steps: List of steps for the plan (used with create command)
+        - step_dependencies: Prerequisite step indices for each step (used with create and update commands)
         - step_index: Index of the step to update (used with mark_step command)
         - step_status: Status to set for a step (used with mark_step command)
         - step_notes: Additional notes for a step (used with mark_step command)
         """
+        # Serialize access so concurrently executing plan steps can record
+        # their status safely
+        async with self._lock:
+            return self._dispatch(
+                command,
+                plan_id,
+                title,
+                steps,
+                step_dependencies,
+                step_index,
+                step_status,
+                step_notes,
+            )
 
+    def _dispatch(
+        self,
+        command: str,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]],
+        step_index: Optional[int],
+        step_status: Optional[str],
+        step_notes: Optional[str],
+    ) -> ToolResult:
         if command == "create":
-            return self._create_plan(plan_id, title, steps)
+            return self._create_plan(plan_id, title, steps, step_dependencies)
         elif command == "update":
-            return self._update_plan(plan_id, title, steps)
+            return self._update_plan(plan_id, title, steps, step_dependencies)
         elif command == "list":
             return self._list_plans()
         elif command == "get":
@@ -117,8 +152,50 @@ class PlanningTool(BaseTool):
                 f"Unrecognized command: {command}. Allowed commands are: create, update, list, get, set_active, mark_step, delete"
             )
 
+    @staticmethod
+    def _validate_dependencies(
+        steps: List[str], step_dependencies: Optional[List[List[int]]]
+    ) -> List[List[int]]:
+        """Validate dependency edges; default to a sequential chain."""
+        if step_dependencies is None:
+            return [[i - 1] if i > 0 else [] for i in range(len(steps))]
+
+        if len(step_dependencies) != len(steps):
+            raise ToolError(
+                "Parameter `step_dependencies` must have one entry per step"
+            )
+        for i, dependencies in enumerate(step_dependencies):
+            for dependency in dependencies:
+                # Only earlier steps are allowed, which also rules out cycles
+                if not isinstance(dependency, int) or not 0 <= dependency < i:
+                    raise ToolError(
+                        f"Invalid dependency {dependency} for step {i}: "
+                        "steps can only depend on earlier steps"
+                    )
+        return [sorted(set(dependencies)) for dependencies in step_dependencies]
+
+    def get_ready_steps(self, plan_id: str) -> List[int]:
+        """Indices of steps that are not completed and whose dependencies are."""
+        if plan_id not in self.plans:
+            raise ToolError(f"No plan found with ID: {plan_id}")
+        plan = self.plans[plan_id]
+        statuses = plan["step_statuses"]
+        dependencies = plan.get("step_dependencies") or self._validate_dependencies(
+            plan["steps"], None
+        )
+        return [
+            i
+            for i, status in enumerate(statuses)
+            if status in ("not_started", "in_progress")
+            and all(statuses[d] == "completed" for d in dependencies[i])
+        ]
+
     def _create_plan(
-        self, plan_id: Optional[str], title: Optional[str], steps: Optional[List[str]]
+        self,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]] = None,
     ) -> ToolResult:
         """Create a new plan with the given ID, title, and steps."""
         if not plan_id:
@@ -141,6 +218,8 @@ class PlanningTool(BaseTool):
                 "Parameter `steps` must be a non-empty list of strings for command: create"
             )
 
+        dependencies = self._validate_dependencies(steps, step_dependencies)
+
         # Create a new plan with initialized step statuses
         plan = {
             "plan_id": plan_id,
@@ -148,6 +227,7 @@ class PlanningTool(BaseTool):
             "steps": steps,
             "step_statuses": ["not_started"] * len(steps),
             "step_notes": [""] * len(steps),
+            "step_dependencies": dependencies,
         }
 
         self.plans[plan_id] = plan
@@ -158,7 +238,11 @@ class PlanningTool(BaseTool):
         )
 
     def _update_plan(
-        self, plan_id: Optional[str], title: Optional[str], steps: Optional[List[str]]
+        self,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]] = None,
     ) -> ToolResult:
         """Update an existing plan with new title or steps."""
         if not plan_id:
@@ -201,6 +285,13 @@ class PlanningTool(BaseTool):
             plan["steps"] = steps
             plan["step_statuses"] = new_statuses
             plan["step_notes"] = new_notes
+            plan["step_dependencies"] = self._validate_dependencies(
+                steps, step_dependencies
+            )
+        elif step_dependencies is not None:
+            plan["step_dependencies"] = self._validate_dependencies(
+                plan["steps"], step_dependencies
+            )
 
         return ToolResult(
             output=f"Plan updated successfully: {plan_id}\n\n{self._format_plan(plan)}"
@@ -345,6 +436,8 @@ class PlanningTool(BaseTool):
         output += f"Status: {completed} completed, {in_progress} in progress, {blocked} blocked, {not_started} not started\n\n"
         output += "Steps:\n"
 
+        dependencies = plan.get("step_dependencies") or [[]] * total_steps
+
         # Add each step with its status and notes
         for i, (step, status, notes) in enumerate(
             zip(plan["steps"], plan["step_statuses"], plan["step_notes"])
@@ -356,7 +449,11 @@ class PlanningTool(BaseTool):
                 "blocked": "[!]",
             }.get(status, "[ ]")
 
-            output += f"{i}. {status_symbol} {step}\n"
+            output += f"{i}. {status_symbol} {step}"
+            # Only call out dependencies that differ from plain sequencing
+            if dependencies[i] and dependencies[i] != [i - 1]:
+                output += f" (after {', '.join(map(str, dependencies[i]))})"
+            output += "\n"
             if notes:
                 output += f"   Notes: {notes}\n"
 
@@ -0,0 +1,144 @@
+"""Request interception that keeps browser navigation to the resources it needs."""
+
+from typing import TYPE_CHECKING, Dict, Optional
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel, Field
+
+from app.config import ResourcePolicySettings
+from app.logger import logger
+
+
+if TYPE_CHECKING:
+    from browser_use.browser.context import BrowserContext
+
+
+# URLs whose declared response size is remembered
+_SIZE_CACHE_ENTRIES = 1024
+# Resource types whose size is checked against max_response_bytes; other
+# subresources are small or needed to render the page
+SIZE_CHECKED_TYPES = frozenset({"image", "media", "font"})
+
+
+class ResourceStats(BaseModel):
+    """Counters for requests handled by a ResourcePolicy."""
+
+    allowed_requests: int = 0
+    blocked_requests: int = 0
+    blocked_by_reason: Dict[str, int] = Field(default_factory=dict)
+    oversized_bytes: int = 0
+
+    def since(self, earlier: "ResourceStats") -> "ResourceStats":
+        """Return the difference between these counters and an earlier copy."""
+        return ResourceStats(
+            allowed_requests=self.allowed_requests - earlier.allowed_requests,
+            blocked_requests=self.blocked_requests - earlier.blocked_requests,
+            blocked_by_reason={
+                reason: count - earlier.blocked_by_reason.get(reason, 0)
+                for reason, count in self.blocked_by_reason.items()
+                if count > earlier.blocked_by_reason.get(reason, 0)
+            },
+            oversized_bytes=self.oversized_bytes - earlier.oversized_bytes,
+        )
+
+    def summary(self) -> str:
+        if not self.blocked_requests:
+            return f"{self.allowed_requests} requests loaded, none blocked"
+        reasons = ", ".join(
+            f"{reason}: {count}" for reason, count in self.blocked_by_reason.items()
+        )
+        text = (
+            f"{self.allowed_requests} requests loaded, "
+            f"{self.blocked_requests} blocked ({reasons})"
+        )
+        if self.oversized_bytes:
+            text += (
+                f", {self.oversized_bytes / 1024:.0f} KB of oversized responses "
+                "not downloaded"
+            )
+        return text
+
+
+class ResourcePolicy:
+    """Blocks requests by resource type, domain and response size.
+
+    Attach it to a browser context with :meth:`attach`; every request in that
+    context is then routed through :meth:`handle_route`. With
+    ``max_response_bytes`` set, image, media and font sizes are taken from the
+    Content-Length of a HEAD request, so an oversized response is never
+    downloaded. Other requests are let through without the extra round trip.
+    """
+
+    def __init__(self, settings: ResourcePolicySettings):
+        self.settings = settings
+        self.block_types = {t.lower() for t in settings.block_resource_types}
+        self.block_domains = tuple(
+            d.lower().lstrip(".") for d in settings.block_domains
+        )
+        self.stats = ResourceStats()
+        self._sizes: Dict[str, Optional[int]] = {}
+
+    def block_reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Return why a request should be blocked, or None to let it through."""
+        if resource_type in self.block_types:
+            return resource_type
+        host = (urlsplit(url).hostname or "").lower()
+        for domain in self.block_domains:
+            if host == domain or host.endswith("." + domain):
+                return "blocked domain"
+        return None
+
+    def snapshot(self) -> ResourceStats:
+        return self.stats.model_copy(deep=True)
+
+    def _block(self, reason: str) -> None:
+        self.stats.blocked_requests += 1
+        self.stats.blocked_by_reason[reason] = (
+            self.stats.blocked_by_reason.get(reason, 0) + 1
+        )
+
+    async def attach(self, context: "BrowserContext") -> None:
+        """Route every request of a browser_use context through this policy."""
+        session = await context.get_session()
+        await session.context.route("**/*", self.handle_route)
+
+    async def handle_route(self, route) -> None:
+        request = route.request
+        reason = self.block_reason(request.resource_type, request.url)
+        if reason is not None:
+            self._block(reason)
+            await route.abort("blockedbyclient")
+            return
+
+        max_bytes = self.settings.max_response_bytes
+        if not max_bytes or request.resource_type not in SIZE_CHECKED_TYPES:
+            self.stats.allowed_requests += 1
+            await route.continue_()
+            return
+
+        size = await self._declared_size(route)
+        if size is not None and size > max_bytes:
+            self._block("oversized")
+            self.stats.oversized_bytes += size
+            await route.abort("blockedbyclient")
+            return
+
+        self.stats.allowed_requests += 1
+        await route.continue_()
+
+    async def _declared_size(self, route) -> Optional[int]:
+        """Content-Length of a request's response, or None if not declared."""
+        url = route.request.url
+        if url in self._sizes:
+            return self._sizes[url]
+        try:
+            response = await route.fetch(method="HEAD")
+            length = response.headers.get("content-length")
+            size = int(length) if length else None
+        except Exception as e:
+            logger.debug(f"Resource policy size check failed for {url}: {e}")
+            size = None
+        if len(self._sizes) >= _SIZE_CACHE_ENTRIES:
+            self._sizes.pop(next(iter(self._sizes)))
+        self._sizes[url] = size
+        return size
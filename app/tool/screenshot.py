@@ -0,0 +1,68 @@
+"""Screenshot capture helpers: downscaling, byte budgets and change detection."""
+
+import hashlib
+import io
+from typing import Any
+
+from PIL import Image
+
+from app.config import ScreenshotSettings
+
+
+def page_fingerprint(*parts: Any) -> str:
+    """Cheap fingerprint of what a screenshot would show.
+
+    Built from values that are already available without capturing (URL,
+    scroll offset, viewport size, the serialized interactive elements, ...).
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode("utf-8", errors="replace"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _encode(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def fit_screenshot(data: bytes, settings: ScreenshotSettings) -> bytes:
+    """Downscale and re-encode a screenshot to fit the configured budget.
+
+    The image is first shrunk to ``max_width`` x ``max_height``, then the
+    highest JPEG quality in ``[min_quality, quality]`` that fits ``max_bytes``
+    is chosen. If even the lowest quality is too large, the image is shrunk
+    further.
+
+    Args:
+        data: Raw screenshot bytes (any format Pillow can read).
+        settings: Screenshot settings.
+
+    Returns:
+        bytes: JPEG bytes.
+    """
+    image = Image.open(io.BytesIO(data))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((settings.max_width, settings.max_height))
+
+    while True:
+        low, high = settings.min_quality, settings.quality
+        best = _encode(image, low)
+        if len(best) <= settings.max_bytes:
+            while low <= high:
+                quality = (low + high) // 2
+                encoded = _encode(image, quality)
+                if len(encoded) <= settings.max_bytes:
+                    best = encoded
+                    low = quality + 1
+                else:
+                    high = quality - 1
+            return best
+
+        width, height = image.size
+        if width <= 320 or height <= 240:
+            return best
+        image = image.resize((int(width * 0.75), int(height * 0.75)))
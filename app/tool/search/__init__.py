@@ -1,8 +1,28 @@
-from app.tool.search.baidu_search import BaiduSearchEngine
-from app.tool.search.base import WebSearchEngine
-from app.tool.search.bing_search import BingSearchEngine
-from app.tool.search.duckduckgo_search import DuckDuckGoSearchEngine
-from app.tool.search.google_search import GoogleSearchEngine
+from typing import TYPE_CHECKING
+
+from app.lazy import lazy_exports
+
+
+if TYPE_CHECKING:
+    from app.tool.search.baidu_search import BaiduSearchEngine
+    from app.tool.search.base import WebSearchEngine
+    from app.tool.search.bing_search import BingSearchEngine
+    from app.tool.search.duckduckgo_search import DuckDuckGoSearchEngine
+    from app.tool.search.google_search import GoogleSearchEngine
+    from app.tool.search.local_search import LocalIndexSearchEngine
+
+
+__getattr__ = lazy_exports(
+    __name__,
+    {
+        "WebSearchEngine": "app.tool.search.base:WebSearchEngine",
+        "BaiduSearchEngine": "app.tool.search.baidu_search:BaiduSearchEngine",
+        "DuckDuckGoSearchEngine": "app.tool.search.duckduckgo_search:DuckDuckGoSearchEngine",
+        "GoogleSearchEngine": "app.tool.search.google_search:GoogleSearchEngine",
+        "BingSearchEngine": "app.tool.search.bing_search:BingSearchEngine",
+        "LocalIndexSearchEngine": "app.tool.search.local_search:LocalIndexSearchEngine",
+    },
+)
 
 
 __all__ = [
@@ -11,4 +31,5 @@ __all__ = [
     "DuckDuckGoSearchEngine",
     "GoogleSearchEngine",
     "BingSearchEngine",
+    "LocalIndexSearchEngine",
 ]
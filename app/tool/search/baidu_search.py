@@ -1,7 +1,5 @@
 from typing import List
 
-from baidusearch.baidusearch import search
-
 from app.tool.search.base import SearchItem, WebSearchEngine
 
 
@@ -14,6 +12,8 @@ class BaiduSearchEngine(WebSearchEngine):
 
         Returns results formatted according to SearchItem model.
         """
+        from baidusearch.baidusearch import search
+
         raw_results = search(query, num_results=num_results)
 
         # Convert raw results to SearchItem format
@@ -1,5 +1,9 @@
-from typing import List, Optional, Tuple
+import asyncio
+import math
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote_plus
 
+import httpx
 import requests
 from bs4 import BeautifulSoup
 
@@ -33,10 +37,14 @@ HEADERS = {
 
 BING_HOST_URL = "https://www.bing.com"
 BING_SEARCH_URL = "https://www.bing.com/search?q="
+RESULTS_PER_PAGE = 10
+MAX_PAGES = 10
 
 
 class BingSearchEngine(WebSearchEngine):
     session: Optional[requests.Session] = None
+    timeout: float = 10.0
+    transport: Optional[httpx.AsyncBaseTransport] = None
 
     def __init__(self, **data):
         """Initialize the BingSearch tool with a requests session."""
@@ -44,6 +52,106 @@ class BingSearchEngine(WebSearchEngine):
         self.session = requests.Session()
         self.session.headers.update(HEADERS)
 
+    async def _search_async(
+        self, query: str, num_results: int = 10
+    ) -> List[SearchItem]:
+        """
+        Asynchronous Bing search that fetches result pages concurrently.
+
+        Page offsets are computed up front from `num_results` and fetched in
+        parallel. Results are merged in rank order and deduplicated by URL, and
+        outstanding pages are cancelled as soon as enough results have arrived.
+
+        Args:
+            query (str): The search query to submit to Bing.
+            num_results (int, optional): Maximum number of results to return. Defaults to 10.
+
+        Returns:
+            List[SearchItem]: A list of search items with title, URL, and description.
+        """
+        if not query:
+            return []
+
+        pages: Dict[int, List[SearchItem]] = {}
+        last_page: Optional[int] = None
+        next_page = 0
+
+        async with httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=self.timeout,
+            follow_redirects=True,
+            transport=self.transport,
+        ) as client:
+            while next_page < MAX_PAGES and (
+                last_page is None or next_page <= last_page
+            ):
+                merged = self._merge_pages(pages)
+                missing = num_results - len(merged)
+                if missing <= 0:
+                    break
+
+                batch = range(
+                    next_page,
+                    min(next_page + math.ceil(missing / RESULTS_PER_PAGE), MAX_PAGES),
+                )
+                next_page = batch.stop
+                tasks = {
+                    asyncio.create_task(self._fetch_page(client, query, page)): page
+                    for page in batch
+                }
+                try:
+                    for finished in asyncio.as_completed(tasks):
+                        page, items, has_next = await finished
+                        pages[page] = items
+                        if not has_next or not items:
+                            last_page = min(
+                                page, last_page if last_page is not None else page
+                            )
+                        # Stop early once the contiguous prefix already has enough
+                        if len(self._merge_pages(pages)) >= num_results:
+                            break
+                        # Pages past the last one Bing has cannot add anything
+                        if last_page is not None and all(
+                            p in pages for p in range(last_page + 1)
+                        ):
+                            break
+                finally:
+                    for task in tasks:
+                        task.cancel()
+
+        return self._merge_pages(pages)[:num_results]
+
+    async def _fetch_page(
+        self, client: httpx.AsyncClient, query: str, page: int
+    ) -> Tuple[int, List[SearchItem], bool]:
+        """Fetch and parse a single result page (0-based page number)."""
+        first = page * RESULTS_PER_PAGE + 1
+        url = f"{BING_SEARCH_URL}{quote_plus(query)}&first={first}"
+        try:
+            res = await client.get(url)
+            # BeautifulSoup parsing is CPU-bound; keep it off the event loop
+            items, next_url = await asyncio.to_thread(
+                self._parse_results, res.text, page * RESULTS_PER_PAGE
+            )
+            return page, items, next_url is not None
+        except Exception as e:
+            logger.warning(f"Error fetching Bing page {page + 1}: {e}")
+            return page, [], False
+
+    @staticmethod
+    def _merge_pages(pages: Dict[int, List[SearchItem]]) -> List[SearchItem]:
+        """Merge the contiguous prefix of fetched pages, deduplicating by URL."""
+        merged = []
+        seen = set()
+        page = 0
+        while page in pages:
+            for item in pages[page]:
+                if item.url and item.url not in seen:
+                    seen.add(item.url)
+                    merged.append(item)
+            page += 1
+        return merged
+
     def _search_sync(self, query: str, num_results: int = 10) -> List[SearchItem]:
         """
         Synchronous Bing search implementation to retrieve search results.
@@ -86,52 +194,74 @@ class BingSearchEngine(WebSearchEngine):
         try:
             res = self.session.get(url=url)
             res.encoding = "utf-8"
-            root = BeautifulSoup(res.text, "lxml")
+            return self._parse_results(res.text, rank_start)
+        except Exception as e:
+            logger.warning(f"Error parsing HTML: {e}")
+            return [], None
 
-            list_data = []
-            ol_results = root.find("ol", id="b_results")
-            if not ol_results:
-                return [], None
+    @staticmethod
+    def _parse_results(
+        html: str, rank_start: int = 0
+    ) -> Tuple[List[SearchItem], Optional[str]]:
+        """
+        Extract search results and the next page URL from a Bing result page.
 
-            for li in ol_results.find_all("li", class_="b_algo"):
-                title = ""
-                url = ""
-                abstract = ""
-                try:
-                    h2 = li.find("h2")
-                    if h2:
-                        title = h2.text.strip()
-                        url = h2.a["href"].strip()
-
-                    p = li.find("p")
-                    if p:
-                        abstract = p.text.strip()
-
-                    if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
-                        abstract = abstract[:ABSTRACT_MAX_LENGTH]
-
-                    rank_start += 1
-
-                    # Create a SearchItem object
-                    list_data.append(
-                        SearchItem(
-                            title=title or f"Bing Result {rank_start}",
-                            url=url,
-                            description=abstract,
-                        )
+        Returns:
+            tuple: (List of SearchItem objects, next page URL or None)
+        """
+        root = BeautifulSoup(html, "lxml")
+
+        list_data = []
+        ol_results = root.find("ol", id="b_results")
+        if not ol_results:
+            return [], None
+
+        for li in ol_results.find_all("li", class_="b_algo"):
+            title = ""
+            url = ""
+            abstract = ""
+            try:
+                h2 = li.find("h2")
+                if h2:
+                    title = h2.text.strip()
+                    url = h2.a["href"].strip()
+
+                p = li.find("p")
+                if p:
+                    abstract = p.text.strip()
+
+                if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
+                    abstract = abstract[:ABSTRACT_MAX_LENGTH]
+
+                rank_start += 1
+
+                # Create a SearchItem object
+                list_data.append(
+                    SearchItem(
+                        title=title or f"Bing Result {rank_start}",
+                        url=url,
+                        description=abstract,
                     )
-                except Exception:
-                    continue
+                )
+            except Exception:
+                continue
 
-            next_btn = root.find("a", title="Next page")
-            if not next_btn:
-                return list_data, None
+        next_btn = root.find("a", title="Next page")
+        if not next_btn:
+            return list_data, None
 
-            next_url = BING_HOST_URL + next_btn["href"]
-            return list_data, next_url
-        except Exception as e:
-            logger.warning(f"Error parsing HTML: {e}")
-            return [], None
+        next_url = BING_HOST_URL + next_btn["href"]
+        return list_data, next_url
+
+    async def perform_search_async(
+        self, query: str, num_results: int = 10, *args, **kwargs
+    ) -> List[SearchItem]:
+        """
+        Bing search engine, fetching result pages concurrently.
+
+        Returns results formatted according to SearchItem model.
+        """
+        return await self._search_async(query, num_results=num_results)
 
     def perform_search(
         self, query: str, num_results: int = 10, *args, **kwargs
@@ -141,4 +271,9 @@ class BingSearchEngine(WebSearchEngine):
 
         Returns results formatted according to SearchItem model.
         """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._search_async(query, num_results=num_results))
+        # Called from inside an event loop thread: fall back to serial paging
         return self._search_sync(query, num_results=num_results)
@@ -1,7 +1,5 @@
 from typing import List
 
-from googlesearch import search
-
 from app.tool.search.base import SearchItem, WebSearchEngine
 
 
@@ -14,6 +12,8 @@ class GoogleSearchEngine(WebSearchEngine):
 
         Returns results formatted according to SearchItem model.
         """
+        from googlesearch import search
+
         raw_results = search(query, num_results=num_results, advanced=True)
 
         results = []
@@ -0,0 +1,457 @@
+import heapq
+import json
+import math
+import mmap
+import re
+import shutil
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from pydantic import Field, PrivateAttr
+
+from app.config import config
+from app.logger import logger
+from app.tool.search.base import SearchItem, WebSearchEngine
+
+
+_CJK_RANGES = "\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af"
+TOKEN_PATTERN = re.compile(rf"[{_CJK_RANGES}]|[^\W_{_CJK_RANGES}]+")
+INDEXED_SUFFIXES = {".txt", ".md", ".markdown", ".rst", ".html", ".htm"}
+SNIPPET_LENGTH = 300
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Segments are merged once there are more than this many, or once this share of
+# the indexed documents is tombstoned
+COMPACT_MAX_SEGMENTS = 8
+COMPACT_MAX_DELETED_RATIO = 0.25
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms; CJK characters become single-character terms."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class _Segment:
+    """An immutable on-disk slice of the inverted index.
+
+    Postings are stored as flat (doc_id, term_frequency) uint32 pairs in
+    `postings.bin` and read through a memory map, so opening an index does not
+    load posting lists into memory.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lexicon: Dict[str, Tuple[int, int]] = json.loads(
+            (path / "lexicon.json").read_text(encoding="utf-8")
+        )
+        self._file = open(path / "postings.bin", "rb")
+        size = (path / "postings.bin").stat().st_size
+        if size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._postings = memoryview(self._mmap).cast("I")
+        else:
+            self._mmap = None
+            self._postings = memoryview(array("I").tobytes()).cast("I")
+
+    @classmethod
+    def write(
+        cls, path: Path, postings: Dict[str, List[Tuple[int, int]]]
+    ) -> "_Segment":
+        path.mkdir(parents=True, exist_ok=True)
+        lexicon = {}
+        data = array("I")
+        for term in sorted(postings):
+            entries = postings[term]
+            lexicon[term] = (len(data) // 2, len(entries))
+            for doc_id, tf in entries:
+                data.append(doc_id)
+                data.append(tf)
+        (path / "postings.bin").write_bytes(data.tobytes())
+        (path / "lexicon.json").write_text(json.dumps(lexicon), encoding="utf-8")
+        return cls(path)
+
+    def postings(self, term: str) -> Iterable[Tuple[int, int]]:
+        entry = self.lexicon.get(term)
+        if entry is None:
+            return ()
+        start, count = entry
+        view = self._postings[start * 2 : (start + count) * 2]
+        return zip(view[0::2], view[1::2])
+
+    def close(self) -> None:
+        self._postings.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+class LocalIndex:
+    """A BM25 inverted index over local documents, updated incrementally.
+
+    Each indexing run that finds new or changed documents writes a new segment.
+    Replaced documents are tombstoned and skipped at query time until the
+    segments are merged with `compact()`. `docs.json` lists the live segments
+    next to the documents, so replacing it is what commits a change; segments
+    it does not list are left over from an interrupted run and are removed.
+    """
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        self._lock = threading.RLock()
+        self._docs: List[dict] = []
+        self._by_source: Dict[str, int] = {}
+        self._segments: List[_Segment] = []
+        self._total_length = 0
+        self._live_docs = 0
+        self._load()
+
+    # Persistence
+
+    def _load(self) -> None:
+        docs_path = self.index_dir / "docs.json"
+        segment_names = None
+        if docs_path.exists():
+            data = json.loads(docs_path.read_text(encoding="utf-8"))
+            if isinstance(data, list):
+                # Written before docs.json listed the segments
+                self._docs = data
+            else:
+                self._docs, segment_names = data["docs"], data["segments"]
+        for doc_id, doc in enumerate(self._docs):
+            if not doc.get("deleted"):
+                self._by_source[doc["source"]] = doc_id
+                self._total_length += doc["length"]
+                self._live_docs += 1
+        segments_dir = self.index_dir / "segments"
+        if segments_dir.exists():
+            paths = {path.name: path for path in segments_dir.iterdir()}
+            if segment_names is None:
+                segment_names = sorted(filter(str.isdigit, paths), key=int)
+            for name, path in paths.items():
+                if name not in segment_names:
+                    logger.warning(f"Removing incomplete index segment {path}")
+                    shutil.rmtree(path, ignore_errors=True)
+            for name in segment_names:
+                self._segments.append(_Segment(paths[name]))
+
+    def _save_docs(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_dir / "docs.json.tmp"
+        data = {
+            "docs": self._docs,
+            "segments": [segment.path.name for segment in self._segments],
+        }
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        tmp_path.replace(self.index_dir / "docs.json")
+
+    def _next_segment_path(self) -> Path:
+        number = int(self._segments[-1].path.name) + 1 if self._segments else 0
+        return self.index_dir / "segments" / str(number)
+
+    # Indexing
+
+    @property
+    def document_count(self) -> int:
+        return self._live_docs
+
+    def is_indexed(self, source: str, version: str) -> bool:
+        """Whether this version of a document is already in the index."""
+        doc_id = self._by_source.get(source)
+        return doc_id is not None and self._docs[doc_id]["version"] == version
+
+    def add_documents(self, documents: Iterable[dict]) -> int:
+        """Index documents, skipping ones whose version is already indexed.
+
+        Each document is a dict with `source`, `title`, `text` and `version`
+        keys. Returns the number of documents added or replaced.
+        """
+        with self._lock:
+            postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+            added = 0
+            for document in documents:
+                source = document["source"]
+                if self.is_indexed(source, document["version"]):
+                    continue
+                existing = self._by_source.get(source)
+                if existing is not None:
+                    self._remove(existing)
+
+                terms = tokenize(f"{document.get('title', '')}\n{document['text']}")
+                doc_id = len(self._docs)
+                self._docs.append(
+                    {
+                        "source": source,
+                        "title": document.get("title") or source,
+                        "version": document["version"],
+                        "length": len(terms),
+                        "snippet": " ".join(document["text"].split())[:SNIPPET_LENGTH],
+                    }
+                )
+                self._by_source[source] = doc_id
+                self._total_length += len(terms)
+                self._live_docs += 1
+                for term, tf in Counter(terms).items():
+                    postings[term].append((doc_id, tf))
+                added += 1
+
+            if added:
+                self._segments.append(
+                    _Segment.write(self._next_segment_path(), postings)
+                )
+                self._save_docs()
+            return added
+
+    def remove_missing(self, sources: Iterable[str], prefix: str) -> int:
+        """Tombstone indexed documents under `prefix` that are no longer present."""
+        with self._lock:
+            present = set(sources)
+            removed = 0
+            for source, doc_id in list(self._by_source.items()):
+                if source.startswith(prefix) and source not in present:
+                    self._remove(doc_id)
+                    removed += 1
+            if removed:
+                self._save_docs()
+            return removed
+
+    def _remove(self, doc_id: int) -> None:
+        doc = self._docs[doc_id]
+        doc["deleted"] = True
+        self._by_source.pop(doc["source"], None)
+        self._total_length -= doc["length"]
+        self._live_docs -= 1
+
+    def index_directory(self, root: Path) -> int:
+        """Incrementally index text, markdown and HTML files under a directory."""
+        root = Path(root).resolve()
+        documents = []
+        sources = []
+        for path in root.rglob("*"):
+            if not path.is_file() or path.suffix.lower() not in INDEXED_SUFFIXES:
+                continue
+            source = path.as_uri()
+            sources.append(source)
+            version = str(path.stat().st_mtime_ns)
+            if self.is_indexed(source, version):
+                continue
+            try:
+                raw = path.read_text(encoding="utf-8", errors="replace")
+            except OSError as e:
+                logger.warning(f"Skipping unreadable file {path}: {e}")
+                continue
+            title, text = path.name, raw
+            if path.suffix.lower() in {".html", ".htm"}:
+                title, text = self._html_to_text(raw, default_title=path.name)
+            documents.append(
+                {"source": source, "title": title, "text": text, "version": version}
+            )
+        added = self.add_documents(documents)
+        removed = self.remove_missing(sources, prefix=root.as_uri())
+        if added or removed:
+            logger.info(
+                f"Indexed {root}: {added} added/updated, {removed} removed, "
+                f"{self.document_count} documents total"
+            )
+        return added
+
+    def index_pages(self, pages: Iterable) -> int:
+        """Index pages from the shared page store, keyed by URL and content hash."""
+        documents = []
+        for page in pages:
+            text = page.markdown or page.text
+            title = page.url
+            if not text and page.html:
+                title, text = self._html_to_text(page.html, default_title=page.url)
+            if text:
+                documents.append(
+                    {
+                        "source": page.url,
+                        "title": title,
+                        "text": text,
+                        "version": page.content_hash,
+                    }
+                )
+        return self.add_documents(documents)
+
+    @staticmethod
+    def _html_to_text(html: str, default_title: str) -> Tuple[str, str]:
+        soup = BeautifulSoup(html, "html.parser")
+        title = soup.title.get_text(strip=True) if soup.title else ""
+        for tag in soup(["script", "style"]):
+            tag.extract()
+        return title or default_title, soup.get_text(separator="\n", strip=True)
+
+    def compact(self) -> None:
+        """Merge all segments into one and drop tombstoned documents."""
+        with self._lock:
+            merged: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+            remap: Dict[int, int] = {}
+            docs = []
+            for doc_id, doc in enumerate(self._docs):
+                if not doc.get("deleted"):
+                    remap[doc_id] = len(docs)
+                    docs.append(doc)
+            for segment in self._segments:
+                for term in segment.lexicon:
+                    for doc_id, tf in segment.postings(term):
+                        if doc_id in remap:
+                            merged[term].append((remap[doc_id], tf))
+
+            new_segment = _Segment.write(self._next_segment_path(), merged)
+            old_segments, self._segments = self._segments, [new_segment]
+            self._docs = docs
+            self._by_source = {doc["source"]: i for i, doc in enumerate(docs)}
+            # The old segments are only deleted once docs.json no longer
+            # lists them
+            self._save_docs()
+            for segment in old_segments:
+                segment.close()
+                shutil.rmtree(segment.path, ignore_errors=True)
+
+    def maybe_compact(self) -> bool:
+        """Compact once segments or tombstones pile up; returns whether it did."""
+        with self._lock:
+            deleted = len(self._docs) - self._live_docs
+            if len(
+                self._segments
+            ) <= COMPACT_MAX_SEGMENTS and deleted <= COMPACT_MAX_DELETED_RATIO * len(
+                self._docs
+            ):
+                return False
+            logger.info(
+                f"Compacting local search index: {len(self._segments)} segments, "
+                f"{deleted} of {len(self._docs)} documents deleted"
+            )
+            self.compact()
+            return True
+
+    # Querying
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, dict]]:
+        """Return the top `limit` documents for a query as (score, doc) pairs."""
+        terms = set(tokenize(query))
+        if not terms or not self._live_docs:
+            return []
+
+        with self._lock:
+            n_docs = self._live_docs
+            avg_length = self._total_length / n_docs
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                # Tombstoned documents count towards neither df nor scores
+                postings = [
+                    (doc_id, tf)
+                    for segment in self._segments
+                    for doc_id, tf in segment.postings(term)
+                    if not self._docs[doc_id].get("deleted")
+                ]
+                df = len(postings)
+                if not df:
+                    continue
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings:
+                    norm = BM25_K1 * (
+                        1 - BM25_B + BM25_B * self._docs[doc_id]["length"] / avg_length
+                    )
+                    scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(score, self._docs[doc_id]) for doc_id, score in top]
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+
+
+class LocalIndexSearchEngine(WebSearchEngine):
+    """Offline search engine answering queries from a local BM25 index.
+
+    Indexes the configured corpus directories and, optionally, pages already
+    fetched into the shared page store. The index is refreshed incrementally at
+    most once every `refresh_interval` seconds, and compacted by the refresh
+    once segments or deleted documents pile up.
+    """
+
+    index_dir: Optional[str] = Field(
+        default=None, description="Directory where the index is stored"
+    )
+    corpus_paths: List[str] = Field(
+        default_factory=list, description="Directories of documents to index"
+    )
+    include_page_store: bool = Field(
+        default=True, description="Also index pages in the shared page store"
+    )
+    refresh_interval: float = Field(
+        default=60.0, description="Minimum seconds between incremental refreshes"
+    )
+
+    _index: Optional[LocalIndex] = PrivateAttr(default=None)
+    _last_refresh: float = PrivateAttr(default=0.0)
+
+    def __init__(self, **data):
+        search_config = config.search_config
+        if search_config is not None:
+            data.setdefault("index_dir", search_config.local_index_dir)
+            data.setdefault("corpus_paths", search_config.local_corpus_paths)
+        super().__init__(**data)
+
+    @property
+    def index(self) -> LocalIndex:
+        if self._index is None:
+            index_dir = (
+                Path(self.index_dir)
+                if self.index_dir
+                else config.workspace_root / ".search_index"
+            )
+            self._index = LocalIndex(index_dir)
+        return self._index
+
+    def refresh(self, force: bool = False) -> None:
+        """Bring the index up to date with the corpus and the page store."""
+        if not force and time.time() - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = time.time()
+        for corpus_path in self.corpus_paths:
+            path = Path(corpus_path).expanduser()
+            if path.is_dir():
+                self.index.index_directory(path)
+            else:
+                logger.warning(f"Local search corpus not found: {path}")
+        if self.include_page_store:
+            from app.tool.page_store import page_store
+
+            # Only pages that are new or changed are read from disk
+            changed = [
+                url
+                for url, digest in page_store.page_versions().items()
+                if not self.index.is_indexed(url, digest)
+            ]
+            if changed:
+                self.index.index_pages(page_store.iter_pages(changed))
+        self.index.maybe_compact()
+
+    def perform_search(
+        self, query: str, num_results: int = 10, *args, **kwargs
+    ) -> List[SearchItem]:
+        """
+        Local index search engine.
+
+        Returns results formatted according to SearchItem model.
+        """
+        self.refresh()
+        return [
+            SearchItem(
+                title=doc["title"], url=doc["source"], description=doc["snippet"]
+            )
+            for _, doc in self.index.search(query, limit=num_results)
+        ]
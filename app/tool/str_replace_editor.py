@@ -405,6 +405,18 @@ class StrReplaceEditor(BaseTool):
             output=f"Last edit to {path} undone successfully. {self._make_output(old_text, str(path))}"
         )
 
+    def checkpoint_state(self) -> Optional[dict]:
+        """Edit history for agent checkpoints, so undo_edit survives a restore."""
+        history = {str(path): texts for path, texts in self._file_history.items()}
+        history = {path: texts for path, texts in history.items() if texts}
+        return {"file_history": history} if history else None
+
+    def restore_state(self, state: dict) -> None:
+        self._file_history = defaultdict(
+            list,
+            {path: list(texts) for path, texts in state["file_history"].items()},
+        )
+
     def _make_output(
         self,
         file_content: str,
@@ -1,31 +1,64 @@
 """Collection classes for managing multiple tools."""
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Type, Union
 
 from app.exceptions import ToolError
 from app.logger import logger
 from app.tool.base import BaseTool, ToolFailure, ToolResult
 
 
+ToolSpec = Union[BaseTool, Type[BaseTool]]
+
+
+def _tool_name(tool: ToolSpec) -> str:
+    if isinstance(tool, type):
+        return tool.model_fields["name"].default
+    return tool.name
+
+
+def _tool_param(tool: ToolSpec) -> Dict[str, Any]:
+    if not isinstance(tool, type):
+        return tool.to_param()
+    # Same as BaseTool.to_param, from the class defaults
+    fields = tool.model_fields
+    return {
+        "type": "function",
+        "function": {
+            "name": fields["name"].default,
+            "description": fields["description"].default,
+            "parameters": fields["parameters"].default,
+        },
+    }
+
+
 class ToolCollection:
-    """A collection of defined tools."""
+    """A collection of defined tools.
+
+    Tools may be given as classes; they are then created on first use, so
+    that unused tools cost nothing. ``tool_map`` holds the created tools.
+    """
 
     class Config:
         arbitrary_types_allowed = True
 
-    def __init__(self, *tools: BaseTool):
-        self.tools = tools
-        self.tool_map = {tool.name: tool for tool in tools}
+    def __init__(self, *tools: ToolSpec):
+        self.tools: tuple = ()
+        self.tool_map: Dict[str, BaseTool] = {}
+        self._pending: Dict[str, Type[BaseTool]] = {}
+        self.add_tools(*tools)
 
     def __iter__(self):
-        return iter(self.tools)
+        return iter(self.get_tool(_tool_name(tool)) for tool in self.tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.tool_map or name in self._pending
 
     def to_params(self) -> List[Dict[str, Any]]:
-        return [tool.to_param() for tool in self.tools]
+        return [_tool_param(tool) for tool in self.tools]
 
     async def execute(
         self, *, name: str, tool_input: Dict[str, Any] = None
     ) -> ToolResult:
-        tool = self.tool_map.get(name)
+        tool = self.get_tool(name)
         if not tool:
             return ToolFailure(error=f"Tool {name} is invalid")
         try:
@@ -37,7 +70,7 @@ class ToolCollection:
     async def execute_all(self) -> List[ToolResult]:
         """Execute all tools in the collection sequentially."""
         results = []
-        for tool in self.tools:
+        for tool in self:
             try:
                 result = await tool()
                 results.append(result)
@@ -45,23 +78,41 @@ class ToolCollection:
                 results.append(ToolFailure(error=e.message))
         return results
 
-    def get_tool(self, name: str) -> BaseTool:
-        return self.tool_map.get(name)
+    def get_tool(self, name: str, create: bool = True) -> Optional[BaseTool]:
+        """The tool called ``name``, creating it on first use.
+
+        Args:
+            name: Name of the tool.
+            create: Whether to create a tool that has not been used yet;
+                otherwise None is returned for it.
+        """
+        tool = self.tool_map.get(name)
+        if tool is None and create and name in self._pending:
+            tool_class = self._pending.pop(name)
+            tool = self.tool_map[name] = tool_class()
+            self.tools = tuple(
+                tool if entry is tool_class else entry for entry in self.tools
+            )
+        return tool
 
-    def add_tool(self, tool: BaseTool):
-        """Add a single tool to the collection.
+    def add_tool(self, tool: ToolSpec):
+        """Add a single tool, or a tool class to create on first use.
 
         If a tool with the same name already exists, it will be skipped and a warning will be logged.
         """
-        if tool.name in self.tool_map:
-            logger.warning(f"Tool {tool.name} already exists in collection, skipping")
+        name = _tool_name(tool)
+        if name in self:
+            logger.warning(f"Tool {name} already exists in collection, skipping")
             return self
 
         self.tools += (tool,)
-        self.tool_map[tool.name] = tool
+        if isinstance(tool, type):
+            self._pending[name] = tool
+        else:
+            self.tool_map[name] = tool
         return self
 
-    def add_tools(self, *tools: BaseTool):
+    def add_tools(self, *tools: ToolSpec):
         """Add multiple tools to the collection.
 
         If any tool has a name conflict with an existing tool, it will be skipped and a warning will be logged.
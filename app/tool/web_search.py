@@ -1,22 +1,36 @@
 import asyncio
 from typing import Any, Dict, List, Optional
 
-import requests
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.config import config
 from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
-from app.tool.search import (
-    BaiduSearchEngine,
-    BingSearchEngine,
-    DuckDuckGoSearchEngine,
-    GoogleSearchEngine,
-    WebSearchEngine,
-)
-from app.tool.search.base import SearchItem
+from app.tool.page_store import page_store
+from app.tool.search.base import SearchItem, WebSearchEngine
+
+
+# Engines are created on first use, as each imports its own client library
+_SEARCH_ENGINES = {
+    "google": "GoogleSearchEngine",
+    "baidu": "BaiduSearchEngine",
+    "duckduckgo": "DuckDuckGoSearchEngine",
+    "bing": "BingSearchEngine",
+    "local": "LocalIndexSearchEngine",
+}
+_search_engines: Dict[str, WebSearchEngine] = {}
+
+
+def get_search_engine(name: str) -> WebSearchEngine:
+    """The shared instance of the search engine ``name``."""
+    engine = _search_engines.get(name)
+    if engine is None:
+        from app.tool import search
+
+        engine = getattr(search, _SEARCH_ENGINES[name])()
+        _search_engines[name] = engine
+    return engine
 
 
 class SearchResult(BaseModel):
@@ -111,6 +125,9 @@ class WebContentFetcher:
         """
         Fetch and extract the main content from a webpage.
 
+        Reads through the shared page store: fresh pages are served from the
+        cache and stale ones are revalidated with a conditional request.
+
         Args:
             url: The URL to fetch content from
             timeout: Request timeout in seconds
@@ -118,9 +135,16 @@ class WebContentFetcher:
         Returns:
             Extracted text content or None if fetching fails
         """
+        cached = await page_store.get_async(url)
+        if cached is not None and cached.text and page_store.is_fresh(cached):
+            return cached.text
+
         headers = {
             "WebSearch": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
+        headers.update(page_store.validator_headers(cached))
+
+        import requests
 
         try:
             # Use asyncio to run requests in a thread pool
@@ -128,30 +152,58 @@ class WebContentFetcher:
                 None, lambda: requests.get(url, headers=headers, timeout=timeout)
             )
 
+            # Page unchanged since it was cached
+            if response.status_code == 304 and cached is not None:
+                page = await page_store.revalidated_async(url) or cached
+                if page.text is None and page.html:
+                    page = await page_store.put_async(
+                        url,
+                        html=page.html,
+                        text=WebContentFetcher.extract_text(page.html),
+                        etag=page.etag,
+                        last_modified=page.last_modified,
+                    )
+                return page.text
+
             if response.status_code != 200:
                 logger.warning(
                     f"Failed to fetch content from {url}: HTTP {response.status_code}"
                 )
                 return None
 
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Remove script and style elements
-            for script in soup(["script", "style", "header", "footer", "nav"]):
-                script.extract()
-
-            # Get text content
-            text = soup.get_text(separator="\n", strip=True)
-
-            # Clean up whitespace and limit size (100KB max)
-            text = " ".join(text.split())
-            return text[:10000] if text else None
+            text = WebContentFetcher.extract_text(response.text)
+            await page_store.put_async(
+                url,
+                html=response.text,
+                text=text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+            return text
 
         except Exception as e:
             logger.warning(f"Error fetching content from {url}: {e}")
             return None
 
+    @staticmethod
+    def extract_text(html: str) -> Optional[str]:
+        """Extract readable text from an HTML document."""
+        from bs4 import BeautifulSoup
+
+        # Parse HTML with BeautifulSoup
+        soup = BeautifulSoup(html, "html.parser")
+
+        # Remove script and style elements
+        for script in soup(["script", "style", "header", "footer", "nav"]):
+            script.extract()
+
+        # Get text content
+        text = soup.get_text(separator="\n", strip=True)
+
+        # Clean up whitespace and limit size (100KB max)
+        text = " ".join(text.split())
+        return text[:10000] if text else None
+
 
 class WebSearch(BaseTool):
     """Search the web for information using various search engines."""
@@ -190,12 +242,6 @@ class WebSearch(BaseTool):
         },
         "required": ["query"],
     }
-    _search_engine: dict[str, WebSearchEngine] = {
-        "google": GoogleSearchEngine(),
-        "baidu": BaiduSearchEngine(),
-        "duckduckgo": DuckDuckGoSearchEngine(),
-        "bing": BingSearchEngine(),
-    }
     content_fetcher: WebContentFetcher = WebContentFetcher()
 
     async def execute(
@@ -295,7 +341,7 @@ class WebSearch(BaseTool):
         failed_engines = []
 
         for engine_name in engine_order:
-            engine = self._search_engine[engine_name]
+            engine = get_search_engine(engine_name)
             logger.info(f"🔎 Attempting search with {engine_name.capitalize()}...")
             search_items = await self._perform_search_with_engine(
                 engine, query, num_results, search_params
@@ -372,15 +418,11 @@ class WebSearch(BaseTool):
         )
 
         # Start with preferred engine, then fallbacks, then remaining engines
-        engine_order = [preferred] if preferred in self._search_engine else []
+        engine_order = [preferred] if preferred in _SEARCH_ENGINES else []
         engine_order.extend(
-            [
-                fb
-                for fb in fallbacks
-                if fb in self._search_engine and fb not in engine_order
-            ]
+            [fb for fb in fallbacks if fb in _SEARCH_ENGINES and fb not in engine_order]
         )
-        engine_order.extend([e for e in self._search_engine if e not in engine_order])
+        engine_order.extend([e for e in _SEARCH_ENGINES if e not in engine_order])
 
         return engine_order
 
@@ -395,6 +437,16 @@ class WebSearch(BaseTool):
         search_params: Dict[str, Any],
     ) -> List[SearchItem]:
         """Execute search with the given engine and parameters."""
+        # Engines with a native async backend run on the event loop directly
+        if hasattr(engine, "perform_search_async"):
+            return list(
+                await engine.perform_search_async(
+                    query,
+                    num_results=num_results,
+                    lang=search_params.get("lang"),
+                    country=search_params.get("country"),
+                )
+            )
         return await asyncio.get_event_loop().run_in_executor(
             None,
             lambda: list(
@@ -0,0 +1,131 @@
+"""
+Benchmark the per-step overhead of agent checkpoints.
+
+Simulates a long browsing and editing run. Every step adds an assistant tool
+call and a 4 KB tool result. Every other step adds a ~150 KB screenshot, and
+every fourth step saves a 20 KB file revision in the editor history. After
+each step the state is checkpointed with AgentCheckpointer. The baseline
+dumps the whole memory and edit history to one JSON file per step.
+
+Usage:
+    python -m examples.benchmarks.agent_checkpoint --steps 50
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.agent.base import BaseAgent
+from app.agent.checkpoint import AgentCheckpointer
+from app.llm import LLM
+from app.schema import Function, Message, ToolCall
+from app.tool import ToolCollection
+from app.tool.str_replace_editor import StrReplaceEditor
+
+
+class SimulatedAgent(BaseAgent):
+    available_tools: ToolCollection = None
+
+    async def step(self) -> str:
+        step = self.current_step
+        call = ToolCall(
+            id=f"call_{step}",
+            function=Function(
+                name="browser_use",
+                arguments=json.dumps({"action": "click_element", "index": step}),
+            ),
+        )
+        self.memory.add_message(Message.from_tool_calls(tool_calls=[call]))
+        screenshot = None
+        if step % 2 == 0:
+            screenshot = base64.b64encode(os.urandom(110_000)).decode()
+        self.memory.add_message(
+            Message.tool_message(
+                f"result {step} " + "y" * 4000,
+                name="browser_use",
+                tool_call_id=call.id,
+                base64_image=screenshot,
+            )
+        )
+        if step % 4 == 0:
+            editor = self.available_tools.get_tool("str_replace_editor")
+            editor._file_history["/workspace/report.md"].append(
+                f"revision {step}\n" + "z" * 20_000
+            )
+        return "ok"
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+async def main(steps: int) -> None:
+    llm = object.__new__(LLM)
+    agent = SimulatedAgent(
+        name="bench",
+        llm=llm,
+        max_steps=steps,
+        memory={"max_messages": 1000},
+        available_tools=ToolCollection(StrReplaceEditor()),
+    )
+    editor = agent.available_tools.get_tool("str_replace_editor")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpointer = AgentCheckpointer(Path(tmp) / "checkpoint")
+        baseline_path = Path(tmp) / "baseline.json"
+        checkpoint_times, baseline_times, baseline_bytes = [], [], 0
+        for _ in range(steps):
+            agent.current_step += 1
+            await agent.step()
+
+            start = time.perf_counter()
+            await checkpointer.save(agent)
+            checkpoint_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            data = json.dumps(
+                {
+                    "messages": agent.memory.to_dict_list(),
+                    "file_history": editor.checkpoint_state(),
+                }
+            )
+            baseline_path.write_text(data)
+            baseline_times.append(time.perf_counter() - start)
+            baseline_bytes += len(data)
+
+        written = dir_size(checkpointer.directory)
+
+        start = time.perf_counter()
+        restored = SimulatedAgent(
+            name="bench",
+            llm=llm,
+            memory={"max_messages": 1000},
+            available_tools=ToolCollection(StrReplaceEditor()),
+        )
+        await AgentCheckpointer(checkpointer.directory).restore(restored)
+        restore_time = time.perf_counter() - start
+
+    def ms(values):
+        ordered = sorted(values)
+        p95 = ordered[int(len(ordered) * 0.95) - 1]
+        return (
+            f"mean {statistics.mean(values) * 1000:.2f} ms, "
+            f"p95 {p95 * 1000:.2f} ms, last {values[-1] * 1000:.2f} ms"
+        )
+
+    print(f"{steps} steps, {len(agent.memory.messages)} messages")
+    print(f"checkpoint: {ms(checkpoint_times)}, {written / 1e6:.1f} MB on disk")
+    print(f"full dump:  {ms(baseline_times)}, {baseline_bytes / 1e6:.1f} MB written")
+    print(f"restore:    {restore_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.steps))
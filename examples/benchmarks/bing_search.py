@@ -0,0 +1,78 @@
+"""
+Benchmark Bing result paging against recorded HTML fixtures.
+
+Compares fetching result pages one after another (the previous behaviour of
+BingSearchEngine) with the concurrent, early-stopping async backend. A fixed
+per-request delay stands in for network latency.
+
+Usage:
+    python -m examples.benchmarks.bing_search --num-results 50 --latency 0.3
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import httpx
+
+from app.tool.search.bing_search import RESULTS_PER_PAGE, BingSearchEngine
+
+
+FIXTURES = Path(__file__).resolve().parents[2] / "tests" / "tool" / "fixtures" / "bing"
+
+
+def make_transport(latency: float, counter: list) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        first = int(parse_qs(request.url.query.decode())["first"][0])
+        page = (first - 1) // RESULTS_PER_PAGE
+        counter.append(page)
+        await asyncio.sleep(latency)
+        # Cycle through the recorded pages so any result count can be served
+        fixtures = sorted(FIXTURES.glob("page_*.html"))
+        html = fixtures[page % len(fixtures)].read_text(encoding="utf-8")
+        return httpx.Response(200, text=html.replace("/result/", f"/p{page}/result/"))
+
+    return httpx.MockTransport(handler)
+
+
+async def serial_search(engine: BingSearchEngine, query: str, num_results: int):
+    """Fetch pages one at a time until enough results are collected."""
+    results = []
+    async with httpx.AsyncClient(transport=engine.transport) as client:
+        page = 0
+        while len(results) < num_results:
+            _, items, has_next = await engine._fetch_page(client, query, page)
+            results.extend(items)
+            if not has_next:
+                break
+            page += 1
+    return results[:num_results]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--num-results", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, runner in (
+        ("serial", serial_search),
+        ("concurrent", lambda e, q, n: e.perform_search_async(q, num_results=n)),
+    ):
+        timings = []
+        for _ in range(args.rounds):
+            counter = []
+            engine = BingSearchEngine(transport=make_transport(args.latency, counter))
+            start = time.perf_counter()
+            results = await runner(engine, "openmanus", args.num_results)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{name:>10}: {min(timings):.3f}s best of {args.rounds}, "
+            f"{len(results)} results, {len(counter)} requests"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Benchmark the prompt tokens of persisted and ephemeral step context.
+
+Simulates a browsing run with ToolCallAgent. Every step the agent is given a
+next-step prompt with ~3 KB of page elements and a screenshot, the model
+calls a tool, and the tool returns a 1 KB result. Each request is measured
+with estimate_tokens. With persisted context every prompt and screenshot
+stays in memory; with ephemeral context only those of the last
+keep_step_context steps are sent.
+
+Usage:
+    python -m examples.benchmarks.ephemeral_prompts --steps 30
+"""
+import argparse
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.agent.toolcall import ToolCallAgent
+from app.llm import LLM
+from app.logger import logger
+from app.schema import Function, Message, ToolCall, estimate_tokens
+from app.tool import BaseTool, ToolCollection
+
+
+SCREENSHOT = "/9j/" + "A" * 60_000
+
+
+class PageTool(BaseTool):
+    name: str = "browser_use"
+    description: str = "Act on the page"
+    parameters: dict = {"type": "object", "properties": {}}
+
+    async def execute(self, **kwargs) -> str:
+        return "clicked; " + "p" * 1000
+
+
+class BrowsingAgent(ToolCallAgent):
+    async def think(self) -> bool:
+        step = self.current_step
+        elements = "\n".join(
+            f"[{i}]<a href='/item/{step}/{i}'>Result {step}.{i} />" for i in range(80)
+        )
+        self.next_step_prompt = f"Current page (step {step}):\n{elements}"
+        self.add_step_context(
+            Message.user_message("Current browser screenshot:", base64_image=SCREENSHOT)
+        )
+        return await super().think()
+
+
+async def run(steps: int, ephemeral: bool, keep: int) -> list:
+    requests = []
+
+    async def ask_tool(messages, **kwargs):
+        requests.append(sum(estimate_tokens(m) for m in messages))
+        call = ToolCall(
+            id=f"call_{len(requests)}",
+            function=Function(name="browser_use", arguments=json.dumps({})),
+        )
+        return SimpleNamespace(content="", tool_calls=[call])
+
+    llm = object.__new__(LLM)
+    llm.ask_tool = ask_tool
+    agent = BrowsingAgent(
+        name="bench",
+        llm=llm,
+        available_tools=ToolCollection(PageTool()),
+        max_steps=steps,
+        memory={"max_messages": 1000, "max_tokens": 10**7},
+        ephemeral_step_context=ephemeral,
+        keep_step_context=keep,
+    )
+    await agent.run("Find the cheapest item")
+    return requests
+
+
+async def main(steps: int) -> None:
+    logger.remove()
+    baseline = None
+    for label, ephemeral, keep in [
+        ("persisted", False, 1),
+        ("ephemeral, keep 1", True, 1),
+        ("ephemeral, keep 3", True, 3),
+    ]:
+        requests = await run(steps, ephemeral, keep)
+        total = sum(requests)
+        baseline = baseline or total
+        print(
+            f"{label:<18} total {total:>9} tokens, last request {requests[-1]:>7}, "
+            f"{total / baseline:.0%} of persisted"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.steps))
@@ -0,0 +1,82 @@
+"""
+Benchmark memory held by screenshots in a long browser session.
+
+Every step adds a tool result with a ~150 KB base64 screenshot (every third
+step repeats the previous one, as for an unchanged page) and formats the
+whole history for a request, as LLM.ask_tool does. The baseline keeps each
+screenshot as base64 text in its message and sends all of them; the image
+store keeps decoded bytes once per distinct image and sends the most recent
+max_images. Allocations are measured with tracemalloc.
+
+Usage:
+    python -m examples.benchmarks.image_store --steps 60 --max-images 3
+"""
+import argparse
+import base64
+import os
+import tracemalloc
+
+from app.llm import LLM
+from app.schema import Message
+
+
+def screenshots(steps: int):
+    data = None
+    for step in range(steps):
+        if step % 3 != 2 or data is None:
+            data = os.urandom(110_000)
+        # Each capture is a new string, even of an unchanged page
+        yield base64.b64encode(data).decode()
+
+
+def run(steps: int, use_store: bool, max_images: int):
+    tracemalloc.start()
+    history, request_bytes = [], 0
+    for step, image in enumerate(screenshots(steps)):
+        if use_store:
+            history.append(
+                Message.tool_message(
+                    f"clicked {step}",
+                    name="browser_use",
+                    tool_call_id=f"call_{step}",
+                    base64_image=image,
+                )
+            )
+        else:
+            history.append(
+                {
+                    "role": "tool",
+                    "content": f"clicked {step}",
+                    "name": "browser_use",
+                    "tool_call_id": f"call_{step}",
+                    "base64_image": image,
+                }
+            )
+        del image
+        messages = LLM.format_messages(
+            [dict(m) if isinstance(m, dict) else m for m in history],
+            supports_images=True,
+            max_images=max_images if use_store else None,
+        )
+        request_bytes = sum(len(str(m["content"])) for m in messages)
+        del messages
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held, peak, request_bytes
+
+
+def main(steps: int, max_images: int) -> None:
+    for label, use_store in [("base64 in messages", False), ("image store", True)]:
+        held, peak, request_bytes = run(steps, use_store, max_images)
+        print(
+            f"{label:<19} held {held / 1e6:6.1f} MB, peak {peak / 1e6:6.1f} MB, "
+            f"last request {request_bytes / 1e6:5.2f} MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--max-images", type=int, default=3)
+    args = parser.parse_args()
+    main(args.steps, args.max_images)
@@ -0,0 +1,100 @@
+"""
+Benchmark and guard the import time of the agent entry points.
+
+Imports each module in a fresh interpreter under ``python -X importtime``
+and reports the median total import time and the slowest dependencies.
+Fails when a module imports one of the heavy optional libraries (browser_use,
+search clients, boto3, mcp, ...), which are only to be imported on first use,
+or takes longer than --max-ms.
+
+Usage:
+    python -m examples.benchmarks.import_time --repeat 5 --max-ms 1500
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+MODULES = [
+    "app.agent.manus",
+    "app.agent.browser",
+    "app.agent.toolcall",
+    "app.flow.flow_factory",
+    "app.llm",
+    "app.tool",
+]
+
+# Libraries that must not be imported until a tool or backend uses them
+LAZY_LIBRARIES = [
+    "baidusearch",
+    "boto3",
+    "browser_use",
+    "crawl4ai",
+    "duckduckgo_search",
+    "googlesearch",
+    "mcp",
+    "playwright",
+]
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """Self and cumulative microseconds of each top-level package imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        name = name.strip()
+        times[name] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def measure(module: str, repeat: int) -> Tuple[float, List[Tuple[str, int]]]:
+    """Median import time in ms, and the slowest top-level packages."""
+    totals = []
+    times: Dict[str, Tuple[int, int]] = {}
+    for _ in range(repeat):
+        times = import_times(module)
+        totals.append(times[module][1] / 1000)
+    packages = {
+        name: cumulative
+        for name, (_, cumulative) in times.items()
+        if "." not in name and name != module.split(".")[0]
+    }
+    slowest = sorted(packages.items(), key=lambda item: -item[1])[:3]
+    return statistics.median(totals), slowest
+
+
+def main(repeat: int, max_ms: float) -> int:
+    failures = []
+    for module in MODULES:
+        median, slowest = measure(module, repeat)
+        heavy = sorted(set(import_times(module)) & set(LAZY_LIBRARIES))
+        slow = ", ".join(f"{name} {us / 1000:.0f}" for name, us in slowest)
+        print(f"{module:24} {median:7.1f} ms   slowest: {slow}")
+        if heavy:
+            failures.append(f"{module} imports {', '.join(heavy)}")
+        if median > max_ms:
+            failures.append(f"{module} takes {median:.0f} ms (limit {max_ms:.0f})")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+    sys.exit(main(args.repeat, args.max_ms))
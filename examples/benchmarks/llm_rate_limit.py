@@ -0,0 +1,108 @@
+"""
+Benchmark agents sharing one API key under a requests-per-minute limit.
+
+A simulated endpoint allows --rpm requests per minute per key (a token
+bucket that starts drained, as for a key already in use) and answers 429
+when it is exceeded, with OpenAI style x-ratelimit-* and retry-after
+headers. Each agent sends its requests one after another; a request takes
+0.2 s. The baseline retries 429s with the random exponential backoff LLM
+used before (1 to 60 seconds, 6 attempts). With RateLimiter the agents
+share one limiter fed from the response headers.
+
+Usage:
+    python -m examples.benchmarks.llm_rate_limit --agents 8 --requests 5 --rpm 600
+"""
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from tenacity import wait_random_exponential
+
+from app.logger import logger
+from app.rate_limit import RateLimiter
+
+
+class SimulatedEndpoint:
+    def __init__(self, rpm: int):
+        self.rpm = rpm
+        self.available = 0.0
+        self.updated = time.monotonic()
+        self.rejected = 0
+
+    async def request(self) -> SimpleNamespace:
+        now = time.monotonic()
+        self.available = min(
+            self.rpm, self.available + (now - self.updated) * self.rpm / 60
+        )
+        self.updated = now
+        status = 200
+        if self.available < 1:
+            status = 429
+            self.rejected += 1
+        else:
+            self.available -= 1
+        reset = (1 - self.available) * 60 / self.rpm if self.available < 1 else 0
+        headers = {
+            "x-ratelimit-limit-requests": str(self.rpm),
+            "x-ratelimit-remaining-requests": str(int(self.available)),
+            "x-ratelimit-reset-requests": f"{max(reset, 0) * 1000:.0f}ms",
+        }
+        if status == 429:
+            headers["retry-after-ms"] = f"{reset * 1000:.0f}"
+        else:
+            await asyncio.sleep(0.2)
+        return SimpleNamespace(status_code=status, headers=headers)
+
+
+async def agent(endpoint, requests, limiter, failures):
+    backoff = wait_random_exponential(min=1, max=60)
+    for _ in range(requests):
+        for attempt in range(1, 7):
+            if limiter:
+                await limiter.acquire()
+            response = await endpoint.request()
+            if limiter:
+                await limiter.on_response(response)
+            if response.status_code != 429:
+                break
+            if attempt == 6:
+                failures.append(1)
+                break
+            if limiter:
+                await asyncio.sleep(random.uniform(0, 1))
+            else:
+                await asyncio.sleep(backoff(SimpleNamespace(attempt_number=attempt)))
+
+
+async def run(agents: int, requests: int, rpm: int, use_limiter: bool):
+    endpoint = SimulatedEndpoint(rpm)
+    limiter = RateLimiter() if use_limiter else None
+    failures = []
+    start = time.monotonic()
+    await asyncio.gather(
+        *(agent(endpoint, requests, limiter, failures) for _ in range(agents))
+    )
+    return time.monotonic() - start, endpoint.rejected, len(failures)
+
+
+async def main(agents: int, requests: int, rpm: int) -> None:
+    logger.remove()
+    ideal = agents * requests * 60 / rpm
+    print(f"{agents} agents x {requests} requests at {rpm} rpm (ideal {ideal:.1f}s)")
+    for label, use_limiter in [("backoff only", False), ("rate limiter", True)]:
+        elapsed, rejected, failed = await run(agents, requests, rpm, use_limiter)
+        print(
+            f"{label:<13} {elapsed:6.1f}s, {rejected:3d} responses were 429, "
+            f"{failed} requests failed"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--rpm", type=int, default=600)
+    args = parser.parse_args()
+    asyncio.run(main(args.agents, args.requests, args.rpm))
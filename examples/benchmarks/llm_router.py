@@ -0,0 +1,146 @@
+"""
+Benchmark request latency through the multi-endpoint LLM router.
+
+Three OpenAI compatible endpoints are simulated in process with httpx:
+"east" answers in ~40 ms but 5% of its requests stall for 800 ms, "west"
+answers in ~70 ms, and "gateway" answers in ~30 ms but fails 20% of its
+requests with a 500. Requests are sent four at a time through single
+endpoints (east, gateway), the router, and the router with hedging. Failed
+requests are counted, not retried.
+
+Usage:
+    python -m examples.benchmarks.llm_router --requests 400
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.llm_router import Endpoint, RouterClient
+from app.logger import logger
+from app.rate_limit import RateLimiter
+
+
+class SimulatedEndpoint:
+    def __init__(self, name, latency, stall_rate=0.0, error_rate=0.0):
+        self.name = name
+        self.latency = latency
+        self.stall_rate = stall_rate
+        self.error_rate = error_rate
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        latency = self.latency * random.uniform(0.8, 1.2)
+        if random.random() < self.stall_rate:
+            latency = 0.8
+        await asyncio.sleep(latency)
+        if random.random() < self.error_rate:
+            return httpx.Response(500, json={"error": {"message": "overloaded"}})
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": self.name},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 5,
+                    "completion_tokens": 1,
+                    "total_tokens": 6,
+                },
+            },
+        )
+
+    def endpoint(self) -> Endpoint:
+        limiter = RateLimiter()
+        client = AsyncOpenAI(
+            api_key="bench",
+            base_url=f"http://{self.name}.test/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(self.handle),
+                event_hooks={"response": [limiter.on_response]},
+            ),
+        )
+        return Endpoint(self.name, "gpt-4o", client, limiter)
+
+
+def simulated_endpoints():
+    return [
+        SimulatedEndpoint("east", 0.04, stall_rate=0.05),
+        SimulatedEndpoint("west", 0.07),
+        SimulatedEndpoint("gateway", 0.03, error_rate=0.2),
+    ]
+
+
+async def run(client, requests: int, concurrency: int = 4):
+    latencies, failures = [], 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.monotonic()
+            try:
+                await client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[{"role": "user", "content": "hi"}],
+                    max_tokens=10,
+                )
+                latencies.append(time.monotonic() - start)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, failures
+
+
+async def main(requests: int) -> None:
+    logger.remove()
+    random.seed(0)
+    clients = [
+        ("east only", simulated_endpoints()[0].endpoint().client),
+        ("gateway only", simulated_endpoints()[2].endpoint().client),
+        ("router", RouterClient([e.endpoint() for e in simulated_endpoints()])),
+        (
+            "router + hedge",
+            RouterClient([e.endpoint() for e in simulated_endpoints()], hedge=True),
+        ),
+    ]
+    for label, client in clients:
+        latencies, failures = await run(client, requests)
+        ordered = sorted(latencies)
+        p95 = ordered[int(len(ordered) * 0.95)]
+        p99 = ordered[int(len(ordered) * 0.99)]
+        print(
+            f"{label:<15} p50 {statistics.median(ordered) * 1000:5.0f} ms, "
+            f"p95 {p95 * 1000:5.0f} ms, p99 {p99 * 1000:5.0f} ms, "
+            f"{failures} failed"
+        )
+        if isinstance(client, RouterClient):
+            shares = ", ".join(
+                f"{s['endpoint']} {s['requests']}" for s in client.stats()
+            )
+            print(f"{'':<15} requests: {shares}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
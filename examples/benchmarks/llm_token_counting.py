@@ -0,0 +1,108 @@
+"""
+Benchmark LLM startup and the cost of counting prompt tokens.
+
+Measures, in a fresh interpreter, how long importing app.llm and creating
+an LLM takes now that the tokenizer is loaded lazily, and how long loading
+the tiktoken encoding takes (the work LLM() used to do up front; without
+network access or a cached encoding it fails). It then counts the tokens
+of a typical 40 message agent request with the fast estimate and, if the
+encoding is available, exactly.
+
+Usage:
+    python -m examples.benchmarks.llm_token_counting --repeat 200
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from app.llm import _APPROXIMATE_COUNTER
+from app.logger import logger
+from app.tokenizer import Tokenizer
+
+
+STARTUP = """
+import json, time
+start = time.perf_counter()
+from app.llm import LLM
+imported = time.perf_counter()
+llm = LLM()
+created = time.perf_counter()
+from app.logger import logger
+logger.remove()
+loaded = llm.tokenizer.exact
+done = time.perf_counter()
+print(json.dumps([imported - start, created - imported, done - created, loaded]))
+"""
+
+
+def request_messages():
+    messages = [{"role": "system", "content": "You are an agent. " * 40}]
+    for step in range(20):
+        messages.append(
+            {
+                "role": "assistant",
+                "content": f"Step {step}: I will look at the page.",
+                "tool_calls": [
+                    {
+                        "function": {
+                            "name": "browser_use",
+                            "arguments": json.dumps({"action": "click", "index": step}),
+                        }
+                    }
+                ],
+            }
+        )
+        messages.append(
+            {
+                "role": "tool",
+                "content": "Interactive elements:\n"
+                + "\n".join(
+                    f"[{i}]<a>Result {i} of page {step}</a>" for i in range(40)
+                ),
+                "tool_call_id": f"call_{step}",
+            }
+        )
+    return messages
+
+
+def timed(count, messages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tokens = count(messages)
+    return (time.perf_counter() - start) / repeat, tokens
+
+
+def main(repeat: int) -> None:
+    output = subprocess.run(
+        [sys.executable, "-c", STARTUP], capture_output=True, text=True, check=True
+    ).stdout
+    imported, created, loaded, exact = json.loads(output.strip().splitlines()[-1])
+    print(f"import app.llm   {imported * 1000:7.1f} ms")
+    print(f"LLM()            {created * 1000:7.1f} ms")
+    print(
+        f"load encoding    {loaded * 1000:7.1f} ms "
+        f"({'loaded' if exact else 'unavailable, estimates only'})"
+    )
+
+    logger.remove()
+    messages = request_messages()
+    seconds, tokens = timed(_APPROXIMATE_COUNTER.count_message_tokens, messages, repeat)
+    print(f"estimate         {seconds * 1e6:7.1f} us per request, {tokens} tokens")
+    tokenizer = Tokenizer("gpt-4o")
+    if tokenizer.exact:
+        from app.llm import TokenCounter
+
+        counter = TokenCounter(tokenizer)
+        seconds, tokens = timed(counter.count_message_tokens, messages, repeat)
+        print(f"exact            {seconds * 1e6:7.1f} us per request, {tokens} tokens")
+    else:
+        print("exact            unavailable (encoding not cached)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,78 @@
+"""
+Benchmark per-request agents against shared MCP sessions.
+
+Simulates an A2A server: each of --requests requests (--concurrency at a
+time) creates its own MCPClients, connects to --servers stdio servers,
+calls one tool on each and disconnects. The baseline gives every request
+servers of its own that are stopped when it ends, as agents used to; with
+the shared pool requests attach to the sessions already open. The servers
+are the ones of examples.benchmarks.mcp_startup.
+
+Usage:
+    python -m examples.benchmarks.mcp_session_pool --requests 20 --servers 2
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from examples.benchmarks.mcp_startup import server_args
+
+
+async def handle_request(servers: int, shared: bool) -> None:
+    from app.tool.mcp import MCPClients
+
+    # Distinct arguments make distinct servers
+    suffix = "" if shared else f"-{id(asyncio.current_task())}"
+    clients = MCPClients()
+    await asyncio.gather(
+        *(
+            clients.connect_stdio(
+                sys.executable, server_args(f"s{i}{suffix}", 0), f"s{i}"
+            )
+            for i in range(servers)
+        )
+    )
+    for i in range(servers):
+        result = await clients.execute(name=f"mcp_s{i}_echo", tool_input={"text": "x"})
+        assert result.output == "x", result
+    await clients.disconnect()
+
+
+async def run(requests: int, concurrency: int, servers: int, shared: bool):
+    from app.tool import mcp
+    from app.tool.mcp_pool import MCPSessionPool
+
+    pool = mcp.MCP_POOL = MCPSessionPool(idle_timeout=300 if shared else 0)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            await handle_request(servers, shared)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await pool.close()
+    return elapsed
+
+
+async def main(requests: int, concurrency: int, servers: int) -> None:
+    from app.logger import logger
+
+    logger.remove()
+    for label, shared in (("server per agent", False), ("shared pool", True)):
+        elapsed = await run(requests, concurrency, servers, shared)
+        print(
+            f"{label:16} {elapsed:6.2f} s total, "
+            f"{elapsed / requests * 1000:7.1f} ms per request"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--servers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.servers))
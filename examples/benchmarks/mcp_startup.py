@@ -0,0 +1,90 @@
+"""
+Benchmark connecting to several stdio MCP servers at agent startup.
+
+Starts --servers copies of a small MCP server that each take --delay seconds
+to start, and times connecting to all of them one after another (as agents
+used to) and concurrently (as Manus.initialize_mcp_servers does now). The
+servers are processes of this module run with --serve, which import only
+mcp. On a machine with fewer cores than servers their interpreter startup
+still competes for CPU.
+
+Usage:
+    python -m examples.benchmarks.mcp_startup --servers 6 --delay 1.0
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+
+def serve(name: str, delay: float) -> None:
+    from mcp.server.fastmcp import FastMCP
+
+    # Stands in for a server's own startup work
+    time.sleep(delay)
+    server = FastMCP(name)
+
+    @server.tool()
+    def echo(text: str) -> str:
+        """Echo the text back."""
+        return text
+
+    server.run()
+
+
+def server_args(name: str, delay: float) -> list:
+    return ["-m", "examples.benchmarks.mcp_startup", "--serve", name, str(delay)]
+
+
+async def sequential(servers: int, delay: float) -> float:
+    from app.tool.mcp import MCPClients
+
+    clients = MCPClients()
+    start = time.perf_counter()
+    for i in range(servers):
+        await clients.connect_stdio(
+            sys.executable, server_args(f"s{i}", delay), f"s{i}"
+        )
+    elapsed = time.perf_counter() - start
+    await clients.disconnect()
+    return elapsed
+
+
+async def concurrent(servers: int, delay: float) -> float:
+    from app.tool.mcp import MCPClients
+
+    clients = MCPClients()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            clients.connect_stdio(
+                sys.executable, server_args(f"s{i}", delay), f"s{i}", timeout=60
+            )
+            for i in range(servers)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    await clients.disconnect()
+    return elapsed
+
+
+async def main(servers: int, delay: float) -> None:
+    from app.logger import logger
+
+    logger.remove()
+    one = await sequential(1, delay)
+    print(f"one server       {one:6.2f} s")
+    print(f"sequential       {await sequential(servers, delay):6.2f} s")
+    print(f"concurrent       {await concurrent(servers, delay):6.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--servers", type=int, default=6)
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--serve", nargs=2, metavar=("NAME", "DELAY"))
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve[0], float(args.serve[1]))
+    else:
+        asyncio.run(main(args.servers, args.delay))
@@ -0,0 +1,81 @@
+"""
+Benchmark the time an MCP agent step spends on tool discovery.
+
+Connects to a stdio server with --tools tools and times --steps tool
+refreshes done the way MCPAgent used to (listing every tool from the server
+and comparing the input schemas with the previous ones) and by reading the
+session's tool catalog, which is updated in the background when the server
+announces a change.
+
+Usage:
+    python -m examples.benchmarks.mcp_tool_catalog --tools 50 --steps 200
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+
+def serve(tools: int) -> None:
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP("catalog")
+
+    def lookup(query: str, limit: int = 10, exact: bool = False) -> str:
+        """Look something up."""
+        return query
+
+    for i in range(tools):
+        server.add_tool(lookup, name=f"lookup_{i}")
+    server.run()
+
+
+def server_args(tools: int) -> list:
+    return ["-m", "examples.benchmarks.mcp_tool_catalog", "--serve", str(tools)]
+
+
+async def poll_step(clients, schemas: dict) -> dict:
+    response = await clients.list_tools()
+    current = {tool.name: tool.inputSchema for tool in response.tools}
+    _ = [
+        name
+        for name in current.keys() & schemas.keys()
+        if current[name] != schemas[name]
+    ]
+    return current
+
+
+async def main(tools: int, steps: int) -> None:
+    from app.logger import logger
+    from app.tool.mcp import MCPClients
+
+    logger.remove()
+    clients = MCPClients()
+    await clients.connect_stdio(sys.executable, server_args(tools), "catalog")
+
+    schemas = {}
+    start = time.perf_counter()
+    for _ in range(steps):
+        schemas = await poll_step(clients, schemas)
+    polled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        clients.sync_tools()
+    synced = time.perf_counter() - start
+
+    await clients.disconnect()
+    for label, elapsed in (("list_tools", polled), ("catalog", synced)):
+        print(f"{label:12} {elapsed / steps * 1000:8.3f} ms per step")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tools", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--serve", type=int, metavar="TOOLS")
+    args = parser.parse_args()
+    if args.serve is not None:
+        serve(args.serve)
+    else:
+        asyncio.run(main(args.tools, args.steps))
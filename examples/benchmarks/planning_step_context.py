@@ -0,0 +1,89 @@
+"""
+Benchmark prompt tokens per plan step with shared vs. scoped step context.
+
+Runs a sequential plan through PlanningFlow with a simulated executor. Each
+agent step "calls the model" with its whole memory as the prompt, then adds a
+tool result of a fixed size, as a browsing or coding step would. Prompt size
+is measured in tokens with tiktoken when its encoding is available, otherwise
+estimated as characters / 4.
+
+Usage:
+    python -m examples.benchmarks.planning_step_context --steps 6 --tool-chars 6000
+"""
+import argparse
+import asyncio
+
+from app.agent.base import BaseAgent
+from app.flow.planning import PlanningFlow
+from app.llm import LLM
+from app.schema import Message
+from app.tool import PlanningTool
+
+
+def make_counter():
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        return lambda text: len(text) // 4
+
+
+class SimulatedExecutor(BaseAgent):
+    """Agent whose every model call sends its full memory as the prompt."""
+
+    calls_per_step: int = 3
+    tool_chars: int = 6000
+
+    async def step(self) -> str:
+        prompt = "\n".join(m.content or "" for m in self.memory.messages)
+        self.llm.update_token_count(self.llm.counter(prompt))
+        self.memory.add_message(Message.assistant_message("Calling a tool"))
+        self.memory.add_message(
+            Message.tool_message(
+                "x " * (self.tool_chars // 2), name="tool", tool_call_id="call"
+            )
+        )
+        if self.current_step >= self.calls_per_step:
+            self.state = self.state.FINISHED
+        return f"Finished part of the task after {self.current_step} calls"
+
+
+async def run(mode: str, steps: int, tool_chars: int) -> dict:
+    llm = object.__new__(LLM)
+    llm.total_input_tokens = llm.total_completion_tokens = 0
+    llm.counter = make_counter()
+    executor = SimulatedExecutor(name="executor", llm=llm, tool_chars=tool_chars)
+    flow = PlanningFlow(
+        {"executor": executor},
+        llm=llm,
+        planning_tool=PlanningTool(),
+        step_context=mode,
+        plan_store=None,
+    )
+    await flow.planning_tool.execute(
+        command="create",
+        plan_id=flow.active_plan_id,
+        title="benchmark",
+        steps=[f"Step {i}" for i in range(steps)],
+    )
+    await flow._execute_ready_steps()
+    return flow.step_prompt_tokens
+
+
+async def main(steps: int, tool_chars: int) -> None:
+    shared = await run("shared", steps, tool_chars)
+    scoped = await run("scoped", steps, tool_chars)
+    print(f"{'step':>4} {'shared':>10} {'scoped':>10}")
+    for index in sorted(shared):
+        print(f"{index:>4} {shared[index]:>10} {scoped[index]:>10}")
+    print(f"{'sum':>4} {sum(shared.values()):>10} {sum(scoped.values()):>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--tool-chars", type=int, default=6000)
+    args = parser.parse_args()
+    asyncio.run(main(args.steps, args.tool_chars))
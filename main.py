@@ -1,6 +1,8 @@
 import argparse
 import asyncio
+import time
 
+from app.agent.checkpoint import AgentCheckpointer
 from app.agent.manus import Manus
 from app.logger import logger
 
@@ -11,17 +13,46 @@ async def main():
     parser.add_argument(
         "--prompt", type=str, required=False, help="Input prompt for the agent"
     )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Restore a checkpointed run and continue it",
+    )
     args = parser.parse_args()
 
     # Create and initialize Manus agent
     agent = await Manus.create()
+    run_id = args.resume or time.strftime("%Y%m%d-%H%M%S")
+    checkpointer = AgentCheckpointer.from_config(run_id)
     try:
-        # Use command line prompt if provided, otherwise ask for input
-        prompt = args.prompt if args.prompt else input("Enter your prompt: ")
-        if not prompt.strip():
-            logger.warning("Empty prompt provided.")
-            return
+        if args.resume:
+            if checkpointer is None:
+                logger.error(
+                    "Checkpoints are disabled; set enabled = true under "
+                    "[checkpoint] in the config to resume runs"
+                )
+                return
+            state = await checkpointer.restore(agent)
+            if state is None:
+                logger.error(f"No checkpoint found for run {run_id}")
+                return
+            if state["finished"]:
+                logger.info(f"Run {run_id} has already finished.")
+                return
+            prompt = None
+        else:
+            # Use command line prompt if provided, otherwise ask for input
+            prompt = args.prompt if args.prompt else input("Enter your prompt: ")
+            if not prompt.strip():
+                logger.warning("Empty prompt provided.")
+                return
 
+        if checkpointer:
+            agent.checkpointer = checkpointer
+            logger.info(
+                f"Checkpointing run {run_id}; continue it with: "
+                f"python main.py --resume {run_id}"
+            )
         logger.warning("Processing your request...")
         await agent.run(prompt)
         logger.info("Request processing completed.")
@@ -0,0 +1,14 @@
+# coding: utf-8
+# A shortcut to launch the shared OpenManus browser daemon that browser tools attach to over CDP.
+import asyncio
+
+from app.tool.browser_daemon import parse_args, run_daemon
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        asyncio.run(run_daemon(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
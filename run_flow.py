@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import time
 
@@ -9,38 +10,54 @@ from app.logger import logger
 
 
 async def run_flow():
+    parser = argparse.ArgumentParser(description="Run a planning flow")
+    parser.add_argument(
+        "--resume",
+        metavar="PLAN_ID",
+        help="Continue a stored plan, skipping the steps it already completed",
+    )
+    args = parser.parse_args()
+
     agents = {
         "manus": Manus(),
     }
     if config.run_flow_config.use_data_analysis_agent:
         agents["data_analysis"] = DataAnalysis()
     try:
-        prompt = input("Enter your prompt: ")
-
-        if prompt.strip().isspace() or not prompt:
-            logger.warning("Empty prompt provided.")
-            return
-
         flow = FlowFactory.create_flow(
             flow_type=FlowType.PLANNING,
             agents=agents,
         )
+        if args.resume:
+            run = flow.resume(args.resume)
+        else:
+            prompt = input("Enter your prompt: ")
+
+            if prompt.strip().isspace() or not prompt:
+                logger.warning("Empty prompt provided.")
+                return
+            run = flow.execute(prompt)
         logger.warning("Processing your request...")
 
+        # Hard stop for the entire execution: the time budget plus a margin
+        # for wrapping up, or 60 minutes
+        budget_seconds = config.budget_config.max_seconds
+        timeout = budget_seconds * 1.1 if budget_seconds else 3600
         try:
             start_time = time.time()
-            result = await asyncio.wait_for(
-                flow.execute(prompt),
-                timeout=3600,  # 60 minute timeout for the entire execution
-            )
+            result = await asyncio.wait_for(run, timeout=timeout)
             elapsed_time = time.time() - start_time
             logger.info(f"Request processed in {elapsed_time:.2f} seconds")
             logger.info(result)
         except asyncio.TimeoutError:
-            logger.error("Request processing timed out after 1 hour")
+            logger.error(f"Request processing timed out after {timeout:.0f} seconds")
             logger.info(
                 "Operation terminated due to timeout. Please try a simpler request."
             )
+            if flow.plan_store:
+                logger.info(
+                    f"Continue it with: python run_flow.py --resume {flow.active_plan_id}"
+                )
 
     except KeyboardInterrupt:
         logger.info("Operation cancelled by user.")
@@ -0,0 +1,168 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.base import BaseAgent
+from app.agent.checkpoint import AgentCheckpointer
+from app.llm import LLM
+from app.schema import Message
+from app.tool import ToolCollection
+from app.tool.browser_use_tool import BrowserUseTool
+from app.tool.str_replace_editor import StrReplaceEditor
+
+
+FAKE_LLM = object.__new__(LLM)
+SCREENSHOT = "iVBORw0KGgo" * 500
+
+
+class EditingAgent(BaseAgent):
+    available_tools: ToolCollection = None
+
+    async def step(self) -> str:
+        editor = self.available_tools.get_tool("str_replace_editor")
+        editor._file_history["/tmp/notes.txt"].append("x" * 2000)
+        self.memory.add_message(Message.assistant_message(f"step {self.current_step}"))
+        self.memory.add_message(
+            Message.user_message("screenshot", base64_image=SCREENSHOT)
+        )
+        if self.current_step == 3:
+            self.state = self.state.FINISHED
+        return "ok"
+
+
+def _agent(checkpointer=None):
+    return EditingAgent(
+        name="editor",
+        llm=FAKE_LLM,
+        available_tools=ToolCollection(StrReplaceEditor()),
+        checkpointer=checkpointer,
+    )
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_round_trip(tmp_path):
+    agent = _agent(AgentCheckpointer(tmp_path))
+    await agent.run("edit the notes")
+
+    # Each message is logged once; identical blobs are stored once
+    log = (tmp_path / "messages.jsonl").read_text().splitlines()
+    assert len(log) == 7
+    assert SCREENSHOT not in (tmp_path / "state.json").read_text()
+    assert len(list((tmp_path / "blobs").iterdir())) == 2
+
+    restored = _agent()
+    state = await AgentCheckpointer(tmp_path).restore(restored)
+
+    assert state["finished"]
+    assert restored.current_step == 3
+    assert [m.to_dict() for m in restored.memory.messages] == [
+        m.to_dict() for m in agent.memory.messages
+    ]
+    editor = restored.available_tools.get_tool("str_replace_editor")
+    assert editor._file_history["/tmp/notes.txt"] == ["x" * 2000] * 3
+
+
+@pytest.mark.asyncio
+async def test_restored_run_appends_to_the_same_log(tmp_path):
+    agent = _agent()
+    agent.memory.add_message(Message.user_message("first"))
+    checkpointer = AgentCheckpointer(tmp_path)
+    await checkpointer.save(agent)
+
+    restored = _agent()
+    checkpointer = AgentCheckpointer(tmp_path)
+    await checkpointer.restore(restored)
+    restored.memory.add_message(Message.assistant_message("second"))
+    await checkpointer.save(restored)
+
+    assert len((tmp_path / "messages.jsonl").read_text().splitlines()) == 2
+    final = _agent()
+    await AgentCheckpointer(tmp_path).restore(final)
+    assert [m.content for m in final.memory.messages] == ["first", "second"]
+    assert await AgentCheckpointer(tmp_path / "missing").restore(final) is None
+
+
+class FakeBrowserContext:
+    def __init__(self, *urls):
+        self.pages = [SimpleNamespace(url=url) for url in urls]
+        self.current = 0
+
+    async def get_current_page(self):
+        return self.pages[self.current]
+
+    async def get_session(self):
+        return SimpleNamespace(context=SimpleNamespace(pages=self.pages))
+
+
+class FakeBrowserTool(BrowserUseTool):
+    async def execute(self, action, url=None, tab_id=None, **kwargs):
+        if action == "go_to_url":
+            self.context.pages[self.context.current].url = url
+        elif action == "open_tab":
+            self.context.pages.append(SimpleNamespace(url=url))
+            self.context.current = len(self.context.pages) - 1
+        elif action == "switch_tab":
+            self.context.current = tab_id
+
+
+@pytest.mark.asyncio
+async def test_restored_browser_switches_to_the_checkpointed_tab():
+    tool = FakeBrowserTool(llm=FAKE_LLM)
+    # The restored browser already has a second tab open
+    tool.context = FakeBrowserContext("about:blank", "https://other.test")
+
+    await tool.restore_state(
+        {
+            "tabs": [
+                "about:blank",
+                "https://a.test",
+                "https://b.test",
+                "https://a.test",
+            ],
+            "active_tab": 3,
+        }
+    )
+
+    urls = [page.url for page in tool.context.pages]
+    assert urls == [
+        "https://a.test",
+        "https://other.test",
+        "https://b.test",
+        "https://a.test",
+    ]
+    assert tool.context.current == 3
+
+
+async def _summarize(summary, evicted):
+    return f"{summary or ''}+{len(evicted)}"
+
+
+@pytest.mark.asyncio
+async def test_memory_summary_and_evicted_messages_are_restored(tmp_path):
+    agent = _agent()
+    agent.memory.max_messages = 3
+    agent.memory.compactor = _summarize
+    for i in range(5):
+        agent.memory.add_message(Message.user_message(f"message {i}"))
+    await agent.memory.compact()
+    for i in range(5, 7):
+        agent.memory.add_message(Message.user_message(f"message {i}"))
+    assert agent.memory.pending_compaction
+    await AgentCheckpointer(tmp_path).save(agent)
+
+    restored = _agent()
+    restored.memory.max_messages = 3
+    restored.memory.compactor = _summarize
+    await AgentCheckpointer(tmp_path).restore(restored)
+
+    memory = restored.memory
+    assert memory.summary == "+2"
+    assert [m.content for m in memory.messages] == [
+        m.content for m in agent.memory.messages
+    ]
+    assert [m.content for m in memory.evicted_messages] == ["message 2", "message 3"]
+    # The summary stays in its slot instead of being evicted like a message
+    memory.add_message(Message.user_message("message 7"))
+    await memory.compact()
+    assert memory.summary == "+2+3"
+    assert memory.messages[0].content.endswith("+2+3")
@@ -0,0 +1,61 @@
+import base64
+import copy
+import gc
+
+from app.image_store import ImageStore, image_store
+from app.llm import IMAGE_PLACEHOLDER, LLM
+from app.schema import Memory, Message
+
+
+def _image(seed: int) -> str:
+    return base64.b64encode(bytes([seed]) * 3000).decode()
+
+
+def test_images_are_stored_once_and_released_with_their_messages():
+    before = len(image_store)
+    first = Message.user_message("shot", base64_image=_image(1))
+    second = Message.tool_message(
+        "shot", name="browser_use", tool_call_id="c", base64_image=_image(1)
+    )
+    copied = copy.deepcopy(first)
+
+    assert first.image == second.image
+    assert len(image_store) == before + 1
+    assert copied.base64_image == _image(1)
+
+    del first, second
+    gc.collect()
+    assert len(image_store) == before + 1
+    del copied
+    gc.collect()
+    assert len(image_store) == before
+
+
+def test_memory_eviction_frees_images():
+    before = len(image_store)
+    memory = Memory(max_messages=2)
+    for i in range(5):
+        memory.add_message(Message.user_message(f"step {i}", base64_image=_image(i)))
+    gc.collect()
+    assert len(image_store) == before + 2
+
+
+def test_non_base64_text_round_trips():
+    store = ImageStore()
+    ref = store.put("not base64!")
+    assert ref.base64() == "not base64!"
+    assert store.nbytes == len("not base64!")
+
+
+def test_only_recent_images_are_sent():
+    messages = [
+        Message.user_message(f"step {i}", base64_image=_image(i)) for i in range(4)
+    ]
+    formatted = LLM.format_messages(messages, supports_images=True, max_images=2)
+
+    assert [m["content"] for m in formatted[:2]] == [
+        f"step 0\n{IMAGE_PLACEHOLDER}",
+        f"step 1\n{IMAGE_PLACEHOLDER}",
+    ]
+    assert formatted[3]["content"][1]["image_url"]["url"].endswith(_image(3))
+    assert all("base64_image" not in m for m in formatted)
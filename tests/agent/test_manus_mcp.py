@@ -0,0 +1,79 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent import manus as manus_module
+from app.agent.manus import Manus
+from app.config import MCPServerConfig, MCPSettings
+
+
+def stdio_server(delay: float, **kwargs) -> MCPServerConfig:
+    return MCPServerConfig(type="stdio", command="server", args=[str(delay)], **kwargs)
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Replace MCP connections with sleeps of the server's delay."""
+    connected = []
+
+    async def connect_mcp_server(
+        self, server_url, server_id="", use_stdio=False, stdio_args=None, timeout=None
+    ):
+        await asyncio.wait_for(asyncio.sleep(float(stdio_args[0])), timeout)
+        connected.append(server_id)
+
+    monkeypatch.setattr(Manus, "connect_mcp_server", connect_mcp_server)
+    return connected
+
+
+def use_servers(monkeypatch, servers, connect_timeout=30.0):
+    settings = MCPSettings(servers=servers, connect_timeout=connect_timeout)
+    monkeypatch.setattr(manus_module, "config", SimpleNamespace(mcp_config=settings))
+
+
+@pytest.mark.asyncio
+async def test_servers_connect_concurrently(monkeypatch, connections):
+    use_servers(monkeypatch, {f"s{i}": stdio_server(0.2) for i in range(5)})
+
+    start = time.monotonic()
+    await Manus().initialize_mcp_servers()
+
+    assert time.monotonic() - start < 0.5
+    assert sorted(connections) == [f"s{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_slow_server_times_out_alone(monkeypatch, connections):
+    use_servers(
+        monkeypatch,
+        {
+            "fast": stdio_server(0.05),
+            "slow": stdio_server(10, timeout=0.2),
+            "default": stdio_server(10),
+        },
+        connect_timeout=0.3,
+    )
+
+    start = time.monotonic()
+    await Manus().initialize_mcp_servers()
+
+    assert time.monotonic() - start < 1
+    assert connections == ["fast"]
+
+
+@pytest.mark.asyncio
+async def test_lazy_server_connects_in_background(monkeypatch, connections):
+    use_servers(
+        monkeypatch,
+        {"eager": stdio_server(0), "lazy": stdio_server(0.2, lazy=True)},
+    )
+    agent = Manus()
+
+    await agent.initialize_mcp_servers()
+    assert connections == ["eager"]
+
+    await asyncio.gather(*agent._background_connections)
+    assert connections == ["eager", "lazy"]
+    assert not agent._background_connections
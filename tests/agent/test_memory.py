@@ -0,0 +1,62 @@
+import pytest
+
+from app.agent.compaction import ExtractiveCompactor
+from app.schema import Function, Memory, Message, ToolCall
+
+
+def _tool_round(i, output_chars=400):
+    call = ToolCall(id=f"call_{i}", function=Function(name="search", arguments="{}"))
+    return [
+        Message.from_tool_calls(tool_calls=[call], content=f"round {i}"),
+        Message.tool_message("r" * output_chars, name="search", tool_call_id=call.id),
+    ]
+
+
+def test_eviction_keeps_tool_calls_with_their_results():
+    memory = Memory(max_tokens=500)
+    for i in range(10):
+        memory.add_messages(_tool_round(i))
+
+    messages = memory.messages
+    assert memory.tokens <= 500
+    assert messages[0].tool_calls and messages[0].content == "round 6"
+    assert [m.role for m in messages] == ["assistant", "tool"] * 4
+
+    memory = Memory(max_messages=3)
+    for i in range(3):
+        memory.add_messages(_tool_round(i))
+    assert [m.role for m in memory.messages] == ["assistant", "tool"]
+
+
+def test_oversized_message_is_truncated():
+    memory = Memory(max_tokens=100)
+    memory.add_message(Message.user_message("x" * 10_000))
+
+    content = memory.messages[0].content
+    assert len(content) < 300
+    assert "characters omitted" in content
+
+
+@pytest.mark.asyncio
+async def test_compaction_summarizes_evicted_messages():
+    memory = Memory(max_tokens=500, compactor=ExtractiveCompactor(max_chars=300))
+    memory.add_message(Message.user_message("Find the release date"))
+    for i in range(6):
+        memory.add_messages(_tool_round(i))
+    assert memory.pending_compaction
+
+    await memory.compact()
+    messages = memory.messages
+    assert messages[0].content.startswith("Summary of the earlier conversation:")
+    assert "Find the release date" in memory.summary
+    assert "called search({})" in memory.summary
+    assert memory.tokens <= 500
+    assert messages[1].role == "assistant"
+
+    # Replacing the messages without the summary drops it
+    memory.messages = messages[1:]
+    assert memory.summary is None
+
+    before = memory.tokens
+    assert await memory.shrink()
+    assert memory.tokens < before
@@ -0,0 +1,151 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.browser import BrowserContextHelper
+from app.agent.toolcall import ToolCallAgent
+from app.llm import LLM
+from app.schema import Function, Message, ToolCall
+from app.tool import BaseTool, ToolCollection
+
+
+class EchoTool(BaseTool):
+    name: str = "echo"
+    description: str = "Echo the text"
+    parameters: dict = {
+        "type": "object",
+        "properties": {"text": {"type": "string"}},
+    }
+
+    async def execute(self, text: str = "") -> str:
+        return text
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.requests = []
+
+    async def ask_tool(self, messages, **kwargs):
+        self.requests.append(list(messages))
+        step = len(self.requests)
+        call = ToolCall(
+            id=f"call_{step}",
+            function=Function(name="echo", arguments=json.dumps({"text": f"r{step}"})),
+        )
+        return SimpleNamespace(content="", tool_calls=[call])
+
+
+class StatefulAgent(ToolCallAgent):
+    async def think(self) -> bool:
+        self.next_step_prompt = f"state at step {self.current_step}"
+        return await super().think()
+
+
+def _agent(recorder, **kwargs):
+    llm = object.__new__(LLM)
+    llm.ask_tool = recorder.ask_tool
+    return StatefulAgent(
+        name="stateful",
+        llm=llm,
+        available_tools=ToolCollection(EchoTool()),
+        max_steps=4,
+        **kwargs,
+    )
+
+
+def _prompts(messages):
+    return [m.content for m in messages if (m.content or "").startswith("state")]
+
+
+@pytest.mark.asyncio
+async def test_step_prompts_are_sent_but_not_stored():
+    recorder = RecordingLLM()
+    agent = _agent(recorder, ephemeral_step_context=True, keep_step_context=2)
+    await agent.run("do the task")
+
+    assert _prompts(agent.memory.messages) == []
+    assert [_prompts(request) for request in recorder.requests] == [
+        ["state at step 1"],
+        ["state at step 1", "state at step 2"],
+        ["state at step 2", "state at step 3"],
+        ["state at step 3", "state at step 4"],
+    ]
+    # Each kept prompt stays where it was given: after the previous tool result
+    last = recorder.requests[-1]
+    index = last.index(next(m for m in last if m.content == "state at step 4"))
+    assert last[index - 1].role == "tool" and last[index - 1].content.endswith("r3")
+    assert last[-1].content == "state at step 4"
+
+
+@pytest.mark.asyncio
+async def test_step_prompts_are_stored_when_not_ephemeral():
+    recorder = RecordingLLM()
+    agent = _agent(recorder, ephemeral_step_context=False)
+    await agent.run("do the task")
+
+    assert len(_prompts(agent.memory.messages)) == 4
+    assert len(_prompts(recorder.requests[-1])) == 4
+
+
+def test_full_element_list_stays_pinned_for_diffs():
+    agent = _agent(RecordingLLM(), ephemeral_step_context=True, keep_step_context=1)
+    agent.memory.add_message(Message.user_message("do the task"))
+    helper = BrowserContextHelper(agent=agent)
+    url = "https://example.com/"
+    elements = "[0]<a >Home />\n[1]<a >Next />"
+
+    assert helper.format_elements(url, elements) == " (full list above)"
+    first = agent._request_messages()
+    for step in range(3):
+        changed = elements.replace("Next", f"Page {step}")
+        assert "~ [1]<a >Page" in helper.format_elements(url, changed)
+        agent.add_step_context(Message.user_message(f"state at step {step}"))
+        request = agent._request_messages()
+        # The full list stays in the request though only one step is kept
+        assert request[1] is first[1]
+        assert request[1].content.endswith(elements)
+        assert _prompts(request) == [f"state at step {step}"]
+
+    # A new page replaces the pinned list
+    assert helper.format_elements(url + "next", elements) == " (full list above)"
+    request = agent._request_messages()
+    pinned = [m for m in request if m.content.startswith("Interactive elements")]
+    assert len(pinned) == 1
+    assert pinned[0].content.startswith(f"Interactive elements of {url}next")
+
+
+def test_pinned_context_is_sent_until_replaced():
+    agent = _agent(RecordingLLM(), ephemeral_step_context=True, keep_step_context=1)
+    agent.memory.add_message(Message.user_message("do the task"))
+
+    agent.add_step_context(Message.user_message("shot 1"), pin="screenshot")
+    agent._request_messages()
+    agent.memory.add_message(Message.assistant_message("step 1"))
+    # Skipped screenshot: the pinned one is still sent
+    assert [m.content for m in agent._request_messages()] == [
+        "do the task",
+        "shot 1",
+        "step 1",
+    ]
+
+    agent.add_step_context(Message.user_message("shot 2"), pin="screenshot")
+    assert [m.content for m in agent._request_messages()][1:] == ["step 1", "shot 2"]
+    agent.unpin_step_context("screenshot")
+    assert [m.content for m in agent._request_messages()] == ["do the task", "step 1"]
+
+
+@pytest.mark.asyncio
+async def test_unused_browser_has_no_state(monkeypatch):
+    from app.agent import browser
+    from app.tool.browser_use_tool import BrowserUseTool
+
+    warnings = []
+    monkeypatch.setattr(browser.logger, "warning", warnings.append)
+    agent = _agent(RecordingLLM())
+    agent.available_tools.add_tool(BrowserUseTool)
+    helper = BrowserContextHelper(agent=agent)
+
+    assert await helper.get_browser_state() is None
+    assert agent.available_tools.get_tool("browser_use", create=False) is None
+    assert warnings == []
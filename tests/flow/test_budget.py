@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.agent.base import BaseAgent
+from app.budget import Budget, BudgetLevel, charge_tokens, use_budget
+from app.flow.planning import PlanningFlow
+from app.llm import LLM
+from app.tool import PlanningTool
+
+
+FAKE_LLM = object.__new__(LLM)
+
+
+class SpendingAgent(BaseAgent):
+    tokens_per_step: int = 60
+
+    async def step(self) -> str:
+        charge_tokens(self.tokens_per_step, 0)
+        await asyncio.sleep(0)
+        return "spent"
+
+
+def test_levels_and_child_shares():
+    budget = Budget(name="run", max_tokens=1000)
+    child = budget.child("step", token_share=4)
+    assert child.max_tokens == 250
+
+    child.charge(200)
+    assert budget.spent_tokens == 200
+    assert child.level == BudgetLevel.LOW
+    child.charge(30)
+    assert child.level == BudgetLevel.CRITICAL
+    child.charge(20)
+    assert child.level == BudgetLevel.EXHAUSTED
+    assert budget.level == BudgetLevel.NORMAL
+
+
+@pytest.mark.asyncio
+async def test_agent_stops_when_budget_is_exhausted():
+    agent = SpendingAgent(name="spender", llm=FAKE_LLM)
+    with use_budget(Budget(name="run", max_tokens=100)) as budget:
+        result = await agent.run("go")
+
+    assert result.count("spent") == 2
+    assert "Terminated: Budget exhausted" in result
+    assert budget.spent_tokens == 120
+
+
+@pytest.mark.asyncio
+async def test_parallel_steps_are_charged_to_their_own_budgets():
+    agents = {
+        f"agent{i}": SpendingAgent(name=f"agent{i}", llm=FAKE_LLM, max_steps=1)
+        for i in range(2)
+    }
+    agents["agent1"].tokens_per_step = 30
+    flow = PlanningFlow(
+        agents,
+        llm=FAKE_LLM,
+        planning_tool=PlanningTool(),
+        plan_store=None,
+        step_context="shared",
+    )
+    await flow.planning_tool.execute(
+        command="create",
+        plan_id=flow.active_plan_id,
+        title="test",
+        steps=["a", "b"],
+        step_dependencies=[[], []],
+    )
+    with use_budget(Budget(name="run", max_tokens=400)) as flow.budget:
+        await flow._execute_ready_steps()
+
+    assert flow.step_budgets[0].max_tokens == 200
+    assert flow.step_budgets[0].spent_tokens == 60
+    assert flow.step_budgets[1].spent_tokens == 30
+    report = flow.budget_report().splitlines()
+    assert report[0].startswith("run: 90/400 tokens")
+    assert report[1].startswith("step 0: 60/200 tokens")
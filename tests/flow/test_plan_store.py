@@ -0,0 +1,76 @@
+import pytest
+
+from app.agent.base import BaseAgent
+from app.flow.plan_store import PlanStore
+from app.flow.planning import PlanningFlow
+from app.llm import LLM
+from app.tool import PlanningTool
+
+
+FAKE_LLM = object.__new__(LLM)
+FAKE_LLM.total_input_tokens = 0
+
+
+class RecordingAgent(BaseAgent):
+    ran: list = []
+
+    async def step(self) -> str:
+        self.ran.append(self.memory.messages[-1].content)
+        self.state = self.state.FINISHED
+        return "step done"
+
+
+def _plan(steps):
+    return {
+        "plan_id": "plan_1",
+        "title": "test",
+        "steps": steps,
+        "step_statuses": ["not_started"] * len(steps),
+        "step_notes": [""] * len(steps),
+        "step_dependencies": [[]] + [[i] for i in range(len(steps) - 1)],
+    }
+
+
+def test_journal_replays_plan_and_ignores_truncated_line(tmp_path):
+    store = PlanStore(tmp_path)
+    store.save_plan("plan_1", _plan(["a", "b"]), request="do it")
+    store.record_step("plan_1", 0, "in_progress")
+    store.record_step("plan_1", 0, "completed", notes="ok", result="full result")
+    with open(tmp_path / "plan_1.jsonl", "a") as f:
+        f.write('{"event": "step", "index": 1, "sta')
+
+    record = store.load("plan_1")
+    assert record.request == "do it"
+    assert record.plan["step_statuses"] == ["completed", "not_started"]
+    assert record.plan["step_notes"][0] == "ok"
+    assert record.step_results == {0: "full result"}
+    assert [r.plan_id for r in store.list_plans()] == ["plan_1"]
+    assert store.load("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_completed_steps(tmp_path, monkeypatch):
+    async def no_summary(self):
+        return "summary"
+
+    monkeypatch.setattr(PlanningFlow, "_finalize_plan", no_summary)
+    store = PlanStore(tmp_path)
+    store.save_plan("plan_1", _plan(["first", "second"]))
+    store.record_step("plan_1", 0, "completed", notes="done", result="first result")
+    store.record_step("plan_1", 1, "in_progress")
+
+    agent = RecordingAgent(name="agent", llm=FAKE_LLM, ran=[])
+    flow = PlanningFlow(
+        {"agent": agent},
+        llm=FAKE_LLM,
+        planning_tool=PlanningTool(),
+        plan_store=store,
+        step_context="shared",
+    )
+    result = await flow.resume("plan_1")
+
+    assert len(agent.ran) == 1 and 'step 1: "second"' in agent.ran[0]
+    assert result == "first result\nStep 1: step done\nsummary"
+    record = store.load("plan_1")
+    assert record.plan["step_statuses"] == ["completed", "completed"]
+    assert record.step_results[1] == "Step 1: step done"
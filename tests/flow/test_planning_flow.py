@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from app.agent.base import BaseAgent
+from app.flow.planning import PlanningFlow
+from app.llm import LLM
+from app.schema import Message
+from app.tool import PlanningTool
+
+
+# Bypass LLM.__init__ (it needs API config and a tokenizer); the flow and
+# agents under test never call the model
+FAKE_LLM = object.__new__(LLM)
+FAKE_LLM.total_input_tokens = 0
+
+
+class SleepyAgent(BaseAgent):
+    log: list = []
+    seen: list = []
+
+    async def step(self) -> str:
+        self.seen.append([m.content for m in self.memory.messages])
+        self.log.append(("start", self.name))
+        await asyncio.sleep(0.1)
+        self.log.append(("end", self.name))
+        self.state = self.state.FINISHED
+        return f"{self.name} done"
+
+
+async def _run(agents, dependencies, max_parallel_steps=4, step_context="shared"):
+    flow = PlanningFlow(
+        agents,
+        llm=FAKE_LLM,
+        planning_tool=PlanningTool(),
+        max_parallel_steps=max_parallel_steps,
+        step_context=step_context,
+        plan_store=None,
+    )
+    await flow.planning_tool.execute(
+        command="create",
+        plan_id=flow.active_plan_id,
+        title="test",
+        steps=["research A", "research B", "combine"],
+        step_dependencies=dependencies,
+    )
+    start = asyncio.get_running_loop().time()
+    result, terminated = await flow._execute_ready_steps()
+    return flow, result, asyncio.get_running_loop().time() - start
+
+
+def _agents(count):
+    log = []
+    agents = {}
+    for i in range(count):
+        agent = SleepyAgent(name=f"agent{i}", llm=FAKE_LLM)
+        agent.log = log
+        agents[f"agent{i}"] = agent
+    return agents, log
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_in_parallel():
+    agents, log = _agents(2)
+    flow, result, elapsed = await _run(agents, [[], [], [0, 1]])
+
+    assert elapsed < 0.28
+    assert [event for event, _ in log[:2]] == ["start", "start"]
+    plan = flow.planning_tool.plans[flow.active_plan_id]
+    assert plan["step_statuses"] == ["completed"] * 3
+    assert "done" in plan["step_notes"][2]
+    assert result.count("done") == 3
+
+
+@pytest.mark.asyncio
+async def test_plans_without_dependencies_stay_sequential():
+    agents, log = _agents(2)
+    _, _, elapsed = await _run(agents, None)
+
+    assert elapsed >= 0.3
+    assert [event for event, _ in log] == ["start", "end"] * 3
+
+
+@pytest.mark.asyncio
+async def test_parallelism_limit_is_respected():
+    agents, _ = _agents(2)
+    _, _, elapsed = await _run(agents, [[], [], []], max_parallel_steps=1)
+
+    assert elapsed >= 0.3
+
+
+@pytest.mark.asyncio
+async def test_scoped_steps_get_fresh_memory_with_handoff():
+    agents, _ = _agents(1)
+    agent = agents["agent0"]
+    agent.seen = []
+    flow, _, _ = await _run(agents, None, step_context="scoped")
+
+    # Each step saw only the handoff and its own prompt
+    assert [len(messages) for messages in agent.seen] == [1, 2, 2]
+    assert "Step 0 (research A): " in agent.seen[1][0]
+    assert "Step 1 (research B)" in agent.seen[2][0]
+    assert "Notes:" not in agent.seen[2][1]
+    # The agent's own memory is left untouched
+    assert agent.memory.messages == []
+
+    agents, _ = _agents(1)
+    agents["agent0"].seen = []
+    await _run(agents, None, step_context="shared")
+    assert [len(messages) for messages in agents["agent0"].seen] == [1, 2, 3]
+
+
+def test_step_summary_is_the_final_answer_not_the_terminate_output():
+    prompt = "work on step 0"
+    log = (
+        "Step 1: Observed output of cmd `web_search` executed:\nresults\n"
+        "Step 2: Observed output of cmd `terminate` executed:\n"
+        "The interaction has been completed with status: success"
+    )
+    messages = [
+        Message.assistant_message("Earlier step's answer"),
+        Message.user_message(prompt),
+        Message.assistant_message("Found the three sources."),
+        Message.assistant_message(""),
+    ]
+
+    assert PlanningFlow._step_summary(messages, prompt, log) == (
+        "Found the three sources."
+    )
+    # Without an answer, the last result that is not the termination
+    assert PlanningFlow._step_summary(messages[:2], prompt, log) == (
+        "Observed output of cmd `web_search` executed:\nresults"
+    )
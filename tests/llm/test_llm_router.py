@@ -0,0 +1,164 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, BadRequestError
+
+from app.llm_router import Endpoint, RouterClient
+from app.rate_limit import RateLimiter
+
+
+class FakeServer:
+    """OpenAI compatible chat completions endpoint served in process."""
+
+    def __init__(self, name, latency=0.0, status=200, headers=None):
+        self.name = name
+        self.latency = latency
+        self.status = status
+        self.headers = headers or {}
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        body = json.loads(request.content)
+        await asyncio.sleep(self.latency)
+        if self.status != 200:
+            return httpx.Response(
+                self.status, json={"error": {"message": "failed"}}, headers=self.headers
+            )
+        return httpx.Response(
+            200,
+            headers=self.headers,
+            json={
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": self.name},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 5,
+                    "completion_tokens": 1,
+                    "total_tokens": 6,
+                },
+            },
+        )
+
+    def endpoint(self, limiter=None) -> Endpoint:
+        limiter = limiter or RateLimiter()
+        client = AsyncOpenAI(
+            api_key="test",
+            base_url=f"http://{self.name}.test/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(self.handle),
+                event_hooks={"response": [limiter.on_response]},
+            ),
+        )
+        return Endpoint(self.name, f"{self.name}-model", client, limiter)
+
+
+async def _ask(router):
+    response = await router.create(
+        model="gpt-4o", messages=[{"role": "user", "content": "hi"}], max_tokens=10
+    )
+    return response.choices[0].message.content
+
+
+@pytest.mark.asyncio
+async def test_fails_over_and_avoids_failing_endpoint():
+    east, west = FakeServer("east", status=500), FakeServer("west")
+    router = RouterClient([east.endpoint(), west.endpoint()])
+
+    assert await _ask(router) in ("east", "west")
+    assert await _ask(router) == "west"
+    assert await _ask(router) == "west"
+    assert east.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_request_errors_are_not_retried_elsewhere():
+    east, west = FakeServer("east", status=400), FakeServer("west")
+    router = RouterClient([east.endpoint(), west.endpoint()])
+    router.endpoints[0].latencies.append(0.1)  # prefer east
+    router.endpoints[1].latencies.append(10.0)
+
+    with pytest.raises(BadRequestError):
+        await _ask(router)
+    assert west.requests == 0
+
+
+@pytest.mark.asyncio
+async def test_prefers_fast_endpoints_with_headroom():
+    slow, fast = FakeServer("slow", latency=0.05), FakeServer("fast")
+    router = RouterClient([slow.endpoint(), fast.endpoint()])
+    answers = [await _ask(router) for _ in range(10)]
+    assert answers.count("fast") >= 8
+
+    fast.headers = {
+        "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "30s",
+    }
+    await _ask(router)
+    assert router.ranked()[0].name == "slow"
+
+
+def test_unmeasured_endpoints_get_an_average_latency():
+    fast, slow, new = (FakeServer(name).endpoint() for name in ("fast", "slow", "new"))
+    fast.latencies.append(0.0)
+    slow.latencies.append(2.0)
+    router = RouterClient([slow, new, fast])
+
+    # A measured 0.0 is kept, and the new endpoint ranks between the two
+    assert [endpoint.name for endpoint in router.ranked()] == ["fast", "new", "slow"]
+
+
+@pytest.mark.asyncio
+async def test_hedges_requests_slower_than_p95():
+    east, west = FakeServer("east", latency=0.01), FakeServer("west", latency=0.02)
+    router = RouterClient([east.endpoint(), west.endpoint()], hedge=True)
+    for _ in range(6):
+        await _ask(router)
+    assert router.ranked()[0].name == "east"
+
+    east.latency = 1.0
+    start = time.monotonic()
+    assert await _ask(router) == "west"
+    assert time.monotonic() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_reservations_are_settled_with_usage_or_refunded():
+    east, west = FakeServer("east"), FakeServer("west", status=500)
+    east_limiter = RateLimiter(tpm=1000, clock=lambda: 0.0)
+    west_limiter = RateLimiter(tpm=1000, clock=lambda: 0.0)
+    router = RouterClient([east.endpoint(east_limiter), west.endpoint(west_limiter)])
+
+    for _ in range(3):
+        await _ask(router)
+    # Each successful request used the 6 tokens it reported
+    assert east_limiter._tokens == 1000 - 6 * 3
+    # Failed requests give their reservation back
+    assert west.requests and west_limiter._tokens == 1000
+
+
+@pytest.mark.asyncio
+async def test_losing_hedge_leg_refunds_its_reservation():
+    east, west = FakeServer("east", latency=0.01), FakeServer("west", latency=0.02)
+    east_limiter = RateLimiter(tpm=1000, clock=lambda: 0.0)
+    router = RouterClient([east.endpoint(east_limiter), west.endpoint()], hedge=True)
+    for _ in range(6):
+        await _ask(router)
+    tokens = east_limiter._tokens
+
+    east.latency = 1.0
+    assert await _ask(router) == "west"
+    assert east_limiter._tokens == tokens
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+from app.rate_limit import RateLimiter, parse_duration
+
+
+def test_parse_duration():
+    assert parse_duration("20") == 20
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("250ms") == 0.25
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+
+@pytest.mark.asyncio
+async def test_waits_for_tokens_and_serves_in_arrival_order():
+    limiter = RateLimiter(tpm=6000)  # 100 tokens per second
+    await limiter.acquire(6000)
+
+    order = []
+
+    async def request(name, tokens):
+        await limiter.acquire(tokens)
+        order.append((name, time.monotonic()))
+
+    start = time.monotonic()
+    await asyncio.gather(request("big", 20), request("small", 5), request("tiny", 1))
+
+    assert [name for name, _ in order] == ["big", "small", "tiny"]
+    assert order[0][1] - start == pytest.approx(0.2, abs=0.08)
+    assert order[-1][1] - start == pytest.approx(0.26, abs=0.08)
+
+
+@pytest.mark.asyncio
+async def test_settle_returns_unused_tokens():
+    limiter = RateLimiter(tpm=6000)
+    await limiter.acquire(6000)
+    limiter.settle(reserved=6000, used=100)
+
+    start = time.monotonic()
+    await limiter.acquire(5000)
+    assert time.monotonic() - start < 0.05
+
+
+def test_follows_response_headers():
+    limiter = RateLimiter()
+    limiter.update_from_headers(
+        {
+            "x-ratelimit-limit-requests": "600",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+            "x-ratelimit-limit-tokens": "90000",
+            "x-ratelimit-remaining-tokens": "1000",
+        }
+    )
+    assert (limiter.rpm, limiter.tpm) == (600, 90000)
+    now = time.monotonic()
+    assert limiter._delay(0, now) == pytest.approx(2, abs=0.05)
+    assert limiter._delay(1000, now) == pytest.approx(2, abs=0.05)
+
+    # Configured limits are an upper bound on what the server reports
+    limiter = RateLimiter(rpm=60)
+    limiter.update_from_headers({"x-ratelimit-limit-requests": "600"})
+    assert limiter.rpm == 60
+
+
+def test_pauses_after_rate_limit_errors():
+    limiter = RateLimiter()
+    limiter.on_rate_limited({"retry-after": "3"})
+    assert limiter._delay(0, time.monotonic()) == pytest.approx(3, abs=0.05)
+
+    # Without a hint the pause doubles with each 429 in a row
+    limiter = RateLimiter()
+    limiter.on_rate_limited({})
+    limiter.on_rate_limited({})
+    assert limiter._delay(0, time.monotonic()) == pytest.approx(2, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_llm_request_that_fails_gives_its_reservation_back(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.llm import LLM
+
+    llm = LLM()
+    limiter = RateLimiter(tpm=100000, clock=lambda: 0.0)
+
+    async def create(**params):
+        raise RuntimeError("connection reset")
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace()))
+    client.chat.completions.create = create
+    monkeypatch.setattr(llm, "rate_limiter", limiter)
+    monkeypatch.setattr(llm, "client", client)
+
+    messages = [{"role": "user", "content": "hi"}]
+    # Unwrapped from the retry decorator: a single attempt
+    with pytest.raises(RuntimeError):
+        await LLM.ask.__wrapped__(llm, messages, stream=False)
+    with pytest.raises(RuntimeError):
+        await LLM.ask_tool.__wrapped__(llm, messages)
+    assert limiter._tokens == 100000
+
+
+@pytest.mark.asyncio
+async def test_llm_response_without_usage_settles_an_estimate(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.llm import LLM
+
+    llm = LLM()
+    limiter = RateLimiter(tpm=100000, clock=lambda: 0.0)
+
+    async def create(**params):
+        message = SimpleNamespace(content="hello there", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace()))
+    client.chat.completions.create = create
+    monkeypatch.setattr(llm, "rate_limiter", limiter)
+    monkeypatch.setattr(llm, "client", client)
+
+    messages = [{"role": "user", "content": "hi"}]
+    input_tokens = llm.count_message_tokens(messages)
+    assert await LLM.ask.__wrapped__(llm, messages, stream=False) == "hello there"
+    assert await LLM.ask_tool.__wrapped__(llm, messages)
+    # Only the prompt and the short answers stay charged, not max_tokens
+    used = 100000 - limiter._tokens
+    assert 2 * input_tokens < used < 2 * input_tokens + 20
@@ -0,0 +1,53 @@
+from app.llm import LLM, TokenCounter
+from app.tokenizer import Tokenizer, approximate_tokens
+
+
+class CountingTokenizer:
+    exact = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+def _llm(max_input_tokens):
+    llm = object.__new__(LLM)
+    llm.tokenizer = CountingTokenizer()
+    llm.token_counter = TokenCounter(llm.tokenizer)
+    llm.max_input_tokens = max_input_tokens
+    llm.total_input_tokens = 0
+    return llm
+
+
+def test_approximate_tokens():
+    assert approximate_tokens("") == 0
+    assert approximate_tokens("abcd" * 10) == 10
+    assert approximate_tokens("你好世界") == 4
+
+
+def test_exact_count_only_near_the_limit():
+    messages = [{"role": "user", "content": "word " * 100}]
+
+    llm = _llm(max_input_tokens=None)
+    assert llm._count_input_tokens(messages) > 100
+    assert llm.tokenizer.calls == 0
+
+    llm = _llm(max_input_tokens=10_000)
+    llm._count_input_tokens(messages)
+    assert llm.tokenizer.calls == 0
+
+    llm.total_input_tokens = 9_000
+    exact = llm._count_input_tokens(messages)
+    assert llm.tokenizer.calls > 0
+    assert exact == llm.count_message_tokens(messages)
+
+
+def test_unavailable_encoding_falls_back_to_estimate(monkeypatch):
+    monkeypatch.setattr("app.tokenizer._encodings", {"cl100k_base": None})
+    tokenizer = Tokenizer("some-local-model")
+
+    assert tokenizer.count("abcd" * 10) == 10
+    assert not tokenizer.exact
@@ -0,0 +1,48 @@
+"""Stdio MCP server for tests.
+
+Usage: python server.py NAME [STARTUP_DELAY]
+"""
+import asyncio
+import os
+import sys
+import time
+
+from mcp.server.fastmcp import Context, FastMCP
+
+
+name = sys.argv[1]
+# Simulates a server that is slow to start
+time.sleep(float(sys.argv[2]) if len(sys.argv) > 2 else 0)
+
+server = FastMCP(name)
+
+
+@server.tool()
+def echo(text: str) -> str:
+    """Echo the text back."""
+    return f"{name}: {text}"
+
+
+@server.tool()
+def pid() -> str:
+    """Process ID of the server."""
+    return str(os.getpid())
+
+
+@server.tool()
+async def sleep(seconds: float) -> str:
+    """Sleep, then return."""
+    await asyncio.sleep(seconds)
+    return "slept"
+
+
+@server.tool()
+async def add_tool(tool_name: str, notify: bool, ctx: Context) -> str:
+    """Add a tool returning its name, announcing the change if notify."""
+    server.add_tool(lambda: tool_name, name=tool_name, description="Added tool.")
+    if notify:
+        await ctx.session.send_tool_list_changed()
+    return "added"
+
+
+server.run()
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from app.tool.search.bing_search import BingSearchEngine
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "bing"
+PAGE_DELAY = 0.1
+
+
+def make_engine(requested: list) -> BingSearchEngine:
+    """Creates a Bing engine that serves recorded result pages."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        first = int(parse_qs(request.url.query.decode())["first"][0])
+        page = (first - 1) // 10 + 1
+        requested.append(page)
+        await asyncio.sleep(PAGE_DELAY)
+        fixture = FIXTURES / f"page_{page}.html"
+        if not fixture.exists():
+            return httpx.Response(200, text="<html><body></body></html>")
+        return httpx.Response(200, text=fixture.read_text(encoding="utf-8"))
+
+    return BingSearchEngine(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_pages_fetched_concurrently():
+    """Tests that result pages are fetched in parallel and merged in rank order."""
+    requested = []
+    engine = make_engine(requested)
+
+    start = time.perf_counter()
+    results = await engine.perform_search_async("openmanus", num_results=30)
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 30
+    assert results[0].url == "https://example.com/result/1"
+    # One duplicate on page 2 means a fourth page is needed
+    assert sorted(requested) == [1, 2, 3, 4]
+    assert elapsed < PAGE_DELAY * len(requested)
+
+
+@pytest.mark.asyncio
+async def test_results_deduplicated():
+    """Tests that repeated URLs across pages are dropped."""
+    engine = make_engine([])
+
+    results = await engine.perform_search_async("openmanus", num_results=20)
+
+    urls = [item.url for item in results]
+    assert len(urls) == len(set(urls)) == 20
+
+
+@pytest.mark.asyncio
+async def test_stops_at_last_page():
+    """Tests that paging stops when Bing has no further pages."""
+    engine = make_engine([])
+
+    results = await engine.perform_search_async("openmanus", num_results=100)
+
+    assert len(results) == 49
+
+
+def test_sync_entrypoint():
+    """Tests that perform_search works outside an event loop."""
+    engine = make_engine([])
+
+    results = engine.perform_search("openmanus", num_results=5)
+
+    assert [item.url for item in results][:2] == [
+        "https://example.com/result/1",
+        "https://example.com/result/2",
+    ]
@@ -0,0 +1,86 @@
+import asyncio
+import socket
+import sys
+
+import pytest
+
+from app.config import BrowserDaemonSettings
+from app.tool.browser_daemon import BrowserDaemon, ensure_daemon, is_healthy
+
+
+FAKE_CHROMIUM = """\
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+port = int(next(a for a in sys.argv if a.startswith("--remote-debugging-port=")).split("=")[1])
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({"Browser": "FakeChrome/1.0"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def settings():
+    return BrowserDaemonSettings(
+        enabled=True,
+        port=_free_port(),
+        auto_start=False,
+        startup_timeout=10,
+        health_check_interval=0.1,
+        max_failed_checks=1,
+    )
+
+
+@pytest.fixture
+def fake_chromium(tmp_path):
+    script = tmp_path / "chromium"
+    script.write_text(f"#!{sys.executable}\n{FAKE_CHROMIUM}")
+    script.chmod(0o755)
+    return str(script)
+
+
+@pytest.mark.asyncio
+async def test_ensure_daemon_without_auto_start_raises(settings):
+    assert not await is_healthy(settings)
+    with pytest.raises(RuntimeError):
+        await ensure_daemon(settings)
+
+
+@pytest.mark.asyncio
+async def test_daemon_restarts_crashed_browser(settings, fake_chromium):
+    daemon = BrowserDaemon(settings, fake_chromium)
+    supervisor = asyncio.create_task(daemon.supervise())
+    try:
+        await asyncio.wait_for(daemon.ready.wait(), timeout=10)
+        assert await ensure_daemon(settings) == f"http://127.0.0.1:{settings.port}"
+
+        first_pid = daemon.process.pid
+        daemon.process.kill()
+        await asyncio.sleep(0.3)
+        await asyncio.wait_for(daemon.ready.wait(), timeout=10)
+        assert daemon.process.pid != first_pid
+        assert await is_healthy(settings)
+    finally:
+        supervisor.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await supervisor
+    assert daemon.process is None
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.tool import browser_pool
+from app.tool.browser_pool import BrowserContextPool
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def get_current_page(self):
+        return object()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    instances = 0
+
+    def __init__(self, config=None):
+        FakeBrowser.instances += 1
+        self.contexts = []
+        self.closed = False
+
+    async def new_context(self, config=None):
+        await asyncio.sleep(0.01)
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest_asyncio.fixture
+async def pool(monkeypatch):
+    FakeBrowser.instances = 0
+    monkeypatch.setattr(browser_pool, "BrowserUseBrowser", FakeBrowser)
+    monkeypatch.setattr(browser_pool, "DomService", lambda page: object())
+    pool = BrowserContextPool(max_contexts=2, idle_timeout=60, cleanup_interval=60)
+    yield pool
+    await pool.close()
+
+
+async def use(pool, session_id, seconds=0.0):
+    async with await pool.acquire(session_id) as lease:
+        await asyncio.sleep(seconds)
+        return lease
+
+
+@pytest.mark.asyncio
+async def test_sessions_get_isolated_contexts_on_one_browser(pool):
+    a, b, a_again = await asyncio.gather(use(pool, "a"), use(pool, "b"), use(pool, "a"))
+
+    assert a is a_again
+    assert a.context is not b.context
+    assert FakeBrowser.instances == 1
+
+
+@pytest.mark.asyncio
+async def test_sessions_run_in_parallel(pool):
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(use(pool, "a", 0.1), use(pool, "b", 0.1))
+    assert asyncio.get_running_loop().time() - start < 0.18
+
+
+@pytest.mark.asyncio
+async def test_actions_of_one_session_are_serialized(pool):
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(use(pool, "a", 0.1), use(pool, "a", 0.1))
+    assert asyncio.get_running_loop().time() - start >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_full_pool_reclaims_only_idle_contexts(pool):
+    a = await use(pool, "a")
+    await use(pool, "b")
+
+    # Live sessions keep their contexts
+    with pytest.raises(RuntimeError):
+        await pool.acquire("c")
+    assert not a.context.closed
+
+    pool.idle_timeout = 0
+    await asyncio.sleep(0.01)
+    async with await pool.acquire("c"):
+        assert a.context.closed
+        assert pool.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_acquired_lease_is_not_reclaimed_before_use(pool):
+    pool.max_contexts = 1
+    pool.idle_timeout = 0
+    lease = await pool.acquire("a")
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(RuntimeError):
+        await pool.acquire("b")
+    async with lease:
+        assert not lease.context.closed
+        assert pool.get("a") is lease
+
+
+@pytest.mark.asyncio
+async def test_idle_cleanup_closes_contexts_then_browser(pool):
+    lease = await use(pool, "a")
+    browser = pool.browser
+    pool.idle_timeout = 0
+
+    await asyncio.sleep(0.01)
+    await pool._cleanup_idle()
+    assert lease.context.closed
+    assert pool.browser is browser
+
+    await asyncio.sleep(0.01)
+    await pool._cleanup_idle()
+    assert browser.closed
+    assert pool.browser is None
@@ -0,0 +1,67 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.tool.content_extractor import ContentExtractor, split_markdown
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def ask_tool(self, messages, tools=None, tool_choice=None):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        prompt = messages[0]["content"]
+        section = prompt.rsplit("## ", 1)[-1].split("\n", 1)[0]
+        arguments = json.dumps({"extracted_content": {"text": f"found {section}"}})
+        call = SimpleNamespace(function=SimpleNamespace(arguments=arguments))
+        return SimpleNamespace(tool_calls=[call])
+
+
+def _page(sections: int) -> str:
+    return "".join(f"## S{i}\n\n" + "word " * 200 + "\n\n" for i in range(sections))
+
+
+def test_split_markdown_follows_headings_and_size():
+    chunks = split_markdown(_page(6), 2500)
+
+    assert len(chunks) == 3
+    assert all(len(chunk) <= 2500 for chunk in chunks)
+    assert all(chunk.startswith("## S") for chunk in chunks)
+    assert "".join(chunks) == _page(6)
+
+
+@pytest.mark.asyncio
+async def test_extract_maps_chunks_concurrently_merges_and_caches():
+    llm = FakeLLM()
+    extractor = ContentExtractor(chunk_size=1100, max_concurrency=2, max_chunks=8)
+
+    result = await extractor.extract(llm, "https://a.com/", "h1", _page(5), "goal")
+    assert llm.calls == 5
+    assert llm.max_active == 2
+    assert result["text"].split("\n\n") == [f"found S{i}" for i in range(5)]
+
+    again = await extractor.extract(llm, "https://a.com", "h1", _page(5), "goal")
+    assert again == result
+    assert llm.calls == 5
+
+    await extractor.extract(llm, "https://a.com/", "h2", _page(5), "goal")
+    assert llm.calls == 10
+
+
+@pytest.mark.asyncio
+async def test_extract_stops_after_max_chunks():
+    llm = FakeLLM()
+    extractor = ContentExtractor(chunk_size=1100, max_chunks=3)
+
+    result = await extractor.extract(llm, "https://a.com/", "h1", _page(5), "goal")
+    assert llm.calls == 3
+    assert result["text"].split("\n\n") == [f"found S{i}" for i in range(3)]
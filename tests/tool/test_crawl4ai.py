@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import pytest
+import pytest_asyncio
+
+from app.tool import crawl4ai
+from app.tool.crawl4ai import Crawl4aiTool, SharedCrawler
+from app.tool.page_store import PageStore
+
+
+class FakeCrawler:
+    """Stands in for crawl4ai's AsyncWebCrawler."""
+
+    def __init__(self, latency=None):
+        self.latency = latency or {}
+        self.started = []
+        self.closed = False
+
+    async def arun(self, url, config=None):
+        loop = asyncio.get_running_loop()
+        self.started.append((url, loop.time()))
+        await asyncio.sleep(self.latency.get(url, 0.01))
+        return SimpleNamespace(
+            success=True,
+            markdown=f"content of {url}",
+            html=f"<p>{url}</p>",
+            links={},
+            media={},
+            metadata={"title": urlparse(url).path},
+            status_code=200,
+        )
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest_asyncio.fixture
+async def shared(monkeypatch, tmp_path):
+    """Runs crawl_stream on a stub crawler and a temporary page store."""
+    shared = SharedCrawler(idle_timeout=60, check_interval=60)
+    shared.fake = FakeCrawler()
+    shared.starts = []
+
+    async def start():
+        shared.starts.append(shared.fake)
+        return shared.fake
+
+    monkeypatch.setattr(shared, "_start", start)
+    monkeypatch.setattr(crawl4ai, "_shared_crawler", shared)
+    monkeypatch.setattr(crawl4ai, "page_store", PageStore(cache_dir=tmp_path))
+    monkeypatch.setattr(Crawl4aiTool, "_run_config", staticmethod(lambda *args: None))
+    yield shared
+    await shared.close()
+
+
+async def collect(tool, urls, **kwargs):
+    return [result async for result in tool.crawl_stream(urls, **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_shared_crawler_is_reused_and_closed_when_idle(shared):
+    async with shared.session() as first:
+        async with shared.session() as second:
+            assert first is second
+    assert len(shared.starts) == 1
+
+    shared.idle_timeout = shared.check_interval = 0.05
+    async with shared.session():
+        pass
+    await asyncio.sleep(0.2)
+    assert not shared.is_running
+    assert shared.fake.closed
+
+
+@pytest.mark.asyncio
+async def test_results_stream_as_pages_finish(shared):
+    shared.fake.latency = {"https://a.test/slow": 0.2}
+    tool = Crawl4aiTool(domain_delay=0)
+
+    results = await collect(tool, ["https://a.test/slow", "https://b.test/fast"])
+    assert [r["url"] for r in results] == ["https://b.test/fast", "https://a.test/slow"]
+    assert all(r["success"] for r in results)
+
+    # Crawled pages are served from the page store next time
+    results = await collect(tool, ["https://b.test/fast"])
+    assert results[0]["cached"]
+    assert len(shared.fake.started) == 2
+
+
+@pytest.mark.asyncio
+async def test_domain_delay_does_not_hold_up_other_domains(shared):
+    tool = Crawl4aiTool(max_concurrency=1, domain_delay=0.3)
+    urls = ["https://a.test/1", "https://a.test/2", "https://b.test/1"]
+
+    start = asyncio.get_running_loop().time()
+    results = await collect(tool, urls)
+    started = {url: at - start for url, at in shared.fake.started}
+
+    assert {r["url"] for r in results} == set(urls)
+    # Requests to one host are spaced out...
+    assert started["https://a.test/2"] - started["https://a.test/1"] >= 0.3
+    # ...while the other host's request goes ahead in the meantime
+    assert started["https://b.test/1"] < 0.2
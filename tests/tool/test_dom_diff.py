@@ -0,0 +1,63 @@
+from app.agent.browser import ELEMENTS_PIN, BrowserContextHelper
+from app.tool.dom_diff import diff_elements, parse_elements
+
+
+ELEMENTS = "\n".join(
+    [
+        "[0]<a >Home />",
+        "Some page text",
+        "\t[1]<button >Search />",
+        "\t*[2]*<input placeholder='query' />",
+        "[3]<a >Next />",
+    ]
+)
+
+
+def test_parse_and_diff_elements():
+    previous = parse_elements(ELEMENTS)
+    assert previous[2] == "<input placeholder='query' />"
+    assert len(previous) == 4
+
+    current = dict(previous)
+    current[1] = "<button >Searching... />"
+    del current[3]
+    current[4] = "<a >Result />"
+    diff = diff_elements(previous, current)
+
+    assert diff.added == [(4, "<a >Result />")]
+    assert diff.changed == [(1, "<button >Searching... />")]
+    assert diff.removed == [(3, "<a >Next />")]
+
+
+class PinningAgent:
+    def __init__(self):
+        self.pinned = {}
+
+    def add_step_context(self, message, pin=None):
+        self.pinned[pin] = message.content
+
+    def unpin_step_context(self, pin):
+        self.pinned.pop(pin, None)
+
+
+def test_helper_sends_full_list_then_diffs():
+    agent = PinningAgent()
+    helper = BrowserContextHelper(agent=agent)
+    url = "https://example.com/"
+
+    assert helper.format_elements(url, ELEMENTS) == " (full list above)"
+    assert agent.pinned[ELEMENTS_PIN] == f"Interactive elements of {url}:\n{ELEMENTS}"
+
+    assert "unchanged" in helper.format_elements(url, ELEMENTS)
+
+    changed = ELEMENTS.replace("Next", "More")
+    diff = helper.format_elements(url, changed)
+    assert diff.endswith("~ [3]<a >More />")
+    assert "Home" not in diff
+
+    # Diffs stay relative to the pinned full list
+    diff = helper.format_elements(url, changed.replace("Home", "Start"))
+    assert "~ [0]<a >Start />" in diff and "~ [3]<a >More />" in diff
+
+    helper.format_elements("https://example.com/next", changed)
+    assert agent.pinned[ELEMENTS_PIN].endswith(changed)
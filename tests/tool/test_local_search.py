@@ -0,0 +1,215 @@
+import os
+
+import pytest
+
+from app.tool.page_store import PageStore
+from app.tool.search import local_search
+from app.tool.search.local_search import LocalIndex, LocalIndexSearchEngine, tokenize
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Creates a small document corpus."""
+    docs = tmp_path / "corpus"
+    docs.mkdir()
+    (docs / "python.md").write_text(
+        "# Python\nPython is a programming language with asyncio support."
+    )
+    (docs / "rust.txt").write_text("Rust is a systems programming language.")
+    (docs / "cooking.html").write_text(
+        "<html><head><title>Pasta</title></head>"
+        "<body><script>var python = 1;</script><p>Boil water, add pasta.</p></body></html>"
+    )
+    return docs
+
+
+def test_tokenize():
+    """Tests word and CJK tokenization."""
+    assert tokenize("Hello, World_2!") == ["hello", "world", "2"]
+    assert tokenize("abc中文") == ["abc", "中", "文"]
+
+
+def test_bm25_ranking(corpus, tmp_path):
+    """Tests that the most relevant document ranks first."""
+    index = LocalIndex(tmp_path / "index")
+    assert index.index_directory(corpus) == 3
+
+    results = index.search("python asyncio")
+    assert results[0][1]["title"] == "python.md"
+    assert len(results) == 1
+
+    titles = [doc["title"] for _, doc in index.search("programming language")]
+    assert set(titles) == {"python.md", "rust.txt"}
+    assert index.search("pasta")[0][1]["title"] == "Pasta"
+    index.close()
+
+
+def test_incremental_indexing(corpus, tmp_path):
+    """Tests that only new, changed or removed files touch the index."""
+    index = LocalIndex(tmp_path / "index")
+    index.index_directory(corpus)
+    assert index.index_directory(corpus) == 0
+
+    changed = corpus / "rust.txt"
+    changed.write_text("Rust has ownership and borrowing.")
+    stat = changed.stat()
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    (corpus / "python.md").unlink()
+    assert index.index_directory(corpus) == 1
+
+    assert index.document_count == 2
+    assert index.search("asyncio") == []
+    assert index.search("ownership")[0][1]["title"] == "rust.txt"
+    assert index.search("systems") == []
+    index.close()
+
+
+def test_reopen_and_compact(corpus, tmp_path):
+    """Tests that a persisted index can be reopened and compacted."""
+    index = LocalIndex(tmp_path / "index")
+    index.index_directory(corpus)
+    (corpus / "rust.txt").unlink()
+    index.index_directory(corpus)
+    index.close()
+
+    reopened = LocalIndex(tmp_path / "index")
+    assert reopened.document_count == 2
+    reopened.compact()
+    assert len(reopened._segments) == 1
+    assert reopened.search("python")[0][1]["title"] == "python.md"
+    reopened.close()
+
+
+def test_leftover_compaction_segment_is_removed(corpus, tmp_path):
+    """Tests that an interrupted compaction does not break reopening."""
+    index = LocalIndex(tmp_path / "index")
+    index.index_directory(corpus)
+    index.close()
+    leftover = tmp_path / "index" / "segments" / "2.tmp"
+    leftover.mkdir()
+    (leftover / "postings.bin").write_bytes(b"")
+
+    reopened = LocalIndex(tmp_path / "index")
+    assert not leftover.exists()
+    assert reopened.search("python")[0][1]["title"] == "python.md"
+    reopened.close()
+
+
+def test_compaction_interrupted_before_cleanup_keeps_the_index(
+    corpus, tmp_path, monkeypatch
+):
+    """Tests that a crash after the new segment is committed loses nothing."""
+    index = LocalIndex(tmp_path / "index")
+    index.index_directory(corpus)
+    (corpus / "rust.txt").unlink()
+    index.index_directory(corpus)
+
+    def crash(path, ignore_errors=False):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(local_search.shutil, "rmtree", crash)
+    with pytest.raises(KeyboardInterrupt):
+        index.compact()
+    monkeypatch.undo()
+    index.close()
+
+    reopened = LocalIndex(tmp_path / "index")
+    # The superseded segment is removed on reopening
+    assert len(list((tmp_path / "index" / "segments").iterdir())) == 1
+    assert reopened.document_count == 2
+    assert reopened.search("python")[0][1]["title"] == "python.md"
+    assert reopened.index_directory(corpus) == 0
+    reopened.close()
+
+
+def test_deleted_documents_do_not_affect_scores(corpus, tmp_path):
+    """Tests that tombstoned documents are left out of document frequencies."""
+    index = LocalIndex(tmp_path / "index")
+    index.index_directory(corpus)
+    (corpus / "rust.txt").unlink()
+    index.index_directory(corpus)
+
+    fresh = LocalIndex(tmp_path / "fresh")
+    fresh.index_directory(corpus)
+    assert index.search("programming language") == fresh.search("programming language")
+    index.close()
+    fresh.close()
+
+
+def test_index_page_store(tmp_path):
+    """Tests indexing pages fetched into the page store."""
+    store = PageStore(cache_dir=tmp_path / "pages")
+    store.put("https://example.com/a", html="<p>x</p>", text="OpenManus agents")
+    index = LocalIndex(tmp_path / "index")
+
+    assert index.index_pages(store.iter_pages()) == 1
+    assert index.search("agents")[0][1]["source"] == "https://example.com/a"
+    index.close()
+
+
+def test_engine(corpus, tmp_path):
+    """Tests the WebSearchEngine interface."""
+    engine = LocalIndexSearchEngine(
+        index_dir=str(tmp_path / "index"),
+        corpus_paths=[str(corpus)],
+        include_page_store=False,
+    )
+
+    results = engine.perform_search("rust", num_results=5)
+
+    assert len(results) == 1
+    assert results[0].url == (corpus / "rust.txt").resolve().as_uri()
+    assert results[0].description.startswith("Rust is")
+
+
+def test_refresh_compacts_automatically(corpus, tmp_path):
+    """Tests that refreshes merge segments before they pile up."""
+    engine = LocalIndexSearchEngine(
+        index_dir=str(tmp_path / "index"),
+        corpus_paths=[str(corpus)],
+        include_page_store=False,
+    )
+    for i in range(local_search.COMPACT_MAX_SEGMENTS + 3):
+        (corpus / f"note{i}.txt").write_text(f"note number {i}")
+        engine.refresh(force=True)
+        assert len(engine.index._segments) <= local_search.COMPACT_MAX_SEGMENTS
+
+    # Replacing most documents leaves tombstones that trigger a compaction
+    for path in corpus.glob("note*.txt"):
+        path.unlink()
+    engine.refresh(force=True)
+    assert len(engine.index._segments) == 1
+    assert len(engine.index._docs) == engine.index.document_count == 3
+    assert engine.perform_search("rust")[0].title == "rust.txt"
+
+
+def test_refresh_reads_only_new_pages(tmp_path, monkeypatch):
+    """Tests that pages already indexed are not read from the page store."""
+    from app.tool import page_store as page_store_module
+
+    store = PageStore(cache_dir=tmp_path / "pages")
+    store.put("https://example.com/a", html="<p>a</p>", text="first agents page")
+    store.put("https://example.com/b", html="<p>b</p>", text="second agents page")
+    monkeypatch.setattr(page_store_module, "page_store", store)
+    engine = LocalIndexSearchEngine(index_dir=str(tmp_path / "index"))
+    engine.refresh(force=True)
+    assert engine.index.document_count == 2
+
+    # A new process: cached pages are on disk only
+    store = PageStore(cache_dir=tmp_path / "pages")
+    monkeypatch.setattr(page_store_module, "page_store", store)
+    loaded = []
+    load_from_disk = store._load_from_disk
+
+    def counting_load(key):
+        loaded.append(key)
+        return load_from_disk(key)
+
+    monkeypatch.setattr(store, "_load_from_disk", counting_load)
+    store.put("https://example.com/b", html="<p>b2</p>", text="changed agents page")
+    loaded.clear()
+    engine.refresh(force=True)
+
+    assert loaded == []
+    assert engine.index.document_count == 2
+    assert engine.index.search("changed")[0][1]["source"] == "https://example.com/b"
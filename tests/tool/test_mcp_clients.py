@@ -0,0 +1,62 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from app.tool import mcp
+from app.tool.mcp import MCPClients
+from app.tool.mcp_pool import MCPSessionPool
+
+
+SERVER = str(Path(__file__).parent / "fixtures" / "mcp" / "server.py")
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def pool(monkeypatch):
+    pool = MCPSessionPool(idle_timeout=0)
+    monkeypatch.setattr(mcp, "MCP_POOL", pool)
+    yield pool
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_connections_and_disconnect():
+    clients = MCPClients()
+
+    await asyncio.gather(
+        *(
+            clients.connect_stdio(sys.executable, [SERVER, name], name)
+            for name in ("one", "two")
+        )
+    )
+
+    assert sorted(clients.sessions) == ["one", "two"]
+    assert sorted(clients.tool_map) == [
+        f"mcp_{name}_{tool}"
+        for name in ("one", "two")
+        for tool in ("add_tool", "echo", "pid", "sleep")
+    ]
+    result = await clients.execute(name="mcp_two_echo", tool_input={"text": "hi"})
+    assert result.output == "two: hi"
+
+    # Closed by the tasks that opened them, whichever task disconnects
+    await asyncio.create_task(clients.disconnect("one"))
+    assert list(clients.sessions) == ["two"]
+    assert "mcp_one_echo" not in clients.tool_map
+    await clients.disconnect()
+    assert not clients.sessions and not clients.tool_map
+
+
+@pytest.mark.asyncio
+async def test_connection_timeout(pool):
+    clients = MCPClients()
+
+    with pytest.raises(TimeoutError):
+        await clients.connect_stdio(
+            sys.executable, [SERVER, "slow", "30"], "slow", timeout=0.5
+        )
+
+    assert not clients.sessions
+    assert pool.stats()["sessions"] == 0
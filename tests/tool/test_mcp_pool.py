@@ -0,0 +1,84 @@
+import asyncio
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from app.tool import mcp
+from app.tool.mcp import MCPClients
+from app.tool.mcp_pool import MCPSessionPool
+
+
+SERVER = str(Path(__file__).parent / "fixtures" / "mcp" / "server.py")
+
+
+@pytest_asyncio.fixture
+async def pool(monkeypatch):
+    pool = MCPSessionPool(max_in_flight=2, health_check_interval=0)
+    monkeypatch.setattr(mcp, "MCP_POOL", pool)
+    yield pool
+    await pool.close()
+
+
+async def connect(server_id: str = "shared") -> MCPClients:
+    clients = MCPClients()
+    await clients.connect_stdio(sys.executable, [SERVER, "shared"], server_id)
+    return clients
+
+
+async def server_pid(clients: MCPClients, server_id: str = "shared") -> int:
+    result = await clients.execute(name=f"mcp_{server_id}_pid", tool_input={})
+    return int(result.output)
+
+
+@pytest.mark.asyncio
+async def test_agents_share_one_session(pool):
+    first = await connect()
+    second = await connect("other_name")
+
+    assert first.sessions["shared"] is second.sessions["other_name"]
+    assert pool.stats() == {"sessions": 1, "connected": 1, "refs": 2}
+    pid = await server_pid(first)
+    assert await server_pid(second, "other_name") == pid
+
+    # Released sessions stay open for the next agent
+    await first.disconnect()
+    await second.disconnect()
+    assert pool.stats() == {"sessions": 1, "connected": 1, "refs": 0}
+    third = await connect()
+    assert await server_pid(third) == pid
+    await third.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_dead_server_is_reconnected(pool):
+    clients = await connect()
+    pid = await server_pid(clients)
+
+    os.kill(pid, signal.SIGKILL)
+    await asyncio.sleep(0.2)
+
+    assert await server_pid(clients) != pid
+    await clients.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_requests_in_flight_are_bounded(pool):
+    clients = await connect()
+
+    start = time.monotonic()
+    results = await asyncio.gather(
+        *(
+            clients.execute(name="mcp_shared_sleep", tool_input={"seconds": 0.3})
+            for _ in range(4)
+        )
+    )
+
+    assert [result.output for result in results] == ["slept"] * 4
+    # Two at a time: two rounds of 0.3 seconds
+    assert time.monotonic() - start >= 0.6
+    await clients.disconnect()
@@ -0,0 +1,62 @@
+import json
+from contextlib import AsyncExitStack
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from mcp.server.fastmcp import Context
+from pydantic import Field
+
+from app.mcp.server import MCPServer
+from app.tool.base import ToolResult
+from app.tool.browser_use_tool import BrowserUseTool
+
+
+class SessionBrowser(BrowserUseTool):
+    released: List[str] = Field(default_factory=list)
+
+    async def execute(self, action: str, session_id=None, **kwargs) -> ToolResult:
+        return ToolResult(output=session_id)
+
+    async def release_session(self, session_id: str) -> None:
+        self.released.append(session_id)
+
+
+class ClientSession:
+    """Stands in for the server session of one client connection."""
+
+    def __init__(self):
+        self._exit_stack = AsyncExitStack()
+
+
+def client_context(server: MCPServer) -> Context:
+    return Context(
+        request_context=SimpleNamespace(session=ClientSession()), fastmcp=server.server
+    )
+
+
+@pytest.mark.asyncio
+async def test_each_client_gets_its_own_browser_session():
+    server = MCPServer()
+    browser = server.tools["browser"] = SessionBrowser(llm=None)
+    server.register_all_tools()
+    tools = server.server._tool_manager
+
+    schema = tools.get_tool("browser_use").parameters
+    assert "ctx" not in schema["properties"]
+    assert "session_id" not in schema["properties"]
+
+    first, second = client_context(server), client_context(server)
+
+    async def session_of(ctx: Context) -> str:
+        result = await tools.call_tool("browser_use", {"action": "wait"}, context=ctx)
+        return json.loads(result)["output"]
+
+    first_session = await session_of(first)
+    assert first_session
+    assert await session_of(first) == first_session
+    assert await session_of(second) not in (first_session, None)
+
+    # A disconnected client's browser context is released
+    await first.session._exit_stack.aclose()
+    assert browser.released == [first_session]
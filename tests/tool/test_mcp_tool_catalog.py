@@ -0,0 +1,112 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from mcp.types import Tool
+
+from app.agent.mcp import MCPAgent
+from app.tool import mcp
+from app.tool.mcp import MCPClients
+from app.tool.mcp_pool import MCPSessionPool, ToolCatalog
+
+
+SERVER = str(Path(__file__).parent / "fixtures" / "mcp" / "server.py")
+SCHEMA = {"type": "object", "properties": {"text": {"type": "string"}}}
+
+
+@pytest_asyncio.fixture
+async def pool(monkeypatch):
+    # Polls every 0.2 seconds, as the fixture server does not announce
+    # tool changes in its capabilities
+    pool = MCPSessionPool(idle_timeout=0, tool_refresh_interval=0.2)
+    monkeypatch.setattr(mcp, "MCP_POOL", pool)
+    yield pool
+    await pool.close()
+
+
+async def connect(server_name: str) -> MCPClients:
+    clients = MCPClients()
+    await clients.connect_stdio(sys.executable, [SERVER, server_name], "srv")
+    return clients
+
+
+async def wait_for_change(clients: MCPClients, timeout: float = 5.0) -> tuple:
+    for _ in range(int(timeout / 0.05)):
+        changes = clients.sync_tools()
+        if any(changes):
+            return changes
+        await asyncio.sleep(0.05)
+    raise AssertionError("Tools did not change")
+
+
+def test_catalog_version_changes_only_with_tools():
+    catalog = ToolCatalog()
+
+    assert catalog.update([Tool(name="echo", inputSchema=SCHEMA)])
+    assert catalog.version == 1
+    assert not catalog.update([Tool(name="echo", inputSchema=dict(SCHEMA))])
+    assert catalog.version == 1
+
+    schema = {**SCHEMA, "required": ["text"]}
+    assert catalog.update([Tool(name="echo", inputSchema=schema)])
+    assert catalog.version == 2
+
+
+@pytest.mark.asyncio
+async def test_announced_tool_is_added(monkeypatch):
+    pool = MCPSessionPool(idle_timeout=0, tool_refresh_interval=0)
+    monkeypatch.setattr(mcp, "MCP_POOL", pool)
+    clients = await connect("notify")
+    assert clients.sync_tools() == ([], [], [])
+
+    result = await clients.execute(
+        name="mcp_srv_add_tool", tool_input={"tool_name": "extra", "notify": True}
+    )
+    assert result.output == "added"
+
+    assert await wait_for_change(clients) == (["mcp_srv_extra"], [], [])
+    result = await clients.execute(name="mcp_srv_extra", tool_input={})
+    assert result.output == "extra"
+    await clients.disconnect()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_unannounced_tool_is_found_by_polling(pool):
+    clients = await connect("poll")
+
+    await clients.execute(
+        name="mcp_srv_add_tool", tool_input={"tool_name": "quiet", "notify": False}
+    )
+
+    assert await wait_for_change(clients) == (["mcp_srv_quiet"], [], [])
+    await clients.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_agent_step_reads_catalog_without_listing(pool, monkeypatch):
+    agent = MCPAgent()
+    await agent.initialize(command=sys.executable, args=[SERVER, "agent"])
+    pooled = agent.mcp_clients.sessions[sys.executable]
+
+    async def list_tools():
+        raise AssertionError("The agent step listed the tools")
+
+    monkeypatch.setattr(pooled, "list_tools", list_tools)
+    assert agent._refresh_tools() == ([], [])
+
+    await agent.mcp_clients.execute(
+        name=f"mcp_{agent.mcp_clients._sanitize_tool_name(sys.executable)}_add_tool",
+        tool_input={"tool_name": "late", "notify": True},
+    )
+    for _ in range(100):
+        added, _ = agent._refresh_tools()
+        if added:
+            break
+        await asyncio.sleep(0.05)
+
+    assert [name.rsplit("_", 1)[-1] for name in added] == ["late"]
+    assert any(name.endswith("_late") for name in agent.tool_schemas)
+    await agent.cleanup()
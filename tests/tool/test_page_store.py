@@ -0,0 +1,148 @@
+import time
+
+import pytest
+
+from app.tool.page_store import PageStore, content_hash, normalize_url
+
+
+@pytest.fixture
+def store(tmp_path) -> PageStore:
+    """Creates a page store backed by a temporary directory."""
+    return PageStore(cache_dir=tmp_path, max_memory_bytes=1000, max_disk_bytes=2000)
+
+
+def test_normalize_url():
+    """Tests that equivalent URLs share one key."""
+    assert normalize_url("HTTPS://Example.com:443/a?b=2&a=1#frag") == (
+        "https://example.com/a?a=1&b=2"
+    )
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("http://example.com:8080/") == "http://example.com:8080/"
+
+
+def test_put_and_get(store):
+    """Tests storing and reading back a page."""
+    store.put("https://example.com/", html="<p>hi</p>", text="hi", etag='"v1"')
+
+    page = store.get("https://EXAMPLE.com")
+    assert page.text == "hi"
+    assert page.content_hash == content_hash("<p>hi</p>")
+    assert store.conditional_headers("https://example.com/") == {
+        "If-None-Match": '"v1"'
+    }
+
+
+def test_derived_content_is_merged(store):
+    """Tests that text and markdown for the same content are kept together."""
+    store.put("https://example.com/", html="<p>hi</p>", text="hi")
+    store.put("https://example.com/", html="<p>hi</p>", markdown="hi")
+
+    page = store.get("https://example.com/")
+    assert page.text == "hi"
+    assert page.markdown == "hi"
+
+
+def test_validators_survive_puts_without_them(store, tmp_path):
+    """Tests that a put without validators keeps those stored for the content."""
+    url = "https://example.com/"
+    store.put(url, html="<p>hi</p>", etag='"v1"', last_modified="Mon, 01 Jan 2024")
+    store.put(url, html="<p>hi</p>", markdown="hi")
+
+    assert store.conditional_headers(url) == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024",
+    }
+    reloaded = PageStore(cache_dir=tmp_path)
+    assert reloaded.get(url).etag == '"v1"'
+
+    # New content drops validators that belonged to the old content
+    store.put(url, html="<p>changed</p>")
+    assert store.conditional_headers(url) == {}
+
+
+def test_reload_from_disk(store, tmp_path):
+    """Tests that a new store instance sees persisted pages."""
+    store.put("https://example.com/", html="<p>hi</p>", text="hi")
+
+    reloaded = PageStore(cache_dir=tmp_path)
+    assert reloaded.get("https://example.com/").text == "hi"
+
+
+def test_identical_content_shares_storage(store):
+    """Tests content addressing across URLs."""
+    store.put("https://a.example.com/", html="same body")
+    store.put("https://b.example.com/", html="same body")
+
+    assert len(store._disk_sizes) == 1
+
+
+def test_memory_and_disk_budgets(store):
+    """Tests LRU eviction under the configured budgets."""
+    for i in range(10):
+        store.put(f"https://example.com/{i}", html=str(i) * 400)
+
+    assert store.memory_bytes <= store.max_memory_bytes
+    assert store.disk_bytes <= store.max_disk_bytes
+    assert store.get("https://example.com/0") is None
+    assert store.get("https://example.com/9") is not None
+
+
+def test_freshness_and_revalidation(store):
+    """Tests stale pages are revalidated instead of dropped."""
+    store.fresh_seconds = 60
+    page = store.put("https://example.com/", html="<p>hi</p>")
+    page.fetched_at = time.time() - 120
+
+    assert store.get_fresh("https://example.com/") is None
+    store.revalidated("https://example.com/")
+    assert store.get_fresh("https://example.com/") is not None
+
+
+def test_disk_bytes_track_shared_objects(store):
+    """Tests the running disk total as shared bodies are added and evicted."""
+    store.put("https://a.example.com/", html="same body")
+    store.put("https://b.example.com/", html="same body")
+    size = store.disk_bytes
+    assert size == sum(store._disk_sizes.values())
+
+    store._evict_from_disk("https://a.example.com/")
+    assert store.disk_bytes == size
+    store._evict_from_disk("https://b.example.com/")
+    assert store.disk_bytes == 0
+
+
+def test_memory_hits_keep_pages_on_disk(store):
+    """Tests that pages used from memory are the last evicted from disk."""
+    store.put("https://example.com/hot", html="h" * 400)
+    for i in range(5):
+        store.put(f"https://example.com/{i}", html=str(i) * 400)
+        assert store.get("https://example.com/hot") is not None
+
+    assert "https://example.com/hot" in store._disk_index
+    assert "https://example.com/0" not in store._disk_index
+
+
+@pytest.mark.asyncio
+async def test_async_api_uses_a_worker_thread(store, tmp_path, monkeypatch):
+    """Tests that disk access from the async API runs off the event loop."""
+    import threading
+
+    await store.put_async("https://example.com/", html="<p>hi</p>", text="hi")
+    loop_thread = threading.get_ident()
+    threads = []
+    load = PageStore._load_from_disk
+
+    def recording_load(self, key):
+        threads.append(threading.get_ident())
+        return load(self, key)
+
+    monkeypatch.setattr(PageStore, "_load_from_disk", recording_load)
+    reloaded = PageStore(cache_dir=tmp_path)
+    page = await reloaded.get_fresh_async("https://example.com/")
+
+    assert page.text == "hi"
+    assert threads and loop_thread not in threads
+    # Memory hits are served directly
+    threads.clear()
+    assert (await reloaded.get_async("https://example.com/")).text == "hi"
+    assert threads == []
@@ -0,0 +1,105 @@
+import pytest
+
+from app.config import ResourcePolicySettings
+from app.tool.resource_policy import ResourcePolicy
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeResponse:
+    def __init__(self, size):
+        self.headers = {} if size is None else {"content-length": str(size)}
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type, size=100):
+        self.request = FakeRequest(url, resource_type)
+        self.size = size
+        self.outcome = None
+        self.fetched = []
+
+    async def abort(self, error_code=None):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+    async def fetch(self, method=None):
+        self.fetched.append(method)
+        return FakeResponse(self.size)
+
+
+@pytest.mark.asyncio
+async def test_blocks_by_type_and_domain():
+    policy = ResourcePolicy(ResourcePolicySettings(enabled=True))
+    routes = [
+        FakeRoute("https://example.com/", "document"),
+        FakeRoute("https://example.com/logo.png", "image"),
+        FakeRoute("https://example.com/font.woff2", "font"),
+        FakeRoute("https://www.google-analytics.com/analytics.js", "script"),
+        FakeRoute("https://example.com/app.js", "script"),
+    ]
+    before = policy.snapshot()
+    for route in routes:
+        await policy.handle_route(route)
+
+    assert [r.outcome for r in routes] == [
+        "continued",
+        "aborted",
+        "aborted",
+        "aborted",
+        "continued",
+    ]
+    stats = policy.stats.since(before)
+    assert stats.allowed_requests == 2
+    assert stats.blocked_by_reason == {"image": 1, "font": 1, "blocked domain": 1}
+    assert "3 blocked" in stats.summary()
+
+
+@pytest.mark.asyncio
+async def test_drops_oversized_responses():
+    policy = ResourcePolicy(
+        ResourcePolicySettings(
+            enabled=True, block_resource_types=[], max_response_bytes=1000
+        )
+    )
+    small = FakeRoute("https://example.com/a.png", "image", size=500)
+    large = FakeRoute("https://example.com/b.mp4", "media", size=5000)
+    unknown = FakeRoute("https://example.com/c.woff2", "font", size=None)
+    script = FakeRoute("https://example.com/app.js", "script", size=5000)
+    for route in (small, large, unknown, script):
+        await policy.handle_route(route)
+
+    # Media sizes come from HEAD requests; allowed requests load normally
+    assert small.fetched == large.fetched == ["HEAD"]
+    assert [r.outcome for r in (small, large, unknown, script)] == [
+        "continued",
+        "aborted",
+        "continued",
+        "continued",
+    ]
+    # Other subresources go through without the extra round trip
+    assert script.fetched == []
+    assert policy.stats.blocked_by_reason == {"oversized": 1}
+    assert policy.stats.oversized_bytes == 5000
+    assert "5 KB of oversized responses not downloaded" in policy.stats.summary()
+
+    # The declared size is remembered
+    again = FakeRoute("https://example.com/b.mp4", "media", size=5000)
+    await policy.handle_route(again)
+    assert again.outcome == "aborted" and again.fetched == []
+
+
+@pytest.mark.asyncio
+async def test_no_size_check_without_a_cap():
+    policy = ResourcePolicy(
+        ResourcePolicySettings(enabled=True, block_resource_types=[])
+    )
+    route = FakeRoute("https://example.com/a.mp4", "media", size=5000)
+    await policy.handle_route(route)
+
+    assert route.outcome == "continued" and route.fetched == []
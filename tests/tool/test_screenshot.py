@@ -0,0 +1,71 @@
+import base64
+import io
+import random
+
+import pytest
+from PIL import Image
+
+from app.config import ScreenshotSettings
+from app.tool.browser_use_tool import BrowserUseTool
+from app.tool.screenshot import fit_screenshot
+
+
+def _noisy_png(width: int, height: int) -> bytes:
+    rng = random.Random(0)
+    image = Image.frombytes("RGB", (width, height), rng.randbytes(width * height * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_fit_screenshot_downscales_and_meets_byte_budget():
+    settings = ScreenshotSettings(max_width=800, max_height=600, max_bytes=60_000)
+    fitted = fit_screenshot(_noisy_png(1600, 1200), settings)
+
+    image = Image.open(io.BytesIO(fitted))
+    assert image.format == "JPEG"
+    assert image.width <= 800 and image.height <= 600
+    assert len(fitted) <= 60_000
+
+
+class FakeState:
+    url = "https://example.com/"
+    title = "Example"
+    tabs = []
+    element_tree = None
+    pixels_above = 0
+    pixels_below = 0
+    viewport_info = None
+
+    def __init__(self):
+        self.screenshot = base64.b64encode(_noisy_png(200, 100)).decode()
+
+
+class FakeContext:
+    class config:
+        browser_window_size = {"height": 100}
+
+    def __init__(self):
+        self.state = FakeState()
+
+    async def get_state(self):
+        return self.state
+
+    async def get_current_page(self):
+        return object()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_page_skips_screenshot():
+    tool = BrowserUseTool(llm=None)
+    context = FakeContext()
+
+    first = await tool.get_current_state(context)
+    second = await tool.get_current_state(context)
+    context.state.pixels_above = 100
+    third = await tool.get_current_state(context)
+
+    assert first.base64_image
+    assert second.base64_image is None
+    assert "unchanged" in second.output
+    assert third.base64_image
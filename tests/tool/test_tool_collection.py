@@ -0,0 +1,92 @@
+import subprocess
+import sys
+
+import pytest
+
+from app.tool.base import BaseTool, ToolResult
+from app.tool.tool_collection import ToolCollection
+
+
+created = []
+
+
+class CountingTool(BaseTool):
+    name: str = "counting"
+    description: str = "Counts its instances"
+    parameters: dict = {"type": "object", "properties": {}}
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        created.append(self.name)
+
+    async def execute(self, **kwargs) -> ToolResult:
+        return ToolResult(output="counted")
+
+
+class OtherTool(CountingTool):
+    name: str = "other"
+
+
+@pytest.fixture(autouse=True)
+def reset_created():
+    created.clear()
+
+
+def test_tool_class_is_created_on_first_use():
+    tools = ToolCollection(CountingTool, OtherTool())
+
+    assert created == ["other"]
+    assert "counting" in tools
+    assert [p["function"]["name"] for p in tools.to_params()] == [
+        "counting",
+        "other",
+    ]
+    assert tools.to_params()[0] == CountingTool().to_param()
+    assert tools.get_tool("counting", create=False) is None
+    assert "counting" not in tools.tool_map
+    created.clear()
+
+    tool = tools.get_tool("counting")
+    assert isinstance(tool, CountingTool)
+    assert tools.get_tool("counting") is tool
+    assert tools.tools[0] is tool
+    assert created == ["counting"]
+
+
+@pytest.mark.asyncio
+async def test_execute_creates_tool():
+    tools = ToolCollection(CountingTool)
+
+    result = await tools.execute(name="counting", tool_input={})
+
+    assert result.output == "counted"
+    assert list(tools.tool_map) == ["counting"]
+
+
+def test_duplicate_names_are_skipped():
+    tools = ToolCollection(CountingTool, CountingTool())
+
+    assert len(tools.tools) == 1
+    assert created == ["counting"]
+
+
+def test_agent_import_skips_heavy_libraries():
+    code = (
+        "import sys, app.agent.manus, app.flow.flow_factory\n"
+        "lazy = ['browser_use', 'boto3', 'mcp', 'googlesearch', "
+        "'baidusearch', 'duckduckgo_search', 'crawl4ai', "
+        "'app.tool.browser_use_tool']\n"
+        "print(','.join(m for m in lazy if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
+
+
+def test_browser_tool_name_matches_the_tool():
+    from app.agent.browser import BROWSER_TOOL_NAME
+    from app.tool import BrowserUseTool
+
+    assert BROWSER_TOOL_NAME == BrowserUseTool.model_fields["name"].default